@@ -18,8 +18,8 @@ DB_NAME = os.getenv("DB_NAME")
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # Create SQLAlchemy engine
-# AWS RDS requires SSL mode by default
-engine = create_engine(DATABASE_URL, connect_args={"sslmode": "require"})
+# AWS RDS requires SSL mode by default (DB_SSLMODE=disable for a local Postgres)
+engine = create_engine(DATABASE_URL, connect_args={"sslmode": os.getenv("DB_SSLMODE", "require")})
 
 Base = declarative_base()
 
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import JSON, Column, Integer, BigInteger, String, DateTime, ForeignKey, Sequence
 from sqlalchemy.orm import relationship
 from .db import Base  # Import Base from your db.py
 from sqlalchemy.sql import func
@@ -96,6 +96,8 @@ class VotersTable(Base):
     voters_city = Column(String(100), nullable=False)
     voters_district = Column(String(100), nullable=False)
     pincode = Column(String(10), nullable=False)
+    # pending while a deferred registration's photo/signature are still uploading
+    media_status = Column(String(20), nullable=False, server_default="ready")
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -113,5 +115,50 @@ class SuperAdminLogs(Base):
     super_admin = relationship("SuperAdmin")
 
 
+# ---------- ON-CHAIN EVENT INDEX (utils/event_indexer.py) ----------
+class ChainEvent(Base):
+    __tablename__ = "chain_events"
 
+    tx_hash = Column(String(66), primary_key=True)
+    log_index = Column(Integer, primary_key=True)
+    block_number = Column(BigInteger, nullable=False, index=True)
+    event = Column(String(50), nullable=False)
+    admin_wallet = Column(String(42), nullable=False, index=True)
+    candidate = Column(String(255), nullable=True)
+    voter_id = Column(String(255), nullable=True)
 
+
+class ChainAdmin(Base):
+    __tablename__ = "chain_admins"
+
+    admin_wallet = Column(String(42), primary_key=True)
+    block_number = Column(BigInteger, nullable=False)
+
+
+class CandidateTally(Base):
+    __tablename__ = "candidate_tallies"
+
+    admin_wallet = Column(String(42), primary_key=True)
+    candidate = Column(String(255), primary_key=True)
+    votes = Column(BigInteger, nullable=False, default=0)
+    registered_block = Column(BigInteger, nullable=True)
+    registered_log_index = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class IndexedBlock(Base):
+    __tablename__ = "indexed_blocks"
+
+    block_number = Column(BigInteger, primary_key=True)
+    block_hash = Column(String(66), nullable=False)
+
+
+class IndexerCheckpoint(Base):
+    __tablename__ = "indexer_checkpoints"
+
+    name = Column(String(50), primary_key=True)
+    block_number = Column(BigInteger, nullable=False)
+
+
+# Block numbers handed out by utils/id_generator.py; one nextval() reserves ID_BLOCK_SIZE ids
+id_blocks = Sequence("id_blocks", metadata=Base.metadata)
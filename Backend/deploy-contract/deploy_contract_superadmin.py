@@ -68,6 +68,7 @@ print("Deploying contract...")
 # Wait for receipt
 tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
 print(f"Contract deployed at: {tx_receipt.contractAddress}")
+print(f"Deployed in block {tx_receipt.blockNumber}; set VOTED_INDEX_START_BLOCK={tx_receipt.blockNumber} in Backend/.env")
 
 # Save address
 with open("Voting_address.txt", "w") as f:
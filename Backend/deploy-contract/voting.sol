@@ -32,6 +32,7 @@ contract Voting {
     event AdminAdded(address indexed admin);
     event CandidateRegistered(address indexed admin, string candidate);
     event VoteCast(address indexed admin, string voterId, string candidate);
+    event VoteSkipped(address indexed admin, string voterId, string candidate);
 
     modifier onlySuperAdmin() {
         require(msg.sender == superAdmin, "Not super admin");
@@ -76,6 +77,24 @@ contract Voting {
         emit VoteCast(msg.sender, voterId, candidate);
     }
 
+    // Cast many votes in one tx. A bad entry (already voted / unknown candidate)
+    // is skipped with VoteSkipped instead of reverting the whole batch.
+    function castVotesBatch(string[] memory voterIds, string[] memory candidates) public onlyAdmin {
+        require(voterIds.length == candidates.length, "Length mismatch");
+
+        for (uint i = 0; i < voterIds.length; i++) {
+            if (voters[msg.sender][voterIds[i]].hasVoted || !isCandidateRegistered[msg.sender][candidates[i]]) {
+                emit VoteSkipped(msg.sender, voterIds[i], candidates[i]);
+                continue;
+            }
+
+            voters[msg.sender][voterIds[i]] = Voter(true, candidates[i]);
+            candidateVotes[msg.sender][candidates[i]] += 1;
+
+            emit VoteCast(msg.sender, voterIds[i], candidates[i]);
+        }
+    }
+
     function hasVoted(address adminAddr, string memory voterId) public view returns (bool) {
         return voters[adminAddr][voterId].hasVoted;
     }
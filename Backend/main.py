@@ -3,6 +3,7 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from utils.voter_card_sending_queue import process_voter_card_emails
+from utils.media_uploads import process_media_uploads
 from webSocket import scannerdata_ws
 from database.db import Base, engine
 from routes.super_admin_routes import router as super_admin_router
@@ -14,7 +15,11 @@ from routes.blockchain_monitor_routes import router as blockchain_monitor_router
 from routes.super_admin_logs_routes import router as super_admin_logs_router
 from routes.voters_public import router as voters_public_router
 from routes.scanner_routes import router as qr_scanner_routes
+from routes.export_routes import router as export_router
+from routes.voter_import_routes import router as voter_import_router
 import webSocket.blockchain_health as health_ws
+from utils.fee_oracle import start_fee_sampler
+from utils.chain_registry import close_chain_clients
 
 app = FastAPI(title="PostgreSQL API")
 Base.metadata.create_all(bind=engine)
@@ -32,6 +37,12 @@ def start_queue_processor():
     # Thread me run karo taaki API block na ho
     threading.Thread(target=process_voter_card_emails, daemon=True).start()
     print("Email queue processor started in background")
+    threading.Thread(target=process_media_uploads, daemon=True).start()
+    start_fee_sampler()
+
+@app.on_event("shutdown")
+async def close_chain_client():
+    await close_chain_clients()
 
 app.include_router(super_admin_router, prefix="/api", tags=["Super Admin"])
 app.include_router(admin, prefix="/api", tags=["Admin"])
@@ -42,6 +53,8 @@ app.include_router(super_admin_logs_router, prefix="/api", tags=["Super Admin Lo
 app.include_router(blockchain_monitor_router, prefix="/api", tags=["Blockchain Monitor"])
 app.include_router(voters_public_router, prefix="/api", tags=["voter"])
 app.include_router(qr_scanner_routes , prefix="/api" , tags=["Scanner"])
+app.include_router(export_router, prefix="/api", tags=["Exports"])
+app.include_router(voter_import_router, prefix="/api", tags=["Voter Import"])
 
 # websocket connection 
 app.include_router(scannerdata_ws.router)
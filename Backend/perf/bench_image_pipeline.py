@@ -0,0 +1,152 @@
+"""
+bench_image_pipeline.py
+
+Benchmark for utils/image_pipeline.py on phone-sized inputs.
+
+For each input photo and signature it measures:
+  - normalize time (decode + EXIF orient + resize + recompress), p50/p95
+  - bytes before / after (what goes to Cloudinary and what the card downloads)
+  - time to draw the image onto the voter card canvas and the PDF size,
+    original vs normalized
+
+Usage (from Backend/):
+    python perf/bench_image_pipeline.py                       # synthetic 12 MP phone photos
+    python perf/bench_image_pipeline.py --images ~/DCIM --signatures ~/sigs
+
+Without --images / --signatures it generates noisy 4032x3024 JPEGs tagged with
+EXIF orientation 6 (portrait shot held sideways, as phones write them) and
+2400x800 RGBA signature PNGs.
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from utils.image_pipeline import normalize_photo, normalize_signature, PHOTO_SIZE, SIGNATURE_SIZE  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".heic"}
+
+
+# ---------- INPUTS ----------
+def synthetic_photo(seed: int, size=(4032, 3024), quality: int = 92) -> bytes:
+    random.seed(seed)
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+    tint = Image.new("RGB", size, tuple(random.randint(60, 200) for _ in range(3)))
+    img = Image.blend(Image.blend(gradient, tint, 0.5), noise, 0.35)
+    exif = Image.Exif()
+    exif[0x0112] = 6    # Orientation: rotate 90 CW to display
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=quality, exif=exif)
+    return out.getvalue()
+
+
+def synthetic_signature(seed: int, size=(2400, 800)) -> bytes:
+    random.seed(seed)
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    points = [(x, size[1] // 2 + random.randint(-250, 250)) for x in range(100, size[0] - 100, 60)]
+    draw.line(points, fill=(20, 20, 90, 255), width=14, joint="curve")
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def load_inputs(directory: str, count: int, make):
+    if directory:
+        files = sorted(p for p in Path(directory).expanduser().iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        return [p.read_bytes() for p in files[:count]]
+    return [make(i) for i in range(count)]
+
+
+# ---------- MEASUREMENTS ----------
+def draw_on_card(data: bytes, box: tuple) -> tuple:
+    """(ms, pdf bytes) for drawing one image the way send_voting_card.py does."""
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(175 * mm, 105 * mm))
+    c.drawImage(ImageReader(io.BytesIO(data)), 10 * mm, 10 * mm, box[0] * mm, box[1] * mm,
+                preserveAspectRatio=True, mask="auto")
+    c.showPage()
+    c.save()
+    return (time.perf_counter() - started) * 1000, len(buffer.getvalue())
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def bench(inputs: list, normalize, box: tuple, repeat: int) -> dict:
+    normalize_ms, bytes_in, bytes_out = [], [], []
+    card_ms_original, card_ms_normalized, pdf_original, pdf_normalized = [], [], [], []
+
+    for data in inputs:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            normalized = normalize(data)
+            normalize_ms.append((time.perf_counter() - started) * 1000)
+        bytes_in.append(len(data))
+        bytes_out.append(len(normalized))
+
+        ms, size = draw_on_card(data, box)
+        card_ms_original.append(ms)
+        pdf_original.append(size)
+        ms, size = draw_on_card(normalized, box)
+        card_ms_normalized.append(ms)
+        pdf_normalized.append(size)
+
+    return {
+        "images": len(inputs),
+        "normalize_ms": {"p50": round(percentile(normalize_ms, 50), 1), "p95": round(percentile(normalize_ms, 95), 1)},
+        "avg_bytes_in": int(statistics.mean(bytes_in)),
+        "avg_bytes_out": int(statistics.mean(bytes_out)),
+        "size_reduction": round(1 - sum(bytes_out) / sum(bytes_in), 4),
+        "card_draw_ms": {
+            "original": round(statistics.median(card_ms_original), 1),
+            "normalized": round(statistics.median(card_ms_normalized), 1),
+        },
+        "card_pdf_bytes": {
+            "original": int(statistics.mean(pdf_original)),
+            "normalized": int(statistics.mean(pdf_normalized)),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voter photo/signature normalization pipeline")
+    parser.add_argument("--images", help="directory of phone photos (default: synthetic 12 MP JPEGs)")
+    parser.add_argument("--signatures", help="directory of signature scans (default: synthetic PNGs)")
+    parser.add_argument("--count", type=int, default=10, help="inputs of each kind")
+    parser.add_argument("--repeat", type=int, default=3, help="normalize runs per input")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    photos = load_inputs(args.images, args.count, synthetic_photo)
+    signatures = load_inputs(args.signatures, args.count, synthetic_signature)
+
+    report = {
+        "photo_target_px": PHOTO_SIZE,
+        "signature_target_px": SIGNATURE_SIZE,
+        "photo": bench(photos, normalize_photo, (32, 40), args.repeat),
+        "signature": bench(signatures, normalize_signature, (31, 10), args.repeat),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+load_cast_vote.py
+
+End-to-end load test for /cast-vote without spending testnet AVAX.
+
+  1. starts anvil (local EVM) and a throwaway redis-server
+  2. compiles + deploys deploy-contract/voting.sol and a Multicall3 stand-in,
+     adds an admin wallet and registers candidates for it
+  3. starts the API (uvicorn main:app) and relayer worker(s) pointed at them
+  4. drives /cast-vote + /vote-status at the given concurrency
+  5. reports votes/sec, p50/p95/p99 latencies, revert rate and nonce gaps
+
+Usage (from Backend/):
+    python perf/load_cast_vote.py --votes 2000 --concurrency 100
+
+Requires:
+    anvil (foundry) and redis-server on PATH, a local Postgres in DB_* env
+    (DB_SSLMODE=disable), and the backend requirements installed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import aiohttp
+import jwt
+import redis
+import requests
+from cryptography.fernet import Fernet
+from dotenv import load_dotenv
+from eth_account import Account
+from solcx import compile_standard, install_solc
+from sqlalchemy import create_engine, text
+from web3 import Web3
+
+load_dotenv()
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SOLC_VERSION = "0.8.0"
+
+# anvil's first default dev account (public, well-known test key)
+ANVIL_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+ANVIL_CHAIN_ID = 31337
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+
+# ---------- LOCAL SERVICES ----------
+def wait_until(check, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{what} did not come up within {timeout}s")
+
+
+def start_anvil(port: int, block_time: float) -> subprocess.Popen:
+    cmd = ["anvil", "--port", str(port), "--chain-id", str(ANVIL_CHAIN_ID), "--silent"]
+    if block_time > 0:
+        cmd += ["--block-time", str(block_time)]
+    proc = subprocess.Popen(cmd)
+    w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{port}"))
+    wait_until(w3.is_connected, 15, "anvil")
+    return proc
+
+
+def start_redis(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        ["redis-server", "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    wait_until(redis.Redis(port=port).ping, 10, "redis-server")
+    return proc
+
+
+# ---------- CHAIN SETUP ----------
+def deploy_voting(w3: Web3, deployer) -> str:
+    with open(BACKEND_DIR / "deploy-contract" / "voting.sol", "r") as f:
+        source = f.read()
+
+    install_solc(SOLC_VERSION)
+    compiled = compile_standard(
+        {
+            "language": "Solidity",
+            "sources": {"Voting.sol": {"content": source}},
+            "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}},
+        },
+        solc_version=SOLC_VERSION,
+    )
+    artifact = compiled["contracts"]["Voting.sol"]["Voting"]
+    voting = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["evm"]["bytecode"]["object"])
+
+    tx_hash = voting.constructor().transact({"from": deployer.address})
+    return w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+
+
+# aggregate3 with the same ABI as Multicall3, etched at its canonical address
+MULTICALL3_SOURCE = """
+pragma solidity ^0.8.0;
+
+contract Multicall3 {
+    struct Call3 { address target; bool allowFailure; bytes callData; }
+    struct Result { bool success; bytes returnData; }
+
+    function aggregate3(Call3[] calldata calls) public payable returns (Result[] memory returnData) {
+        returnData = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory ret) = calls[i].target.call(calls[i].callData);
+            require(success || calls[i].allowFailure, "Multicall3: call failed");
+            returnData[i] = Result(success, ret);
+        }
+    }
+}
+"""
+
+
+def deploy_multicall3(w3: Web3, deployer):
+    """anvil starts empty, so put aggregate3 where utils/multicall.py expects Multicall3."""
+    compiled = compile_standard(
+        {
+            "language": "Solidity",
+            "sources": {"Multicall3.sol": {"content": MULTICALL3_SOURCE}},
+            "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}},
+        },
+        solc_version=SOLC_VERSION,
+    )
+    artifact = compiled["contracts"]["Multicall3.sol"]["Multicall3"]
+    multicall = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["evm"]["bytecode"]["object"])
+    tx_hash = multicall.constructor().transact({"from": deployer.address})
+    deployed = w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+    w3.provider.make_request("anvil_setCode", [MULTICALL3_ADDRESS, w3.eth.get_code(deployed).to_0x_hex()])
+
+
+def setup_admin(w3: Web3, contract_address: str, super_admin, candidates: list):
+    """Fund a fresh admin wallet, make it a contract admin and register candidates."""
+    with open(BACKEND_DIR / "deploy-contract" / "Voting_abi.json", "r") as f:
+        contract = w3.eth.contract(address=contract_address, abi=json.load(f))
+
+    admin = Account.create()
+    w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction({
+        "from": super_admin.address, "to": admin.address, "value": w3.to_wei(100, "ether"),
+    }))
+    w3.eth.wait_for_transaction_receipt(
+        contract.functions.addAdmin(admin.address).transact({"from": super_admin.address})
+    )
+
+    nonce = w3.eth.get_transaction_count(admin.address)
+    tx_hashes = []
+    for i, candidate in enumerate(candidates):
+        txn = contract.functions.registerCandidate(candidate).build_transaction({
+            "chainId": ANVIL_CHAIN_ID,
+            "from": admin.address,
+            "nonce": nonce + i,
+            "gasPrice": w3.eth.gas_price,
+        })
+        tx_hashes.append(w3.eth.send_raw_transaction(admin.sign_transaction(txn).raw_transaction))
+    for tx_hash in tx_hashes:
+        w3.eth.wait_for_transaction_receipt(tx_hash)
+    return admin, contract
+
+
+# ---------- APP ----------
+def app_env(args, contract_address: str) -> dict:
+    env = dict(os.environ)
+    rpc_url = f"http://127.0.0.1:{args.anvil_port}"
+    # override every chain setting load_dotenv() may have pulled in, so nothing reaches a real network
+    env.update({
+        "AVAX_RPC": rpc_url,
+        "AVAX_RPC_URLS": rpc_url,
+        "CHAIN_ID": str(ANVIL_CHAIN_ID),
+        "SMART_CONTRACT_ADDRESS": contract_address,
+        "PUBLIC_ADDRESS_SUPER_ADMIN": Account.from_key(ANVIL_KEY).address,
+        "PRIVATE_KEY_SUPER_ADMIN": ANVIL_KEY,
+        "FUNDING_KEY": ANVIL_KEY,
+        "REDIS_HOST": "127.0.0.1",
+        "REDIS_PORT": str(args.redis_port),
+        "REDIS_PASSWORD": "",
+        "FERNET_KEY": env.get("FERNET_KEY") or Fernet.generate_key().decode(),
+        "JWT_SECRET": env.get("JWT_SECRET") or uuid.uuid4().hex,
+        "JWT_ALGORITHM": "HS256",
+        "SECRET_KEY": env.get("SECRET_KEY") or uuid.uuid4().hex,
+        "SESSION_TTL": "86400",
+        "VOTED_INDEX_START_BLOCK": "0",
+        "INDEXER_START_BLOCK": "0",
+        "MULTICALL3_ADDRESS": MULTICALL3_ADDRESS,
+        "RECEIPT_POLL_INTERVAL": str(args.receipt_poll),
+        "PYTHONUNBUFFERED": "1",
+    })
+    return env
+
+
+def start_app(args, env: dict) -> list:
+    procs = [subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.api_port), "--workers", str(args.api_workers)],
+        cwd=BACKEND_DIR, env=env,
+    )]
+    for i in range(args.relayers):
+        procs.append(subprocess.Popen(
+            [sys.executable, "relayer.py"], cwd=BACKEND_DIR, env={**env, "RELAYER_NAME": f"perf-relayer-{i}"},
+        ))
+
+    wait_until(lambda: requests.get(f"http://127.0.0.1:{args.api_port}/docs").ok, 60, "API")
+    return procs
+
+
+def insert_admin(engine, admin_id: str, admin, env: dict):
+    fernet = Fernet(env["FERNET_KEY"].encode())
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO admin (admin_id, name, email, password, wallet_address, wallet_secret, admin_of_state)
+                VALUES (:admin_id, :name, :email, :password, :wallet_address, :wallet_secret, :admin_of_state)
+            """),
+            {
+                "admin_id": admin_id,
+                "name": "Load Test Admin",
+                "email": f"{admin_id.lower()}@perf.local",
+                "password": "-",
+                "wallet_address": admin.address,
+                "wallet_secret": fernet.encrypt(admin.key.hex().encode()).decode(),
+                "admin_of_state": "PERF",
+            }
+        )
+
+
+def login_cookies(redis_client, admin_id: str, env: dict) -> dict:
+    """Same session the OTP login creates: JWT cookie + session:{admin_id}:{device_id} in Redis."""
+    device_id = str(uuid.uuid4())
+    token = jwt.encode({"id": admin_id, "iat": int(time.time())}, env["JWT_SECRET"], algorithm="HS256")
+    redis_client.setex(f"session:{admin_id}:{device_id}", 86400, token)
+    return {"access_token": token, "device_id": device_id}
+
+
+# ---------- LOAD ----------
+def percentile(values: list, p: float):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return round(values[index] * 1000, 1)   # ms
+
+
+async def drive_vote(session, base_url: str, voter_id: str, candidate: str, args, stats: dict):
+    started = time.perf_counter()
+    while True:
+        async with session.post(f"{base_url}/api/cast-vote", json={"voter_id": voter_id, "candidate": candidate}) as resp:
+            body = await resp.json(content_type=None)
+            if resp.status == 429:
+                stats["throttled"] += 1
+                await asyncio.sleep(float(resp.headers.get("Retry-After", 1)))
+                continue
+        break
+    stats["accept_latency"].append(time.perf_counter() - started)
+
+    if body.get("status") != "queued":
+        stats["rejected"] += 1
+        return
+
+    deadline = time.monotonic() + args.vote_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(args.status_interval)
+        async with session.get(f"{base_url}/api/vote-status/{voter_id}") as resp:
+            status = await resp.json(content_type=None)
+        stats["status_polls"] += 1
+        if status.get("status") in ("success", "failed"):
+            stats["confirm_latency"].append(time.perf_counter() - started)
+            stats[status["status"]] += 1
+            if status.get("tx_hash"):
+                stats["tx_hashes"].add(status["tx_hash"])
+            if status["status"] == "failed":
+                stats["failure_reasons"][status.get("reason", "")] = stats["failure_reasons"].get(status.get("reason", ""), 0) + 1
+            return
+    stats["timed_out"] += 1
+
+
+async def run_load(args, cookies: dict, candidates: list) -> dict:
+    stats = {
+        "accept_latency": [], "confirm_latency": [], "tx_hashes": set(), "failure_reasons": {},
+        "success": 0, "failed": 0, "rejected": 0, "throttled": 0, "timed_out": 0, "status_polls": 0,
+    }
+    base_url = f"http://127.0.0.1:{args.api_port}"
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with aiohttp.ClientSession(cookies=cookies, connector=aiohttp.TCPConnector(limit=args.concurrency)) as session:
+        async def one(i):
+            async with semaphore:
+                await drive_vote(session, base_url, f"PERF-{run_id}-{i}", random.choice(candidates), args, stats)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.votes)))
+        stats["duration"] = time.perf_counter() - started
+    return stats
+
+
+def chain_report(w3: Web3, redis_client, admin_address: str, tx_hashes: set) -> dict:
+    reverted = sum(1 for tx_hash in tx_hashes if w3.eth.get_transaction_receipt(tx_hash).status != 1)
+    chain_latest = w3.eth.get_transaction_count(admin_address, "latest")
+    chain_pending = w3.eth.get_transaction_count(admin_address, "pending")
+    counter = int(redis_client.get(f"nonce:{admin_address}") or 0)
+    return {
+        "transactions": len(tx_hashes),
+        "reverted": reverted,
+        "revert_rate": round(reverted / len(tx_hashes), 4) if tx_hashes else 0,
+        "chain_nonce": chain_latest,
+        "chain_pending_nonce": chain_pending,
+        "manager_nonce": counter,
+        # handed out by the nonce manager but never mined / never broadcast
+        "nonce_gap": counter - chain_latest,
+        "released_unfilled": redis_client.zcard(f"nonce:released:{admin_address}"),
+        "allocated_unmined": redis_client.zcard(f"nonce:allocated:{admin_address}"),
+    }
+
+
+def print_report(args, stats: dict, chain: dict):
+    confirmed = stats["success"] + stats["failed"]
+    report = {
+        "votes": args.votes,
+        "concurrency": args.concurrency,
+        "duration_s": round(stats["duration"], 2),
+        "votes_per_sec": round(stats["success"] / stats["duration"], 2),
+        "success": stats["success"],
+        "failed": stats["failed"],
+        "rejected": stats["rejected"],
+        "timed_out": stats["timed_out"],
+        "throttled_429": stats["throttled"],
+        "status_polls_per_vote": round(stats["status_polls"] / confirmed, 2) if confirmed else None,
+        "accept_ms": {p: percentile(stats["accept_latency"], p) for p in (50, 95, 99)},
+        "confirm_ms": {p: percentile(stats["confirm_latency"], p) for p in (50, 95, 99)},
+        "failure_reasons": stats["failure_reasons"],
+        "chain": chain,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /cast-vote against a local chain")
+    parser.add_argument("--votes", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50, help="voters driven at the same time")
+    parser.add_argument("--candidates", type=int, default=5)
+    parser.add_argument("--block-time", type=float, default=2, help="anvil block time, 0 = mine every tx")
+    parser.add_argument("--relayers", type=int, default=1)
+    parser.add_argument("--api-workers", type=int, default=1)
+    parser.add_argument("--anvil-port", type=int, default=8545)
+    parser.add_argument("--redis-port", type=int, default=6390)
+    parser.add_argument("--api-port", type=int, default=8010)
+    parser.add_argument("--status-interval", type=float, default=0.5, help="seconds between /vote-status polls")
+    parser.add_argument("--vote-timeout", type=float, default=300)
+    parser.add_argument("--receipt-poll", type=float, default=0.5)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    procs = []
+    engine = None
+    admin_id = f"PERF{uuid.uuid4().hex[:10].upper()}"
+    try:
+        procs.append(start_anvil(args.anvil_port, args.block_time))
+        procs.append(start_redis(args.redis_port))
+
+        w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{args.anvil_port}"))
+        super_admin = Account.from_key(ANVIL_KEY)
+        contract_address = deploy_voting(w3, super_admin)
+        deploy_multicall3(w3, super_admin)
+        candidates = [f"CAND{i}" for i in range(args.candidates)]
+        admin, _ = setup_admin(w3, contract_address, super_admin, candidates)
+        print(f"Voting deployed at {contract_address}, admin {admin.address}")
+
+        env = app_env(args, contract_address)
+        redis_client = redis.Redis(port=args.redis_port, decode_responses=True)
+        procs += start_app(args, env)
+
+        engine = create_engine(
+            f"postgresql://{env['DB_USER']}:{env['DB_PASS']}@{env['DB_HOST']}:{env['DB_PORT']}/{env['DB_NAME']}",
+            connect_args={"sslmode": env.get("DB_SSLMODE", "disable")},
+        )
+        insert_admin(engine, admin_id, admin, env)
+        cookies = login_cookies(redis_client, admin_id, env)
+
+        stats = asyncio.run(run_load(args, cookies, candidates))
+        print_report(args, stats, chain_report(w3, redis_client, admin.address, stats["tx_hashes"]))
+
+    finally:
+        if engine is not None:
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM admin WHERE admin_id = :id"), {"id": admin_id})
+        for proc in reversed(procs):
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
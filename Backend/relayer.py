@@ -0,0 +1,9 @@
+import os
+from utils.vote_relayer import VoteRelayer
+
+# Stand-alone vote relayer. Scale by running more of these; each one joins the
+# same consumer group. RELAYER_NAME keeps the consumer name stable across restarts
+# so a restarted relayer picks up its own pending entries straight away.
+
+if __name__ == "__main__":
+    VoteRelayer(os.getenv("RELAYER_NAME")).run()
@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks,  Request, Body
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks,  Request, Body, Cookie, Header, Response
 from sqlalchemy.orm import Session
-from web3 import Web3
 from database.db import get_db
 from middleware.security import access_check_for_admin
 from ua_parser import user_agent_parser
 from dotenv import load_dotenv
 from database.db import redis_client
 from utils.otp_on_email import generate_otp, send_otp_email, verify_otp, store_otp_in_redis
+from utils.rate_limit import RateLimited, client_ip, too_many_requests
 from utils.id_generator import generateIdForCandidate
+from utils.receipt_tracker import receipt_tracker
+from utils.nonce_manager import allocate_nonce, handle_send_error, mark_nonce_mined, record_sent_tx
+from utils.fee_oracle import get_fee_params
+from utils.chain_registry import get_async_w3, get_async_contract, CHAIN_ID
+from utils.signer_cache import evict_signer
+from utils.event_indexer import get_tallies, indexed_block, index_is_stale
+from utils.results_cache import contract_results, latest_block_number, results_etag, etag_matches
+from typing import Optional
+from web3 import Web3
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from uuid import uuid4
 import jwt
 import time
+import asyncio
 import os
 import json
 
@@ -28,24 +38,8 @@ SESSTION_TTL = int(os.getenv("SESSION_TTL", 3600))  # Default to 1 hour
 router = APIRouter()
 
 
-with open("./deploy-contract/Voting_abi.json", "r") as f:
-    abi = json.load(f)
-
-RPC = os.getenv("AVAX_RPC")  # Fuji RPC
-w3 = Web3(Web3.HTTPProvider(RPC))
-
 from cryptography.fernet import Fernet
 
-
-
-FUNDING_KEY = os.getenv("FUNDING_KEY")  # Private key of funding wallet
-
-# ------------------ Web3 Setup ------------------
-funding_account = w3.eth.account.from_key(FUNDING_KEY)
-
-contract_address = os.getenv("SMART_CONTRACT_ADDRESS")
-contract = w3.eth.contract(address=contract_address, abi=abi)
-
 FERNET_KEY = os.getenv("FERNET_KEY")
 fernet = Fernet(FERNET_KEY.encode())
 def decrypt_private_key(encrypted_pk: str) -> str:
@@ -77,7 +71,10 @@ async def admin_login(
 
         # Generate OTP
         otp = generate_otp()
-        background_tasks.add_task(store_otp_in_redis, email, otp , "login" )
+        try:
+            store_otp_in_redis(email, otp, "login", ip=client_ip(request))
+        except RateLimited as e:
+            raise too_many_requests(e)
         background_tasks.add_task(send_otp_email, email, otp)
         # send_otp_email(email, otp)
 
@@ -89,6 +86,8 @@ async def admin_login(
             "message": "OTP sent to admin's email",
             "success": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
@@ -168,6 +167,26 @@ async def verify_admin_login_otp(
     return response
 
 
+@router.post("/admin/logout")
+async def admin_logout(
+    device_id: str = Cookie(None),
+    admin_data=Depends(access_check_for_admin),
+):
+    redis_client.delete(f"session:{admin_data['admin_id']}:{device_id}")
+    redis_client.delete(f"device-info:{admin_data['admin_id']}:{device_id}")
+
+    # Relayers drop this admin's decrypted signing key from memory
+    evict_signer(Web3.to_checksum_address(admin_data["wallet_address"]))
+
+    response = JSONResponse({
+        "message": "Admin Logged Out Successfully!",
+        "Success": True
+    })
+    response.delete_cookie("access_token")
+    response.delete_cookie("device_id")
+    return response
+
+
 @router.get("/admin/get-detials")
 async def get_admin_details(
     admin_data=Depends(access_check_for_admin),
@@ -271,18 +290,29 @@ async def register_candidate(
         # Candidate identifier can be unique, e.g., "name|aadhaar|party"
         candidate_identifier = candidate_id
 
-        nonce = w3.eth.get_transaction_count(admin_wallet)
-        txn = contract.functions.registerCandidate(candidate_identifier).build_transaction({
-            "from": admin_wallet,
-            "nonce": nonce,
-            "gas": 2000000,
-            "gasPrice": w3.to_wei("50", "gwei"),
-        })
+        # Shared nonce manager so this does not race the vote relayer for the same wallet
+        fee_params = await asyncio.to_thread(get_fee_params)
+        nonce = await asyncio.to_thread(allocate_nonce, admin_wallet)
+        try:
+            async_w3 = await get_async_w3()
+            contract = await get_async_contract()
+            txn = await contract.functions.registerCandidate(candidate_identifier).build_transaction({
+                "chainId": CHAIN_ID,
+                "from": admin_wallet,
+                "nonce": nonce,
+                "gas": 2000000,
+                **fee_params,
+            })
 
-        # Sign and send transaction
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key=decrypt_private_key(admin_data["wallet_secret"]))
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+            # Sign and send transaction
+            signed_txn = async_w3.eth.account.sign_transaction(txn, private_key=decrypt_private_key(admin_data["wallet_secret"]))
+            tx_hash = await async_w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            await asyncio.to_thread(handle_send_error, admin_wallet, nonce, e)
+            raise
+        record_sent_tx(admin_wallet, nonce, txn, tx_hash)
+        receipt = await asyncio.wrap_future(receipt_tracker.track(tx_hash))
+        mark_nonce_mined(admin_wallet, nonce)
 
         return {
             "message": "Candidate registered successfully",
@@ -319,27 +349,36 @@ async def get_candidates(
 
 
 @router.get("/admin/admin-results")
-async def get_results(admin_data=Depends(access_check_for_admin)):
+async def get_results(
+    admin_data=Depends(access_check_for_admin),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
     try:
         admin_wallet = admin_data["wallet_address"]
-        # print(contract.functions.getAllCandidates(admin_wallet).call())
-
-        # Call contract function: returns (candidate_ids[], votes[])
-        candidates, votes = contract.functions.getCandidatesWithVotes(admin_wallet).call()
-
-        results = []
-        for i in range(len(candidates)):
-            results.append({
-                "candidate_id": candidates[i],
-                "votes": votes[i]
-            })
-
-        return {
-            "status": "success",
-            "admin": admin_wallet,
-            "results": results
-        }
 
+        # Served from the event index (Redis hot copy, then Postgres)
+        # while it is within INDEXER_MAX_LAG_BLOCKS of the head
+        results = get_tallies(admin_wallet)
+        body = {"status": "success", "admin": admin_wallet}
+        indexed = indexed_block()
+        if results is not None and not index_is_stale(indexed, await latest_block_number()):
+            body["indexed_block"] = indexed
+        else:
+            # Index has nothing for this admin yet or is catching up:
+            # getCandidatesWithVotes, cached per (wallet, block) with one
+            # shared read per block
+            results = await contract_results(admin_wallet)
+        body["results"] = results
+
+        # Unchanged tallies -> 304, dashboards can poll with If-None-Match
+        etag = results_etag(results)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(body, headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
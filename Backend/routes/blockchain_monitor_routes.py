@@ -1,21 +1,16 @@
 import os
-import requests
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from web3 import Web3
-from database.db import get_db
+from database.db import get_db, redis_client
 from middleware.security import access_check
+from utils.chain_registry import get_async_w3, get_http_session, endpoint_health
 
 # Load ENV variables
-RPC = os.getenv("AVAX_RPC")
-CHAIN_ID = int(os.getenv("CHAIN_ID", "43113"))
 SNOWTRACE_API_KEY = os.getenv("SNOWTRACE_API_KEY")
 CONTRACT_ADDRESS = os.getenv("SMART_CONTRACT_ADDRESS")
 
-# Web3 connection
-w3 = Web3(Web3.HTTPProvider(RPC))
-
 # Router
 router = APIRouter()
 
@@ -25,21 +20,22 @@ async def get_blockchain_health(
     # admin=Depends(access_check)  # ✅ Only superadmin access
 ):
     try:
+        async_w3 = await get_async_w3()
+        session = await get_http_session()
+
         # --- Latest block info ---
-        latest_block = w3.eth.get_block("latest")
+        latest_block = await async_w3.eth.get_block("latest")
         block_number = latest_block.number
         block_time = latest_block.timestamp
 
-        # --- Average block time (last 5 blocks) ---
-        timestamps = []
-        for i in range(block_number, block_number - 5, -1):
-            blk = w3.eth.get_block(i)
-            timestamps.append(blk.timestamp)
+        # --- Average block time (last 5 blocks) + gas price, fetched concurrently ---
+        *blocks, gas_price = await asyncio.gather(
+            *(async_w3.eth.get_block(i) for i in range(block_number - 1, block_number - 5, -1)),
+            async_w3.eth.gas_price,
+        )
+        timestamps = [block_time] + [blk.timestamp for blk in blocks]
         avg_block_time = (timestamps[0] - timestamps[-1]) / (len(timestamps) - 1)
 
-        # --- Gas price ---
-        gas_price = w3.eth.gas_price
-
         # --- Contract transaction count (via Snowtrace API) ---
         tx_count = None
         if SNOWTRACE_API_KEY and CONTRACT_ADDRESS:
@@ -49,7 +45,8 @@ async def get_blockchain_health(
                 f"&address={CONTRACT_ADDRESS}"
                 f"&sort=desc"
             )
-            resp = requests.get(url).json()
+            async with session.get(url) as resp:
+                resp = await resp.json(content_type=None)
             if resp.get("status") == "1":
                 tx_count = len(resp.get("result", []))
 
@@ -71,16 +68,17 @@ async def get_blockchain_health(
 @router.get("/blockchain/live-data")
 async def get_live_data():
     try:
-        # Latest block number
-        block_number_resp = requests.get(
-            "https://api-testnet.snowtrace.io/api?module=proxy&action=eth_blockNumber"
-        ).json()
-        latest_block = int(block_number_resp["result"], 16)
+        session = await get_http_session()
+
+        async def snowtrace(action: str):
+            async with session.get(f"https://api-testnet.snowtrace.io/api?module=proxy&action={action}") as resp:
+                return await resp.json(content_type=None)
 
-        # Current gas price
-        gas_resp = requests.get(
-            "https://api-testnet.snowtrace.io/api?module=proxy&action=eth_gasPrice"
-        ).json()
+        # Latest block number + current gas price
+        block_number_resp, gas_resp = await asyncio.gather(
+            snowtrace("eth_blockNumber"), snowtrace("eth_gasPrice")
+        )
+        latest_block = int(block_number_resp["result"], 16)
         gas_price_gwei = int(gas_resp["result"], 16) / 1e9
 
         return {
@@ -90,3 +88,24 @@ async def get_live_data():
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/super_admin/chain-endpoints")
+async def get_chain_endpoints(admin=Depends(access_check)):
+    # Per-RPC-endpoint request/error counts and EWMA latency seen by this process
+    return {
+        "Success": True,
+        "endpoints": endpoint_health(),
+    }
+
+
+@router.get("/super_admin/relayer-stats")
+async def get_relayer_stats(admin=Depends(access_check)):
+    # Signer cache counters each live relayer publishes to relayer:stats:{consumer}
+    relayers = {}
+    for key in redis_client.scan_iter("relayer:stats:*"):
+        relayers[key.split(":", 2)[2]] = {k: int(v) for k, v in redis_client.hgetall(key).items()}
+    return {
+        "Success": True,
+        "relayers": relayers,
+    }
@@ -1,126 +1,53 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-import json, os, hmac, hashlib
+from typing import Optional
+import asyncio, json, os, hmac, hashlib
 from web3 import Web3
-from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 
 from sqlalchemy.orm import Session
 from database.db import get_db, redis_client  # your existing DB + Redis setup
 from middleware.security import access_check_for_admin  # admin auth
+from utils.vote_status import (
+    reserve_vote, reserve_votes, unreserve_votes, get_vote_status, claim_idempotency_key, release_idempotency_key
+)
+from utils.vote_stream import enqueue_vote, enqueue_votes
+from utils.vote_events import vote_event_hub
+from utils.admission import (
+    AdmissionRejected, admit_vote, admit_votes, release_votes, retry_after, saturation, throughput
+)
+from utils.voted_index import is_voted, is_voted_many, voted_key
+from utils.chain_registry import get_async_contract
 
 
 # ---------- ENV / WEB3 SETUP ----------
 load_dotenv()
 
+VOTE_EVENTS_HEARTBEAT = float(os.getenv("VOTE_EVENTS_HEARTBEAT", 15))  # seconds between SSE keep-alives
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))               # NDJSON lines handled per Redis round trip
+BULK_MAX_LINES = int(os.getenv("BULK_MAX_LINES", 100000))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", 4096))
+
 app = FastAPI()
 router = APIRouter()
 
-RPC_URL = os.getenv("AVAX_RPC")
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
-chain_id = int(os.getenv("CHAIN_ID"))
-
-with open("./deploy-contract/Voting_abi.json", "r") as f:
-    abi = json.load(f)
-
-contract_address = os.getenv("SMART_CONTRACT_ADDRESS")
-contract = w3.eth.contract(address=contract_address, abi=abi)
-
-# ---------- ENCRYPTION ----------
-FERNET_KEY = os.getenv("FERNET_KEY")
-if not FERNET_KEY:
-    raise RuntimeError("FERNET_KEY missing in env")
-fernet = Fernet(FERNET_KEY.encode())
-
-
-def decrypt_private_key(encrypted_pk: str) -> str:
-    return fernet.decrypt(encrypted_pk.encode()).decode()
-
-
-def encrypt_private_key(pk: str) -> str:
-    return fernet.encrypt(pk.encode()).decode()
-
-
 # ---------- MODELS ----------
 class CastVoteRequest(BaseModel):
     voter_id: str
     candidate: str
 
 
-# ---------- NONCE MANAGER ----------
-def get_safe_nonce(admin_wallet: str) -> int:
-    """
-    Atomically get a unique nonce for an admin wallet using Redis counter.
-    Keeps pending txs in sync across workers.
-    """
-    admin_wallet = w3.to_checksum_address(admin_wallet)
-    nonce_key = f"nonce:{admin_wallet}"
-
-    if not redis_client.exists(nonce_key):
-        nonce_on_chain = w3.eth.get_transaction_count(admin_wallet, "pending")
-        redis_client.set(nonce_key, nonce_on_chain)
-
-    # incr returns new value; subtract 1 to use it as current nonce
-    return redis_client.incr(nonce_key) - 1
-
-
-# ---------- BACKGROUND TX WORKER ----------
-def process_vote(
-    admin_wallet: str,
-    voter_id_hmac: str,
-    candidate: str,
-    encrypted_admin_key: str,
-):
-    admin_wallet = w3.to_checksum_address(admin_wallet)
-    status_key = f"vote_status:{admin_wallet}:{voter_id_hmac}"
-
-    try:
-        private_key_admin = decrypt_private_key(encrypted_admin_key)
-        account = w3.eth.account.from_key(private_key_admin)
-        nonce = get_safe_nonce(admin_wallet)
-
-        # Build tx: castVote(voterId, candidate) uses msg.sender = admin
-        txn = contract.functions.castVote(voter_id_hmac, candidate).build_transaction({
-            "chainId": chain_id,
-            "from": account.address,
-            "nonce": nonce,
-            "gas": 300000,
-            "gasPrice": w3.eth.gas_price,
-        })
-
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key=private_key_admin)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-
-        redis_client.set(
-            status_key,
-            json.dumps({
-                "status": "success",
-                "tx_hash": tx_hash.hex(),
-                "block_number": receipt.blockNumber
-            }),
-            ex=300
-        )
-
-        print(f"Vote cast successfully: {tx_hash.hex()}")
-
-    except Exception as e:
-        redis_client.set(
-            status_key,
-            json.dumps({"status": "failed", "reason": str(e)}),
-            ex=300
-        )
-        print(f"Error casting vote: {e}")
-
-
 # ---------- ROUTES ----------
 @router.post("/cast-vote")
 async def cast_vote(
     data: CastVoteRequest,
-    background_tasks: BackgroundTasks,
     admin_data=Depends(access_check_for_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
+    claimed_key = False
+    queued = False
     try:
         # 1) Derive HMAC voter id scoped to the admin
         secret_key = os.getenv("SECRET_KEY")
@@ -128,7 +55,7 @@ async def cast_vote(
             raise HTTPException(status_code=500, detail="SECRET_KEY missing in env")
 
         admin_id = admin_data["admin_id"]
-        admin_wallet = w3.to_checksum_address(admin_data["wallet_address"])
+        admin_wallet = Web3.to_checksum_address(admin_data["wallet_address"])
 
         # Scope voter hash to admin to avoid cross-admin collisions
         combined_key = f"{secret_key}{admin_id}"
@@ -138,55 +65,289 @@ async def cast_vote(
             hashlib.sha256
         ).hexdigest()
 
-        # 2) Optional: ensure candidate is registered to avoid revert
-        # try:
-        #     is_registered = contract.functions.isCandidateRegistered(admin_wallet, data.candidate).call()
-        # except Exception as e:
-        #     raise HTTPException(status_code=400, detail=f"Contract call failed (isCandidateRegistered): {str(e)}")
+        # 2) Client retry with the same Idempotency-Key: answer with the first attempt's vote
+        if idempotency_key:
+            first_hmac = claim_idempotency_key(admin_wallet, idempotency_key, voter_id_hmac)
+            if first_hmac is None:
+                claimed_key = True
+            elif first_hmac != voter_id_hmac:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different voter")
+            else:
+                return existing_vote(admin_wallet, voter_id_hmac)
+
+        # 3) Check if voter already voted under this admin.
+        #    Local index first; the chain is only asked when the index is lagging.
+        has_voted = is_voted(admin_wallet, voter_id_hmac)
+        if has_voted is None:
+            try:
+                contract = await get_async_contract()
+                has_voted = await contract.functions.hasVoted(admin_wallet, voter_id_hmac).call()
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Contract call failed (hasVoted): {str(e)}")
 
-        # if not is_registered:
-        #     return {
-        #         "status": "failed",
-        #         "message": "Candidate not registered for this admin."
-        #     }
+        if has_voted:
+            return existing_vote(admin_wallet, voter_id_hmac)
 
-        # 3) Check if voter already voted under this admin
+        # 4) Backpressure: take an in-flight slot for this admin wallet
         try:
-            has_voted = contract.functions.hasVoted(admin_wallet, voter_id_hmac).call()
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Contract call failed (hasVoted): {str(e)}")
-
-        if has_voted:
-            return {
-                "status": "failed",
-                "message": "Voter has already cast a vote for this admin."
-            }
-
-        # 4) Queue background task to submit the transaction
-        background_tasks.add_task(
-            process_vote,
-            admin_wallet,
-            voter_id_hmac,
-            data.candidate,
-            admin_data["wallet_secret"],
-        )
+            took_slot = admit_vote(admin_wallet, voter_id_hmac)
+        except AdmissionRejected as e:
+            return JSONResponse(
+                status_code=429,
+                content={"status": "rejected", "message": e.reason, "retry_after": e.retry_after},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        # 5) Reserve the voter and mark it queued in one script: of two racing
+        #    requests only one gets here, and the other always finds the queued
+        #    status. The reservation is only dropped when the relayer confirms
+        #    the vote failed.
+        if not reserve_vote(admin_wallet, voter_id_hmac, {"status": "queued"}):
+            # A double-tap shares the first request's slot; only free one we added
+            if took_slot:
+                release_votes(admin_wallet, voter_id_hmac)
+            return existing_vote(admin_wallet, voter_id_hmac)
 
-        # 5) Mark queued in Redis (key includes admin scope)
-        redis_client.set(
-            f"vote_status:{admin_wallet}:{voter_id_hmac}",
-            json.dumps({"status": "queued"}),
-            ex=300
-        )
+        try:
+            # 6) Append to the durable vote stream; relayer workers batch + submit it
+            enqueue_vote(admin_wallet, voter_id_hmac, data.candidate)
+        except Exception:
+            if took_slot:
+                release_votes(admin_wallet, voter_id_hmac)
+            unreserve_votes(admin_wallet, voter_id_hmac)
+            raise
+        queued = True
 
         return {
             "status": "queued",
-            "message": "Vote is being processed in the background."
+            "message": "Vote is queued for submission.",
+            "vote_ref": voter_id_hmac  # matches "vote_ref" on /vote-events
         }
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Let the client retry with the same key if nothing was queued
+        if claimed_key and not queued:
+            release_idempotency_key(admin_wallet, idempotency_key)
+
+
+def existing_vote(admin_wallet: str, voter_id_hmac: str) -> dict:
+    """Response for a retry / double-tap: the status of the vote already reserved."""
+    status = get_vote_status(admin_wallet, voter_id_hmac)
+    if status and status.get("status") != "failed":
+        return {**status, "vote_ref": voter_id_hmac, "duplicate": True}
+    if not redis_client.sismember(voted_key(admin_wallet), voter_id_hmac):
+        # The earlier attempt failed and the relayer released the voter
+        return {
+            "status": "failed",
+            "retryable": True,
+            "message": "The earlier vote was not recorded; it can be cast again.",
+            "reason": status.get("reason") if status else None,
+            "vote_ref": voter_id_hmac,
+        }
+    return {
+        "status": "failed",
+        "message": "Voter has already cast a vote for this admin."
+    }
+
+
+# ---------- BULK (OFFLINE BOOTHS) ----------
+async def _ndjson_lines(request: Request):
+    """
+    Yield (line_no, raw_line) from the request body without buffering the whole
+    file. A line longer than BULK_MAX_LINE_BYTES is yielded as (line_no, None)
+    and its bytes are dropped as they arrive.
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if oversized or len(line) > BULK_MAX_LINE_BYTES:
+                oversized = False
+                yield line_no, None
+            else:
+                yield line_no, line
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            oversized = True
+            buffer = b""
+    if oversized:
+        yield line_no + 1, None
+    elif buffer:
+        yield line_no + 1, buffer
+
+
+def _retryable(line_no: int, message: str) -> dict:
+    return {"line": line_no, "status": "error", "retryable": True, "message": message}
+
+
+async def _ingest_chunk(admin_wallet: str, chunk: list, results: list):
+    """
+    Run one chunk of parsed lines through the same steps as /cast-vote
+    (voted index, admission, reservation, stream), each as a single pipelined
+    Redis round trip. chunk: [(line_no, voter_id_hmac, candidate)]
+    Lines that hit an error are reported as retryable and leave nothing behind.
+    """
+    voter_ids = [voter_id_hmac for _, voter_id_hmac, _ in chunk]
+
+    has_voted = is_voted_many(admin_wallet, voter_ids)
+    lagging = [i for i, voted in enumerate(has_voted) if voted is None]
+    if lagging:
+        try:
+            contract = await get_async_contract()
+            answers = await asyncio.gather(*(
+                contract.functions.hasVoted(admin_wallet, voter_ids[i]).call() for i in lagging
+            ), return_exceptions=True)
+        except Exception as e:
+            answers = [e] * len(lagging)
+        for i, voted in zip(lagging, answers):
+            has_voted[i] = voted
+
+    fresh = []
+    for entry, voted in zip(chunk, has_voted):
+        line_no, voter_id_hmac, _ = entry
+        if isinstance(voted, Exception):
+            results.append(_retryable(line_no, f"Contract call failed (hasVoted): {str(voted)}"))
+        elif voted:
+            results.append({"line": line_no, "status": "already_voted", "vote_ref": voter_id_hmac})
+        else:
+            fresh.append(entry)
+    if not fresh:
+        return
+
+    try:
+        admitted = admit_votes(admin_wallet, [voter_id_hmac for _, voter_id_hmac, _ in fresh])
+    except AdmissionRejected as e:
+        results.extend(
+            {"line": line_no, "status": "rejected", "message": e.reason, "retry_after": e.retry_after}
+            for line_no, _, _ in fresh
+        )
+        return
+
+    accepted = [entry for entry, took_slot in zip(fresh, admitted) if took_slot is not None]
+    took_slots = [took_slot for took_slot in admitted if took_slot is not None]
+    refused = [line_no for (line_no, _, _), took_slot in zip(fresh, admitted) if took_slot is None]
+    if refused:
+        wait = retry_after(len(refused), throughput(admin_wallet))
+        results.extend(
+            {"line": line_no, "status": "rejected", "message": "Too many votes in flight for this booth", "retry_after": wait}
+            for line_no in refused
+        )
+    if not accepted:
+        return
+
+    reserved = None
+    try:
+        reserved = reserve_votes(admin_wallet, [voter_id_hmac for _, voter_id_hmac, _ in accepted], {"status": "queued"})
+        queued = [entry for entry, ok in zip(accepted, reserved) if ok]
+        if queued:
+            # All-or-nothing (MULTI/EXEC), so the undo below matches the stream
+            enqueue_votes(admin_wallet, [(voter_id_hmac, candidate) for _, voter_id_hmac, candidate in queued])
+    except Exception as e:
+        print(f"Bulk ingest for {admin_wallet} failed: {e}")
+        release_votes(admin_wallet, *[voter_id_hmac for (_, voter_id_hmac, _), took_slot in zip(accepted, took_slots) if took_slot])
+        if reserved is not None:
+            unreserve_votes(admin_wallet, *[voter_id_hmac for _, voter_id_hmac, _ in queued])
+        results.extend(_retryable(line_no, "Vote could not be queued") for line_no, _, _ in accepted)
+        return
+
+    for (line_no, voter_id_hmac, _), ok, took_slot in zip(accepted, reserved, took_slots):
+        if not ok:
+            # Reserved by a concurrent /cast-vote since the index check; its slot stays
+            if took_slot:
+                release_votes(admin_wallet, voter_id_hmac)
+            results.append({"line": line_no, "status": "already_voted", "vote_ref": voter_id_hmac})
+    results.extend({"line": line_no, "status": "queued", "vote_ref": voter_id_hmac} for line_no, voter_id_hmac, _ in queued)
+
+
+@router.post("/cast-votes/bulk")
+async def cast_votes_bulk(request: Request, admin_data=Depends(access_check_for_admin)):
+    """
+    Replay votes recorded while a booth was offline.
+    Body: NDJSON, one {"voter_id": ..., "candidate": ...} per line.
+    The body is read as a stream and handled BULK_CHUNK_SIZE lines at a time;
+    queued votes go through the same relayer pipeline as /cast-vote.
+    Returns a per-line result (queued / duplicate / already_voted / rejected /
+    invalid / error). Lines with "retry_after" or "retryable" can be sent again.
+    Past BULK_MAX_LINES the upload stops: earlier lines keep their results and
+    "truncated" names the first line that was not read.
+    """
+    secret_key = os.getenv("SECRET_KEY")
+    if not secret_key:
+        raise HTTPException(status_code=500, detail="SECRET_KEY missing in env")
+
+    admin_id = admin_data["admin_id"]
+    admin_wallet = Web3.to_checksum_address(admin_data["wallet_address"])
+    combined_key = f"{secret_key}{admin_id}".encode()
+
+    results = []
+    seen = set()
+    chunk = []
+    line_count = 0
+    truncated = None
+
+    async for line_no, raw in _ndjson_lines(request):
+        if raw is not None and not raw.strip():
+            continue
+        if line_count >= BULK_MAX_LINES:
+            truncated = line_no
+            break
+        line_count += 1
+        if raw is None:
+            results.append({"line": line_no, "status": "invalid", "message": f"Line exceeds {BULK_MAX_LINE_BYTES} bytes"})
+            continue
+
+        try:
+            vote = CastVoteRequest(**json.loads(raw))
+        except Exception as e:
+            results.append({"line": line_no, "status": "invalid", "message": str(e)})
+            continue
+
+        voter_id_hmac = hmac.new(combined_key, vote.voter_id.encode(), hashlib.sha256).hexdigest()
+        if voter_id_hmac in seen:
+            results.append({"line": line_no, "status": "duplicate", "vote_ref": voter_id_hmac})
+            continue
+        seen.add(voter_id_hmac)
+
+        chunk.append((line_no, voter_id_hmac, vote.candidate))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await _ingest_chunk(admin_wallet, chunk, results)
+            chunk = []
+
+    if chunk:
+        await _ingest_chunk(admin_wallet, chunk, results)
+
+    results.sort(key=lambda r: r["line"])
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+    response = {
+        "status": "processed",
+        "lines": line_count,
+        "summary": summary,
+        "results": results,
+    }
+    if truncated:
+        response["status"] = "truncated"
+        response["truncated"] = {
+            "from_line": truncated,
+            "message": f"Only the first {BULK_MAX_LINES} votes of an upload are processed; resend from this line.",
+        }
+    return response
+
+
+@router.get("/vote-saturation")
+async def vote_saturation(admin_data=Depends(access_check_for_admin)):
+    """In-flight votes, queue depth and measured throughput for the calling admin."""
+    admin_wallet = Web3.to_checksum_address(admin_data["wallet_address"])
+    return saturation(admin_wallet)
 
 
 @router.get("/vote-status/{voter_id}")
@@ -200,7 +361,7 @@ async def vote_status(voter_id: str, admin_data=Depends(access_check_for_admin))
         raise HTTPException(status_code=500, detail="SECRET_KEY missing in env")
 
     admin_id = admin_data["admin_id"]
-    admin_wallet = w3.to_checksum_address(admin_data["wallet_address"])
+    admin_wallet = Web3.to_checksum_address(admin_data["wallet_address"])
     combined_key = f"{secret_key}{admin_id}"
     voter_id_hmac = hmac.new(
         combined_key.encode(),
@@ -208,10 +369,41 @@ async def vote_status(voter_id: str, admin_data=Depends(access_check_for_admin))
         hashlib.sha256
     ).hexdigest()
 
-    status_key = f"vote_status:{admin_wallet}:{voter_id_hmac}"
-    status = redis_client.get(status_key)
+    status = get_vote_status(admin_wallet, voter_id_hmac)
 
     if not status:
         return {"status": "not_found", "message": "No vote found for this voter."}
 
-    return json.loads(status)
+    return status
+
+
+@router.get("/vote-events")
+async def vote_events(request: Request, admin_data=Depends(access_check_for_admin)):
+    """
+    Server-Sent Events stream of every status transition (queued, submitted,
+    confirmed, failed) for the calling admin's votes. Each event is the status
+    dict plus "vote_ref", the id returned by /cast-vote. Replaces polling
+    /vote-status; that endpoint stays for clients that reconnect and need to
+    catch up on a single vote.
+    """
+    admin_wallet = Web3.to_checksum_address(admin_data["wallet_address"])
+    queue = vote_event_hub.subscribe(admin_wallet)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=VOTE_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: vote_status\ndata: {data}\n\n"
+        finally:
+            vote_event_hub.unsubscribe(admin_wallet, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
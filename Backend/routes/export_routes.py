@@ -0,0 +1,179 @@
+import csv
+import io
+import os
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from dotenv import load_dotenv
+from database.db import SessionLocal
+from middleware.security import access_check
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+load_dotenv()
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 5000))   # rows per server-side cursor fetch / parquet row group
+
+router = APIRouter()
+
+
+# ---------- EXPORT QUERIES ----------
+LOGS_QUERY = """
+    SELECT log_id, super_admin_id, action_title, action, status, timestamp
+    FROM super_admins_logs
+    ORDER BY timestamp DESC
+"""
+
+# Candidate metadata joined with the on-chain counts kept by the event indexer
+RESULTS_QUERY = """
+    SELECT e.election_id, e.title AS election_title, c.candidate_state AS state,
+           c.admin_id, c.candidate_id, c.name, c.party_name,
+           c.candidate_city, c.candidate_district,
+           COALESCE(t.votes, 0) AS votes
+    FROM candidate c
+    JOIN elections e ON e.election_id = c.election_id
+    JOIN admin a ON a.admin_id = c.admin_id
+    LEFT JOIN candidate_tallies t
+        ON t.admin_wallet = a.wallet_address AND t.candidate = c.candidate_id
+    WHERE c.election_id = :election_id
+    ORDER BY c.candidate_state, votes DESC
+"""
+
+LOGS_SCHEMA = [
+    ("log_id", "int64"),
+    ("super_admin_id", "string"),
+    ("action_title", "string"),
+    ("action", "string"),
+    ("status", "string"),
+    ("timestamp", "timestamp"),
+]
+
+RESULTS_SCHEMA = [
+    ("election_id", "int64"),
+    ("election_title", "string"),
+    ("state", "string"),
+    ("admin_id", "string"),
+    ("candidate_id", "string"),
+    ("name", "string"),
+    ("party_name", "string"),
+    ("candidate_city", "string"),
+    ("candidate_district", "string"),
+    ("votes", "int64"),
+]
+
+
+# ---------- STREAMING ----------
+def _row_chunks(query: str, params: dict):
+    """
+    Yield lists of rows from a server-side cursor, EXPORT_CHUNK_ROWS at a time.
+    Uses its own session: the request's get_db session may be closed
+    before a streaming response finishes.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(query).execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS),
+            params,
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _csv_stream(query: str, params: dict, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in _row_chunks(query, params):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file object that hands Parquet bytes back as they are produced."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema(schema: list):
+    types = {"int64": pa.int64(), "string": pa.string(), "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[kind]) for name, kind in schema])
+
+
+def _parquet_stream(query: str, params: dict, schema: list):
+    """One Parquet row group per cursor chunk; bytes are sent as each group is written."""
+    arrow_schema = _parquet_schema(schema)
+    columns = [name for name, _ in schema]
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, arrow_schema, compression="snappy")
+    try:
+        for rows in _row_chunks(query, params):
+            arrays = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(arrays[i], type=arrow_schema.field(i).type) for i in range(len(columns))],
+                schema=arrow_schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _export_response(query: str, params: dict, schema: list, file_format: str, filename: str):
+    if file_format == "parquet":
+        body, media_type = _parquet_stream(query, params, schema), "application/vnd.apache.parquet"
+    else:
+        body, media_type = _csv_stream(query, params, [name for name, _ in schema]), "text/csv"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{file_format}"'},
+    )
+
+
+# ---------- ROUTES ----------
+@router.get("/super_admin/export/logs")
+def export_super_admin_logs(
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    admin=Depends(access_check)
+):
+    return _export_response(LOGS_QUERY, {}, LOGS_SCHEMA, format, "super_admin_logs")
+
+
+@router.get("/super_admin/export/results/{election_id}")
+def export_election_results(
+    election_id: int,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    admin=Depends(access_check)
+):
+    return _export_response(
+        RESULTS_QUERY, {"election_id": election_id}, RESULTS_SCHEMA, format, f"election_{election_id}_results"
+    )
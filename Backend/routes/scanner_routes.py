@@ -1,14 +1,36 @@
+import base64
+import hashlib
 import json
-from fastapi import APIRouter, HTTPException
+import os
+from cryptography.fernet import Fernet, InvalidToken
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from database.db import redis_client
+from utils.rate_limit import rate_limit
+from utils.id_generator import is_voter_id
 
 
 load_dotenv()
 
+SCANNER_RATE_LIMIT = int(os.getenv("SCANNER_RATE_LIMIT", 120))      # /scanner posts per client IP per minute
+
 router = APIRouter()
 
+# Voter card QR codes carry the voter_id Fernet-encrypted with ENCRYPTION_KEY (utils/send_voting_card.py)
+_card_key = os.getenv("ENCRYPTION_KEY")
+card_fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(_card_key.encode()).digest())) if _card_key else None
+
+
+def scanned_voter_id(scan_data: str) -> str:
+    """voter_id behind a scan: the decrypted card QR, or the text itself for typed / plain ids."""
+    if card_fernet:
+        try:
+            return card_fernet.decrypt(scan_data.encode()).decode()
+        except InvalidToken:
+            pass
+    return scan_data
+
 
 class ScanData(BaseModel):
     device_id: str
@@ -21,8 +43,11 @@ class StatusData(BaseModel):
     connected: bool
     timestamp: str
 
-@router.post("/scanner")
+@router.post("/scanner", dependencies=[Depends(rate_limit("scanner", SCANNER_RATE_LIMIT, 60))])
 def receive_scan(data: ScanData):
+    # Reject misreads / mistyped ids here instead of after an admin lookup
+    if not is_voter_id(scanned_voter_id(data.scan_data)):
+        raise HTTPException(status_code=422, detail="Scan is not a valid voter id")
     try:
         cache_key = f"scan_{data.device_id}"
         existing = redis_client.get(cache_key)
@@ -1,5 +1,7 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException , BackgroundTasks , Request , Body
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException , BackgroundTasks , Request , Body , Header , Response , Query
+from typing import Optional
 from uuid import uuid4
 import redis
 from ua_parser import user_agent_parser
@@ -7,7 +9,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from utils.json_serializer import json_serializer_for_time
-from database.db import get_db
+from database.db import get_db, SessionLocal
 from pydantic_models.Super_admin import SuperAdmin , SuperAdminLogin , SuperAdminCreatesAdmin
 from utils.id_generator import generateIdForAdmin
 from middleware.security import access_check
@@ -17,55 +19,68 @@ import jwt
 import os
 import time
 from web3 import Web3
+from eth_account import Account
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 from database.db import redis_client , get_db 
 from utils.otp_on_email import generate_otp , send_otp_email , verify_otp , store_otp_in_redis
+from utils.rate_limit import RateLimited, client_ip, too_many_requests
+from utils.receipt_tracker import receipt_tracker
+from utils.nonce_manager import allocate_nonce, handle_send_error, mark_nonce_mined, record_sent_tx
+from utils.fee_oracle import get_fee_params
+from utils.chain_registry import get_async_w3, get_async_contract, CHAIN_ID
+from utils.event_indexer import get_all_tallies, indexed_block, index_is_stale
+from utils.multicall import aggregate
+from utils.vote_timeseries import read_series
+from utils.results_cache import latest_block_number, single_flight, results_etag, etag_matches
+from utils.indian_states import INDIAN_STATES
 
 
 load_dotenv()
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
 SESSTION_TTL = int(os.getenv("SESSION_TTL", 3600))  
+NATIONAL_RESULTS_TTL = int(os.getenv("NATIONAL_RESULTS_TTL", 60))  # seconds a per-block aggregate is kept
 
-RPC = os.getenv("AVAX_RPC") 
-CHAIN_ID = int(os.getenv("CHAIN_ID", "43113")) 
 FUNDING_KEY = os.getenv("FUNDING_KEY")  # Private key of funding wallet
 
-w3 = Web3(Web3.HTTPProvider(RPC))
-funding_account = w3.eth.account.from_key(FUNDING_KEY)
-
-
-with open("./deploy-contract/Voting_abi.json", "r") as f:
-    abi = json.load(f)
+funding_account = Account.from_key(FUNDING_KEY)
 
 contract_address = os.getenv("SMART_CONTRACT_ADDRESS")
 print(f"Smart Contract Address: {contract_address}")
-contract = w3.eth.contract(address=contract_address, abi=abi)
 
 FERNET_KEY = os.getenv("FERNET_KEY")
 fernet = Fernet(FERNET_KEY.encode())
 
 def encrypt_private_key(pk: str) -> str:
     return fernet.encrypt(pk.encode()).decode()
-def send_avax(to_address: str, amount_in_avax: float) -> str:
-    """Send AVAX from funding account and wait for confirmation"""
+async def send_avax(to_address: str, amount_in_avax: float) -> str:
+    """Send AVAX from funding account; confirmation is left to receipt_tracker"""
     try:
-        to_address = w3.to_checksum_address(to_address)
-        nonce = w3.eth.get_transaction_count(funding_account.address, 'pending')
-        tx = {
-            "nonce": nonce,
-            "to": to_address,
-            "value": w3.to_wei(amount_in_avax, "ether"),
-            "gas": 21000,
-            "gasPrice": w3.eth.gas_price,
-            "chainId": CHAIN_ID
-        }
-        signed_tx = w3.eth.account.sign_transaction(tx, FUNDING_KEY)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-
-        # Wait for transaction to be mined
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        async_w3 = await get_async_w3()
+        to_address = Web3.to_checksum_address(to_address)
+        fee_params = await asyncio.to_thread(get_fee_params)
+        nonce = await asyncio.to_thread(allocate_nonce, funding_account.address)
+        try:
+            tx = {
+                "nonce": nonce,
+                "to": to_address,
+                "value": Web3.to_wei(amount_in_avax, "ether"),
+                "gas": 21000,
+                **fee_params,
+                "chainId": CHAIN_ID
+            }
+            signed_tx = Account.sign_transaction(tx, FUNDING_KEY)
+            tx_hash = await async_w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            await asyncio.to_thread(handle_send_error, funding_account.address, nonce, e)
+            raise
+        record_sent_tx(funding_account.address, nonce, tx, tx_hash)
+
+        def _mined(receipt, error):
+            if not error:
+                mark_nonce_mined(funding_account.address, nonce)
+        receipt_tracker.track(tx_hash, callback=_mined)
         # print(f"AVAX sent: {amount_in_avax} to {to_address}, tx hash: {tx_hash.hex()}")
 
         return tx_hash.hex()
@@ -123,6 +138,7 @@ async def register_super_admin(super_admin: SuperAdmin, db: Session = Depends(ge
 
 @router.post("/super_admin/login-request")
 async def login_super_admin(
+    request: Request,
     login_data: SuperAdminLogin,
     db: Session = Depends(get_db),
     background_tasks: BackgroundTasks = None
@@ -142,8 +158,10 @@ async def login_super_admin(
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         otp = generate_otp()
-        # store_otp_in_redis(login_data.email, otp , "login")
-        background_tasks.add_task(store_otp_in_redis, login_data.email, otp , "login" )
+        try:
+            store_otp_in_redis(login_data.email, otp, "login", ip=client_ip(request))
+        except RateLimited as e:
+            raise too_many_requests(e)
         background_tasks.add_task(send_otp_email, login_data.email, otp)
         try:
             result = redis_client.set(f"temp:login:{login_data.email}", login_data.super_admin_id, ex=300)
@@ -155,6 +173,8 @@ async def login_super_admin(
             "Success": True
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -265,9 +285,9 @@ async def create_admin(
 ):
     try:
 
-        new_acct = w3.eth.account.create()
+        new_acct = Account.create()
         encrypted_pk = encrypt_private_key(new_acct.key.hex())  
-        tx_hash = send_avax(new_acct.address, 0.3) 
+        funding_tx_hash = await send_avax(new_acct.address, 0.3)
 
         hashed_password = hash_password(admin_data.password)
         admin_id = generateIdForAdmin()
@@ -300,23 +320,44 @@ async def create_admin(
                 "status": "Success"
             }
         )
-        db.commit()
+        # Not committed until funding and addAdmin are both confirmed;
+        # the except below rolls the rows back otherwise
 
         superadmin_address = os.getenv("PUBLIC_ADDRESS_SUPER_ADMIN")
         superadmin_private_key = os.getenv("PRIVATE_KEY_SUPER_ADMIN")
 
-        nonce = w3.eth.get_transaction_count(superadmin_address)
-
-        txn = contract.functions.addAdmin(new_acct.address).build_transaction({
-            'from': superadmin_address,
-            'nonce': nonce,
-            'gas': 300000,
-            'gasPrice': w3.to_wei("25", "gwei")
-        })
-
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key=superadmin_private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        fee_params = await asyncio.to_thread(get_fee_params)
+        nonce = await asyncio.to_thread(allocate_nonce, superadmin_address)
+        try:
+            async_w3 = await get_async_w3()
+            contract = await get_async_contract()
+            txn = await contract.functions.addAdmin(new_acct.address).build_transaction({
+                'chainId': CHAIN_ID,
+                'from': superadmin_address,
+                'nonce': nonce,
+                'gas': 300000,
+                **fee_params,
+            })
+
+            signed_txn = Account.sign_transaction(txn, private_key=superadmin_private_key)
+            tx_hash = await async_w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            await asyncio.to_thread(handle_send_error, superadmin_address, nonce, e)
+            raise
+        record_sent_tx(superadmin_address, nonce, txn, tx_hash)
+
+        # Funding + addAdmin confirm in parallel without holding a thread each
+        funding_receipt, receipt = await asyncio.gather(
+            asyncio.wrap_future(receipt_tracker.track(funding_tx_hash)),
+            asyncio.wrap_future(receipt_tracker.track(tx_hash)),
+        )
+        # Mined either way: a reverted tx still used its nonce
+        mark_nonce_mined(superadmin_address, nonce)
+        if funding_receipt.status != 1:
+            raise Exception(f"Funding transaction {funding_tx_hash} reverted")
+        if receipt.status != 1:
+            raise Exception(f"addAdmin transaction {receipt.transactionHash.hex()} reverted")
+        db.commit()
 
         return {
             "Success": True,
@@ -390,16 +431,7 @@ async def get_candidate_counts_by_state(
     admin=Depends(access_check)
 ):
     try:
-        labels = [
-            'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh',
-            'Goa', 'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand',
-            'Karnataka', 'Kerala', 'Madhya Pradesh', 'Maharashtra', 'Manipur',
-            'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab',
-            'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura',
-            'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
-            'Andaman & Nicobar Islands', 'Chandigarh', 'Dadra & Nagar Haveli and Daman & Diu',
-            'Delhi', 'Jammu & Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
-        ]
+        labels = INDIAN_STATES
 
         query = text("""
             SELECT candidate_state, COUNT(*) as count 
@@ -443,8 +475,161 @@ async def get_candidates_by_state(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-    
+@router.get("/super_admin/indexed-results")
+async def get_indexed_results(admin=Depends(access_check)):
+    # Tallies of every admin from the on-chain event index, no contract calls;
+    # "stale" while the index is catching up (use /super_admin/national-results then)
+    try:
+        indexed = indexed_block()
+        head = await latest_block_number()
+        return {
+            "Success": True,
+            "message": "Results fetched successfully",
+            "indexed_block": indexed,
+            "head_block": head,
+            "stale": index_is_stale(indexed, head),
+            "data": get_all_tallies()
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
+async def build_national_results(db: Session, block: int) -> dict:
+    """Every admin's getCandidatesWithVotes in a few Multicall3 calls, joined to admin + candidate rows."""
+    admins = db.execute(
+        text("SELECT admin_id, name, admin_of_state, wallet_address FROM admin ORDER BY admin_of_state")
+    ).mappings().fetchall()
+
+    contract = await get_async_contract()
+    tallies = await aggregate(
+        contract, "getCandidatesWithVotes",
+        [[Web3.to_checksum_address(a["wallet_address"])] for a in admins],
+        ["string[]", "uint256[]"],
+        block_identifier=block,
+    )
+
+    candidate_ids = list({c for tally in tallies if tally for c in tally[0]})
+    candidates = {}
+    if candidate_ids:
+        rows = db.execute(
+            text("SELECT candidate_id, name, party_name, candidate_state FROM candidate WHERE candidate_id = ANY(:ids)"),
+            {"ids": candidate_ids}
+        ).mappings().fetchall()
+        candidates = {row["candidate_id"]: dict(row) for row in rows}
+
+    states, parties = [], {}
+    total_votes = 0
+    for admin_row, tally in zip(admins, tallies):
+        state = {
+            "state": admin_row["admin_of_state"],
+            "admin_id": admin_row["admin_id"],
+            "admin_name": admin_row["name"],
+            "total_votes": 0,
+            "candidates": [],
+            "error": None if tally is not None else "getCandidatesWithVotes failed",
+        }
+        for candidate_id, votes in zip(*(tally or ([], []))):
+            info = candidates.get(candidate_id, {})
+            party = info.get("party_name") or "Unknown"
+            state["candidates"].append({
+                "candidate_id": candidate_id,
+                "name": info.get("name"),
+                "party_name": party,
+                "votes": votes,
+            })
+            state["total_votes"] += votes
+            parties[party] = parties.get(party, 0) + votes
+        state["candidates"].sort(key=lambda c: c["votes"], reverse=True)
+        total_votes += state["total_votes"]
+        states.append(state)
+
+    return {
+        "block_number": block,
+        "total_votes": total_votes,
+        "parties": sorted(({"party_name": p, "votes": v} for p, v in parties.items()), key=lambda p: p["votes"], reverse=True),
+        "states": states,
+    }
 
 
+@router.get("/super_admin/national-results")
+async def get_national_results(
+    admin=Depends(access_check),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    try:
+        # One aggregate per block, shared by concurrent requests and cached in Redis
+        block = await latest_block_number()
+        key = f"national_results:{block}"
+
+        async def fetch():
+            cached = redis_client.get(key)
+            if cached:
+                return json.loads(cached)
+            # Own session: the leader's request-scoped one closes while waiters still share this task
+            db = SessionLocal()
+            try:
+                results = await build_national_results(db, block)
+            finally:
+                db.close()
+            redis_client.set(key, json.dumps(results), ex=NATIONAL_RESULTS_TTL)
+            return results
+
+        results = await single_flight(key, fetch)
+
+        etag = results_etag(results["states"])
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(
+            {"Success": True, "message": "National results fetched successfully", "data": results},
+            headers=headers,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/super_admin/vote-rate")
+async def get_vote_rate(
+    resolution: str = Query("minute", pattern="^(minute|hour)$"),
+    points: int = Query(60, ge=1, le=2880, description="Number of buckets, newest last"),
+    metric: str = Query("confirmed", pattern="^(confirmed|failed)$"),
+    admin=Depends(access_check),
+    db: Session = Depends(get_db)
+):
+    # Votes per bucket for every admin (ring buffers fed by the relayer), grouped by state
+    try:
+        admins = db.execute(
+            text("SELECT admin_id, name, admin_of_state, wallet_address FROM admin ORDER BY admin_of_state")
+        ).mappings().fetchall()
+        wallets = [Web3.to_checksum_address(a["wallet_address"]) for a in admins]
+        data = read_series(wallets, resolution, points, metric)
+
+        states = []
+        total = [0] * len(next(iter(data["series"].values()), []))
+        for admin_row, wallet in zip(admins, wallets):
+            counts = data["series"][wallet]
+            total = [a + b for a, b in zip(total, counts)]
+            states.append({
+                "state": admin_row["admin_of_state"],
+                "admin_id": admin_row["admin_id"],
+                "admin_name": admin_row["name"],
+                "counts": counts,
+            })
+
+        return {
+            "Success": True,
+            "message": "Vote rate fetched successfully",
+            "data": {
+                "metric": metric,
+                "resolution": resolution,
+                "start": data["start"],
+                "step": data["step"],
+                "total": total,
+                "states": states,
+            }
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,113 @@
+import asyncio
+import codecs
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from dotenv import load_dotenv
+from middleware.security import access_check
+from utils.voter_import import VoterImport, IMPORT_CHUNK_ROWS
+
+load_dotenv()
+
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", 4096))
+
+router = APIRouter()
+
+
+async def _csv_lines(request: Request):
+    """Yield (line_no, line) from a UTF-8 CSV body without buffering the whole file."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for i, line in enumerate(lines + [buffer], start=line_no + 1):
+            if len(line) > IMPORT_MAX_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"Line {i} exceeds {IMPORT_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield line_no + 1, buffer.rstrip("\r")
+
+
+async def _csv_records(request: Request):
+    """
+    Yield (first line_no, record) where a record is one CSV row: lines are
+    joined while a quoted field is still open (odd number of quotes so far),
+    so values containing newlines reach csv.reader intact.
+    """
+    record, start = None, 0
+    async for line_no, line in _csv_lines(request):
+        if record is None:
+            record, start = line, line_no
+        else:
+            record += "\n" + line
+            if len(record) > IMPORT_MAX_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"Row at line {start} exceeds {IMPORT_MAX_LINE_BYTES} bytes")
+        if record.count('"') % 2 == 0:
+            yield start, record
+            record = None
+    if record is not None:
+        yield start, record     # unterminated quote; csv.reader(strict=True) reports it
+
+
+@router.post("/super_admin/voters/import")
+async def import_voters(
+    request: Request,
+    dry_run: bool = Query(False, description="validate and de-duplicate only, insert nothing"),
+    send_cards: bool = Query(True, description="queue voter-card emails for imported voters"),
+    admin=Depends(access_check)
+):
+    """
+    Bulk electoral-roll import. The body is a CSV (text/csv) with a header row
+    naming name, father_name, gender, email, contact_number, aadhaar,
+    voter_dob, voters_state, voters_city, voters_district, pincode.
+
+    Rows are validated while the body streams in and COPY'd into a staging
+    table IMPORT_CHUNK_ROWS at a time (the next chunk is parsed while the
+    previous one is copied), then merged into voterstable in one transaction.
+    Returns per-outcome counts and the first IMPORT_MAX_ERRORS rejected lines.
+    """
+    job = await asyncio.to_thread(VoterImport, dry_run)
+    chunk, pending = [], None
+    try:
+        await asyncio.to_thread(job.begin)
+
+        async for line_no, line in _csv_records(request):
+            if not line.strip():
+                continue
+            if job.header is None:
+                job.set_header(line)
+                continue
+            chunk.append((line_no, line))
+            if len(chunk) >= IMPORT_CHUNK_ROWS:
+                if pending:
+                    await pending
+                pending = asyncio.ensure_future(asyncio.to_thread(job.add_lines, chunk))
+                chunk = []
+        if pending:
+            await pending
+        if job.header is None:
+            raise HTTPException(status_code=400, detail="Empty CSV")
+        if chunk:
+            await asyncio.to_thread(job.add_lines, chunk)
+
+        await asyncio.to_thread(job.merge, admin["super_admin_id"])
+        cards_queued = 0
+        if send_cards and not dry_run:
+            cards_queued = await asyncio.to_thread(job.enqueue_cards)
+
+        return {"Success": True, **job.report(), "cards_queued": cards_queued}
+    except HTTPException:
+        raise
+    except ValueError as e:     # bad header / encoding, row limit
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Voter import failed: {str(e)}")
+    finally:
+        if pending and not pending.done():
+            await asyncio.wait([pending])
+        await asyncio.to_thread(job.close)
+
@@ -1,5 +1,7 @@
+import asyncio
 import json
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks , Body, File, Query, UploadFile, Form
+import os
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks , Body, File, Query, Request, UploadFile, Form
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from database.db import get_db
@@ -8,20 +10,28 @@ from database.db import redis_client
 from utils.otp_on_email import  generate_otp, send_otp_email, verify_otp, store_otp_in_redis
 from utils.voter_card_sending_queue import enqueue_voter_card_email
 from sqlalchemy import text
-from utils.id_generator import generateIdForVoters
-import cloudinary.uploader
+from utils.id_generator import generateIdForVoters, is_voter_id
+from utils.media_uploads import (
+    MEDIA_UPLOAD_MODE, MediaUploadFailed, upload_media, stage_media, discard_staged, enqueue_media_upload,
+    retry_media_upload,
+)
+from middleware.security import access_check
+from utils.image_pipeline import InvalidImage
+from utils.rate_limit import RateLimited, rate_limit, client_ip, too_many_requests
 
 
 load_dotenv()
 
+SEND_OTP_RATE_LIMIT = int(os.getenv("SEND_OTP_RATE_LIMIT", 10))      # /voter/send_otp calls per client IP per minute
+
 router = APIRouter()
 
 
 class EmailSchema(BaseModel):
     email: str
 
-@router.post("/voter/send_otp")
-async def send_otp(data: EmailSchema, background_tasks: BackgroundTasks):
+@router.post("/voter/send_otp", dependencies=[Depends(rate_limit("send_otp", SEND_OTP_RATE_LIMIT, 60))])
+async def send_otp(data: EmailSchema, request: Request, background_tasks: BackgroundTasks):
     try:
         email = data.email
         if not email:
@@ -29,7 +39,10 @@ async def send_otp(data: EmailSchema, background_tasks: BackgroundTasks):
 
         otp = generate_otp()
 
-        background_tasks.add_task(store_otp_in_redis, email, otp, "register")
+        try:
+            store_otp_in_redis(email, otp, "register", ip=client_ip(request))
+        except RateLimited as e:
+            raise too_many_requests(e)
         background_tasks.add_task(send_otp_email, email, otp)
 
         return {"message": "OTP sent successfully"}
@@ -89,46 +102,67 @@ async def voter_register(
         if existing_voter:
             raise HTTPException(status_code=400, detail="Voter already exists")
 
-        profile_url, signature_url = None, None
-
-        if profile_picture:
-            result = cloudinary.uploader.upload(profile_picture.file, folder="voters/profile")
-            profile_url = result["secure_url"]
-
-        if signature:
-            result = cloudinary.uploader.upload(signature.file, folder="voters/signatures")
-            signature_url = result["secure_url"]
-
         voter_id = generateIdForVoters()
-        db.execute(
-            text("""INSERT INTO voterstable 
-                    (voter_id, aadhaar, name, father_name, gender, email, contact_number, profile_picture, 
-                     signature, voter_dob, voters_state, voters_city, voters_district , pincode)
-                    VALUES (:voter_id, :aadhaar, :name, :father_name, :gender, :email, 
-                     :contact_number, :profile_picture, :signature, :voter_dob, :voters_state, :voters_city, :voters_district, :pincode  )
-            """),
-            {
-                "voter_id": voter_id,
-                "aadhaar": aadhaar,
-                "name": name,
-                "father_name": father_name,
-                "gender": gender,
-                "email": email,
-                "contact_number": contact_number,
-                "profile_picture": profile_url,
-                "signature": signature_url,
-                "voter_dob": voter_dob,
-                "voters_state": voters_state,
-                "voters_city": voters_city,
-                "voters_district": voters_district,
-                "pincode": pincode
-            }
-        )
-        db.commit()
-        enqueue_voter_card_email(voter_id, name, father_name, voter_dob, profile_url, signature_url, email)
+        media = {"profile_picture": profile_picture, "signature": signature}
+        deferred = MEDIA_UPLOAD_MODE == "deferred"
+
+        staged, urls = {}, {}
+        try:
+            if deferred:
+                staged = await stage_media(voter_id, media)
+            else:
+                urls = await upload_media({field: f.file if f else None for field, f in media.items()})
+        except InvalidImage:
+            raise HTTPException(status_code=400, detail="Profile picture and signature must be image files")
+        except MediaUploadFailed:
+            raise HTTPException(status_code=504, detail="Media upload failed or timed out, please retry")
+        profile_url, signature_url = urls.get("profile_picture"), urls.get("signature")
+        media_status = "pending" if staged else "ready"
+
+        try:
+            db.execute(
+                text("""INSERT INTO voterstable 
+                        (voter_id, aadhaar, name, father_name, gender, email, contact_number, profile_picture, 
+                         signature, voter_dob, voters_state, voters_city, voters_district , pincode, media_status)
+                        VALUES (:voter_id, :aadhaar, :name, :father_name, :gender, :email, 
+                         :contact_number, :profile_picture, :signature, :voter_dob, :voters_state, :voters_city, :voters_district, :pincode, :media_status)
+                """),
+                {
+                    "voter_id": voter_id,
+                    "aadhaar": aadhaar,
+                    "name": name,
+                    "father_name": father_name,
+                    "gender": gender,
+                    "email": email,
+                    "contact_number": contact_number,
+                    "profile_picture": profile_url,
+                    "signature": signature_url,
+                    "voter_dob": voter_dob,
+                    "voters_state": voters_state,
+                    "voters_city": voters_city,
+                    "voters_district": voters_district,
+                    "pincode": pincode,
+                    "media_status": media_status
+                }
+            )
+            db.commit()
+        except Exception:
+            discard_staged(staged)
+            raise
+
+        if staged:
+            # The voter card email goes out once the worker has the media URLs
+            enqueue_media_upload(voter_id, staged, {
+                "name": name, "father_name": father_name, "voter_dob": voter_dob, "email": email
+            })
+        else:
+            enqueue_voter_card_email(voter_id, name, father_name, voter_dob, profile_url, signature_url, email)
         redis_client.delete(f"otp_verified:{email}")
 
-        return {"message": "Voter registered successfully", "voter_id": voter_id}
+        return {"message": "Voter registered successfully", "voter_id": voter_id, "media_status": media_status}
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,9 +173,12 @@ async def voter_register(
 
 @router.get("/voter/details/{voter_id}")
 async def get_voter_details(voter_id: str, db: Session = Depends(get_db)):
+    # Mistyped ids fail the check character; no need to ask the database
+    if not is_voter_id(voter_id):
+        raise HTTPException(status_code=404, detail="Voter not found")
     try:
         voter = db.execute(
-            text("SELECT voter_id, name, father_name, gender, voter_dob, voters_state, voters_city, voters_district FROM voterstable WHERE voter_id = :voter_id"),
+            text("SELECT voter_id, name, father_name, gender, voter_dob, voters_state, voters_city, voters_district, media_status FROM voterstable WHERE voter_id = :voter_id"),
             {"voter_id": voter_id}
         ).mappings().fetchone()
 
@@ -153,6 +190,21 @@ async def get_voter_details(voter_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
     
 
+
+# requeue media of a deferred-mode registration (super admin)
+
+@router.post("/super_admin/voters/{voter_id}/retry-media")
+async def retry_voter_media(voter_id: str, admin=Depends(access_check)):
+    """
+    Requeue the photo/signature upload of a deferred-mode registration whose
+    worker gave up (media_status='failed'); the voter card email follows once
+    it succeeds.
+    """
+    if not await asyncio.to_thread(retry_media_upload, voter_id):
+        raise HTTPException(status_code=404, detail="No failed media upload for this voter")
+    return {"Success": True, "message": "Media upload requeued", "voter_id": voter_id, "media_status": "pending"}
+
+
 # display all candidates details from there ids
 
 @router.get("/candidates/details/{candidate_state}")
@@ -0,0 +1,53 @@
+"""
+Tests run against fakeredis (with its Lua engine) instead of a Redis server.
+Every module does `from database.db import redis_client` and registers its
+scripts at import, so the fake client is swapped in before any of them load.
+
+Install requirements-dev.txt, then run from Backend/:
+    python -m pytest -q
+"""
+import os
+import sys
+from pathlib import Path
+
+import fakeredis
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# database.db reads these at import (and only logs failed connections)
+for name, value in {
+    "DB_HOST": "localhost", "DB_PORT": "5432", "DB_SSLMODE": "disable",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "SESSION_TTL": "60",
+    "SECRET_KEY": "test-secret", "VOTED_INDEX_START_BLOCK": "0", "INDEXER_START_BLOCK": "0",
+}.items():
+    os.environ.setdefault(name, value)
+
+import database.db  # noqa: E402
+
+database.db.redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def redis_client():
+    client = database.db.redis_client
+    client.flushall()
+    yield client
+    client.flushall()
+
+
+class StreamedRequest:
+    """Stands in for a Starlette Request whose body arrives in `chunks`."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.fixture
+def streamed_request():
+    return StreamedRequest
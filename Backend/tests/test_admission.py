@@ -0,0 +1,44 @@
+from utils.admission import admit_vote, admit_votes, release_votes, finish_votes, inflight_key, AdmissionRejected
+import utils.admission as admission
+import pytest
+
+WALLET = "0xBooth"
+
+
+def test_admit_vote_reports_whether_it_took_the_slot(redis_client):
+    assert admit_vote(WALLET, "voter-a") is True
+    # A double-tap finds the slot already held and must not free it
+    assert admit_vote(WALLET, "voter-a") is False
+    assert redis_client.zcard(inflight_key(WALLET)) == 1
+
+
+def test_admit_vote_rejects_when_wallet_saturated(redis_client, monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_MAX_INFLIGHT", 2)
+    admit_vote(WALLET, "voter-a")
+    admit_vote(WALLET, "voter-b")
+    with pytest.raises(AdmissionRejected) as e:
+        admit_vote(WALLET, "voter-c")
+    assert e.value.retry_after == admission.ADMISSION_DEFAULT_RETRY
+    finish_votes(WALLET, "voter-a")
+    assert admit_vote(WALLET, "voter-c") is True
+
+
+def test_admit_votes_refuses_the_rest_of_a_chunk_once_full(redis_client, monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_MAX_INFLIGHT", 3)
+    admit_vote(WALLET, "voter-a")
+    admitted = admit_votes(WALLET, ["voter-a", "voter-b", "voter-c", "voter-d", "voter-e"])
+    assert admitted == [False, True, True, None, None]
+    assert set(redis_client.zrange(inflight_key(WALLET), 0, -1)) == {"voter-a", "voter-b", "voter-c"}
+
+
+def test_admit_votes_rejects_whole_chunk_when_queue_full(redis_client, monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_MAX_QUEUE", 1)
+    with pytest.raises(AdmissionRejected):
+        admit_votes(WALLET, ["voter-a", "voter-b"])
+    assert redis_client.zcard(inflight_key(WALLET)) == 0
+
+
+def test_release_votes_frees_slots(redis_client):
+    admit_votes(WALLET, ["voter-a", "voter-b"])
+    release_votes(WALLET, "voter-a")
+    assert redis_client.zrange(inflight_key(WALLET), 0, -1) == ["voter-b"]
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+import routes.cast_vote as cast_vote
+from routes.cast_vote import _ndjson_lines, _ingest_chunk
+from utils.admission import inflight_key
+from utils.vote_status import reserve_vote, get_vote_status
+from utils.voted_index import SYNCED_AT_KEY, voted_key
+from utils.vote_stream import VOTE_STREAM
+
+WALLET = "0xBooth"
+
+
+def collect(generator):
+    async def run():
+        return [item async for item in generator]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def synced(redis_client):
+    """Voted index caught up, so no line needs a hasVoted call."""
+    redis_client.set(SYNCED_AT_KEY, time.time())
+    return redis_client
+
+
+def ingest(chunk):
+    results = []
+    asyncio.run(_ingest_chunk(WALLET, chunk, results))
+    return sorted(results, key=lambda r: r["line"])
+
+
+def test_ndjson_lines_bound_every_line(streamed_request, monkeypatch):
+    monkeypatch.setattr(cast_vote, "BULK_MAX_LINE_BYTES", 10)
+    chunks = [b"ab\ncdefghijk", b"lmnopqrstu", b"vw\nxy\n0123456789012"]
+    assert collect(_ndjson_lines(streamed_request(chunks))) == [(1, b"ab"), (2, None), (3, b"xy"), (4, None)]
+    assert collect(_ndjson_lines(streamed_request([b"ab\nc", b"d"]))) == [(1, b"ab"), (2, b"cd")]
+
+
+def test_ingest_queues_fresh_votes(synced):
+    results = ingest([(1, "voter-a", "cand-1"), (2, "voter-b", "cand-2")])
+    assert [r["status"] for r in results] == ["queued", "queued"]
+    assert synced.xlen(VOTE_STREAM) == 2
+    assert synced.smembers(voted_key(WALLET)) == {"voter-a", "voter-b"}
+    assert get_vote_status(WALLET, "voter-a") == {"status": "queued"}
+
+
+def test_ingest_keeps_slot_of_vote_already_in_flight(synced, monkeypatch):
+    # A /cast-vote for voter-a reserved it after this chunk read the voted index
+    monkeypatch.setattr(cast_vote, "is_voted_many", lambda wallet, voter_ids: [False] * len(voter_ids))
+    reserve_vote(WALLET, "voter-a", {"status": "queued"})
+    synced.zadd(inflight_key(WALLET), {"voter-a": time.time()})
+    results = ingest([(1, "voter-a", "cand-1")])
+    assert results == [{"line": 1, "status": "already_voted", "vote_ref": "voter-a"}]
+    assert synced.zscore(inflight_key(WALLET), "voter-a") is not None
+
+
+def test_ingest_reports_lines_already_voted(synced):
+    reserve_vote(WALLET, "voter-a", {"status": "queued"})
+    results = ingest([(1, "voter-a", "cand-1"), (2, "voter-b", "cand-1")])
+    assert [r["status"] for r in results] == ["already_voted", "queued"]
+
+
+def test_ingest_undoes_a_failed_enqueue(synced, monkeypatch):
+    def broken(*args):
+        raise ConnectionError("stream down")
+    monkeypatch.setattr(cast_vote, "enqueue_votes", broken)
+    results = ingest([(1, "voter-a", "cand-1")])
+    assert results == [{"line": 1, "status": "error", "retryable": True, "message": "Vote could not be queued"}]
+    assert synced.zcard(inflight_key(WALLET)) == 0
+    assert not synced.sismember(voted_key(WALLET), "voter-a")
+    assert get_vote_status(WALLET, "voter-a") is None
+
+
+def test_ingest_reports_failed_chain_lookup_as_retryable(redis_client, monkeypatch):
+    async def no_contract():
+        raise ConnectionError("rpc down")
+    monkeypatch.setattr(cast_vote, "get_async_contract", no_contract)
+    results = ingest([(1, "voter-a", "cand-1")])
+    assert results[0]["status"] == "error" and results[0]["retryable"]
+    assert redis_client.xlen(VOTE_STREAM) == 0
+
+
+def test_ingest_rejections_carry_retry_after(synced, monkeypatch):
+    monkeypatch.setattr("utils.admission.ADMISSION_MAX_INFLIGHT", 1)
+    results = ingest([(1, "voter-a", "cand-1"), (2, "voter-b", "cand-1")])
+    assert results[0]["status"] == "queued"
+    assert results[1]["status"] == "rejected" and results[1]["retry_after"] >= 1
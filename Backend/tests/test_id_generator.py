@@ -0,0 +1,52 @@
+from utils.id_generator import ALPHABET, TIME_CHARS, SEQUENCE_CHARS, _encode, check_char, is_valid_id, is_voter_id
+
+
+def make_id(prefix, seconds, sequence):
+    body = _encode(seconds, TIME_CHARS) + _encode(sequence, SEQUENCE_CHARS)
+    return prefix + body + check_char(body)
+
+
+def test_encode_pads_to_width():
+    assert _encode(0, 6) == "000000"
+    assert _encode(32, 3) == "010"
+    assert _encode(31, 1) == "Z"
+
+
+def test_generated_ids_validate():
+    for seconds, sequence in [(0, 0), (1, 31), (53_000_000, 123_456), (32 ** 6 - 1, 32 ** 7 - 1)]:
+        voter_id = make_id("VOT", seconds, sequence)
+        assert len(voter_id) == 3 + TIME_CHARS + SEQUENCE_CHARS + 1
+        assert is_valid_id(voter_id, "VOT")
+        assert is_valid_id(voter_id.lower().replace("vot", "VOT"), "VOT")
+
+
+def test_check_character_catches_single_character_errors():
+    voter_id = make_id("VOT", 53_000_000, 123_456)
+    for i in range(3, len(voter_id)):
+        for ch in ALPHABET:
+            if ch != voter_id[i]:
+                assert not is_valid_id(voter_id[:i] + ch + voter_id[i + 1:], "VOT")
+
+
+def test_check_character_catches_adjacent_transpositions():
+    voter_id = make_id("VOT", 53_000_000, 123_456)
+    for i in range(3, len(voter_id) - 1):
+        swapped = voter_id[:i] + voter_id[i + 1] + voter_id[i] + voter_id[i + 2:]
+        if swapped != voter_id:
+            assert not is_valid_id(swapped, "VOT")
+
+
+def test_is_valid_id_rejects_wrong_shape():
+    voter_id = make_id("VOT", 53_000_000, 123_456)
+    assert not is_valid_id(voter_id, "ADM")
+    assert not is_valid_id(voter_id[:-2], "VOT")
+    assert not is_valid_id(voter_id[:-1] + "U", "VOT")      # not in the alphabet
+
+
+def test_is_voter_id_accepts_legacy_and_new_ids():
+    assert is_voter_id(make_id("VOT", 53_000_000, 7))
+    assert is_voter_id("VOTA1B2C3D")
+    assert is_voter_id(" vota1b2c3d ")
+    assert not is_voter_id("ADMA1B2C3D")
+    assert not is_voter_id("VOT-1B2C3D")
+    assert not is_voter_id("VOT1NZZAS0000C1SK")
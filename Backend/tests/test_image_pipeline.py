@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from PIL import Image
+
+from utils.image_pipeline import normalize_media, normalize_photo, normalize_signature, InvalidImage, PHOTO_SIZE, SIGNATURE_SIZE
+
+
+def encode(img, fmt, **params):
+    out = io.BytesIO()
+    img.save(out, format=fmt, **params)
+    return out.getvalue()
+
+
+def phone_photo(size=(4032, 3024), orientation=6):
+    """Landscape pixels that EXIF says to show rotated 90 degrees, as phones write portraits."""
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    return encode(Image.new("RGB", size, (200, 120, 40)), "JPEG", quality=90, exif=exif)
+
+
+def test_photo_is_upright_and_fits_the_card_box():
+    img = Image.open(io.BytesIO(normalize_photo(phone_photo())))
+    assert img.format == "JPEG"
+    assert img.width <= PHOTO_SIZE[0] and img.height <= PHOTO_SIZE[1]
+    assert img.height > img.width                   # rotated to portrait
+    assert 0x0112 not in img.getexif()              # metadata stripped
+
+
+def test_small_photo_is_not_upscaled():
+    img = Image.open(io.BytesIO(normalize_photo(encode(Image.new("RGB", (100, 120)), "PNG"))))
+    assert img.size == (100, 120)
+
+
+def test_transparent_signature_is_flattened_onto_white():
+    signature = Image.new("RGBA", (2400, 800), (0, 0, 0, 0))
+    signature.paste((20, 20, 90, 255), (1000, 300, 1400, 500))
+    img = Image.open(io.BytesIO(normalize_signature(encode(signature, "PNG"))))
+    assert img.format == "PNG" and img.mode == "L"
+    assert img.width <= SIGNATURE_SIZE[0] and img.height <= SIGNATURE_SIZE[1]
+    assert img.getpixel((0, 0)) == 255
+    assert img.getpixel((img.width // 2, img.height // 2)) < 100
+
+
+def test_normalize_media_picks_format_by_field():
+    assert normalize_media("profile_picture", phone_photo((400, 300)))[1] == ".jpg"
+    assert normalize_media("signature", phone_photo((400, 300)))[1] == ".png"
+
+
+def test_garbage_is_rejected():
+    with pytest.raises(InvalidImage):
+        normalize_photo(b"not an image")
+
+
+def test_truncated_upload_is_rejected():
+    data = phone_photo((800, 600))
+    with pytest.raises(InvalidImage):
+        normalize_photo(data[:len(data) // 2])
+    png = encode(Image.effect_noise((400, 200), 60), "PNG")
+    with pytest.raises(InvalidImage):
+        normalize_signature(png[:len(png) // 2])
@@ -0,0 +1,145 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+from web3 import Web3
+from web3.exceptions import Web3RPCError
+
+import utils.nonce_manager as nonce_manager
+from utils.nonce_manager import (
+    allocate_nonce, release_nonce, mark_nonce_mined, resync_nonce, record_sent_tx, current_tx_hash, repriced,
+    handle_send_error, reconcile_wallet, NONCE_GAP_GRACE,
+)
+
+WALLET = "0x00000000000000000000000000000000000000aa"
+CHECKSUMMED = Web3.to_checksum_address(WALLET)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Transaction counts the fake node reports for WALLET."""
+    counts = {"pending": 7, "latest": 7}
+    fake_w3 = SimpleNamespace(
+        to_checksum_address=Web3.to_checksum_address,
+        eth=SimpleNamespace(get_transaction_count=lambda wallet, tag: counts[tag]),
+    )
+    monkeypatch.setattr(nonce_manager, "w3", fake_w3)
+    return counts
+
+
+def test_first_allocation_starts_at_chain_pending(redis_client, chain):
+    assert [allocate_nonce(WALLET) for _ in range(3)] == [7, 8, 9]
+    assert redis_client.sismember("nonce:wallets", CHECKSUMMED)
+    assert redis_client.zrange(f"nonce:allocated:{CHECKSUMMED}", 0, -1) == ["7", "8", "9"]
+
+
+def test_released_nonces_are_reused_lowest_first(redis_client, chain):
+    for _ in range(4):
+        allocate_nonce(WALLET)
+    release_nonce(WALLET, 9)
+    release_nonce(WALLET, 8)
+    assert [allocate_nonce(WALLET) for _ in range(3)] == [8, 9, 11]
+
+
+def test_resync_moves_counter_forward_and_drops_mined(redis_client, chain):
+    for _ in range(3):
+        allocate_nonce(WALLET)          # 7, 8, 9
+    release_nonce(WALLET, 9)
+    chain.update(pending=12, latest=9)
+    assert resync_nonce(WALLET) == 12
+    # 7 and 8 are mined; the released 9 is below the chain's pending nonce
+    assert redis_client.zrange(f"nonce:allocated:{CHECKSUMMED}", 0, -1) == []
+    assert redis_client.zcard(f"nonce:released:{CHECKSUMMED}") == 0
+    assert allocate_nonce(WALLET) == 12
+
+
+def test_resync_never_moves_counter_back(redis_client, chain):
+    for _ in range(3):
+        allocate_nonce(WALLET)
+    chain.update(pending=8, latest=8)
+    assert resync_nonce(WALLET) == 10
+
+
+def test_mined_nonce_forgets_its_payload(redis_client, chain):
+    nonce = allocate_nonce(WALLET)
+    record_sent_tx(WALLET, nonce, {"nonce": nonce, "gasPrice": 100}, "ab" * 32)
+    assert redis_client.hexists(f"nonce:txs:{CHECKSUMMED}", nonce)
+    mark_nonce_mined(WALLET, nonce)
+    assert not redis_client.hexists(f"nonce:txs:{CHECKSUMMED}", nonce)
+
+
+def test_current_tx_hash_follows_replacements(redis_client):
+    first, second, third = "0x" + "01" * 32, "0x" + "02" * 32, "0x" + "03" * 32
+    redis_client.set(f"nonce:replaced:{first}", second)
+    redis_client.set(f"nonce:replaced:{second}", third)
+    assert current_tx_hash(first[2:]) == third
+    assert current_tx_hash(third) == third
+
+
+def test_repriced_keeps_fee_mode_and_outbids(monkeypatch):
+    monkeypatch.setattr(nonce_manager, "get_fees", lambda: {
+        "gas_price": 10, "max_fee_per_gas": 10, "max_priority_fee_per_gas": 1,
+    })
+    legacy = repriced({"nonce": 3, "gasPrice": 100})
+    assert set(legacy) == {"nonce", "gasPrice"}
+    assert legacy["gasPrice"] >= 111
+
+    dynamic = repriced({"nonce": 3, "maxFeePerGas": 100, "maxPriorityFeePerGas": 2})
+    assert "gasPrice" not in dynamic
+    assert dynamic["maxFeePerGas"] >= 111
+    assert dynamic["maxPriorityFeePerGas"] >= 3
+
+
+def test_rejected_send_releases_the_nonce(redis_client, chain):
+    nonce = allocate_nonce(WALLET)
+    handle_send_error(WALLET, nonce, Web3RPCError("insufficient funds for gas * price + value"))
+    assert redis_client.zrange(f"nonce:released:{CHECKSUMMED}", 0, -1) == [str(nonce)]
+
+
+def test_timed_out_send_the_node_took_keeps_the_nonce(redis_client, chain):
+    nonce = allocate_nonce(WALLET)      # 7
+    chain.update(pending=8)
+    handle_send_error(WALLET, nonce, requests.exceptions.ReadTimeout("read timed out"))
+    assert redis_client.zcard(f"nonce:released:{CHECKSUMMED}") == 0
+    assert redis_client.zscore(f"nonce:allocated:{CHECKSUMMED}", nonce) is not None
+
+
+def test_timed_out_send_the_node_does_not_have_is_released(redis_client, chain):
+    nonce = allocate_nonce(WALLET)
+    handle_send_error(WALLET, nonce, requests.exceptions.ConnectionError("connection reset"))
+    assert redis_client.zrange(f"nonce:released:{CHECKSUMMED}", 0, -1) == [str(nonce)]
+
+
+def test_unreachable_node_keeps_the_nonce(redis_client, chain, monkeypatch):
+    nonce = allocate_nonce(WALLET)
+
+    def down(wallet, tag):
+        raise requests.exceptions.ConnectionError("node down")
+    monkeypatch.setattr(nonce_manager.w3.eth, "get_transaction_count", down)
+    handle_send_error(WALLET, nonce, requests.exceptions.ReadTimeout("read timed out"))
+    assert redis_client.zcard(f"nonce:released:{CHECKSUMMED}") == 0
+
+
+def test_released_nonce_is_filled_only_after_the_grace_period(redis_client, chain, monkeypatch):
+    filled = []
+    monkeypatch.setattr(nonce_manager, "send_noop", lambda wallet, key, nonce, fees: filled.append(nonce) or "0x")
+    monkeypatch.setattr(nonce_manager, "get_fee_params", lambda: {})
+    allocate_nonce(WALLET)
+    allocate_nonce(WALLET)              # 7, 8
+    release_nonce(WALLET, 7)
+    reconcile_wallet(WALLET, "key")
+    assert filled == []
+    assert redis_client.zrange(f"nonce:released:{CHECKSUMMED}", 0, -1) == ["7"]
+
+    redis_client.hset(f"nonce:released_at:{CHECKSUMMED}", 7, time.time() - NONCE_GAP_GRACE - 1)
+    reconcile_wallet(WALLET, "key")
+    assert filled == [7]
+    assert redis_client.hlen(f"nonce:released_at:{CHECKSUMMED}") == 0
+
+
+def test_reused_nonce_forgets_its_release_time(redis_client, chain):
+    allocate_nonce(WALLET)
+    release_nonce(WALLET, 7)
+    assert allocate_nonce(WALLET) == 7
+    assert redis_client.hlen(f"nonce:released_at:{CHECKSUMMED}") == 0
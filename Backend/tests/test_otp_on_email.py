@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import utils.otp_on_email as otp_on_email
+from utils.otp_on_email import store_otp_in_redis, verify_otp, MAX_OTP_ATTEMPTS
+from utils.rate_limit import RateLimited
+
+EMAIL = "voter@example.com"
+
+
+def verify(otp):
+    return asyncio.run(verify_otp(EMAIL, otp, "login"))
+
+
+def test_otp_is_single_use(redis_client):
+    store_otp_in_redis(EMAIL, "123456", "login")
+    assert verify("123456") is True
+    assert verify("123456") is False
+
+
+def test_wrong_guesses_burn_the_otp(redis_client, monkeypatch):
+    monkeypatch.setattr(otp_on_email, "OTP_MAX_VERIFY_FAILURES", 3)
+    store_otp_in_redis(EMAIL, "123456", "login")
+    assert verify("000000") is False
+    assert verify("111111") is False
+    assert verify("222222") is False
+    assert verify("123456") is False
+
+
+def test_new_otp_resets_failure_count(redis_client, monkeypatch):
+    monkeypatch.setattr(otp_on_email, "OTP_MAX_VERIFY_FAILURES", 2)
+    store_otp_in_redis(EMAIL, "123456", "login")
+    assert verify("000000") is False
+    store_otp_in_redis(EMAIL, "654321", "login")
+    assert verify("000000") is False
+    assert verify("654321") is True
+
+
+def test_issue_is_rate_limited_per_email(redis_client):
+    for _ in range(MAX_OTP_ATTEMPTS):
+        store_otp_in_redis(EMAIL, "123456", "login")
+    with pytest.raises(RateLimited):
+        store_otp_in_redis(EMAIL, "999999", "login")
+    # The refused issue did not overwrite the live OTP
+    assert verify("123456") is True
+
+
+def test_issue_is_rate_limited_per_ip(redis_client, monkeypatch):
+    monkeypatch.setattr(otp_on_email, "OTP_IP_ATTEMPTS", 2)
+    store_otp_in_redis("a@example.com", "111111", "login", ip="10.0.0.1")
+    store_otp_in_redis("b@example.com", "222222", "login", ip="10.0.0.1")
+    with pytest.raises(RateLimited):
+        store_otp_in_redis("c@example.com", "333333", "login", ip="10.0.0.1")
+    assert redis_client.get("otp:login:c@example.com") is None
+
+
+def test_verified_user_can_get_a_new_otp(redis_client):
+    for _ in range(MAX_OTP_ATTEMPTS):
+        store_otp_in_redis(EMAIL, "123456", "login")
+    assert verify("123456") is True
+    store_otp_in_redis(EMAIL, "654321", "login")
+    assert verify("654321") is True
+
+
+def test_issue_window_defaults_to_600_seconds(redis_client):
+    store_otp_in_redis(EMAIL, "123456", "login")
+    assert 0 < redis_client.pttl(f"ratelimit:otp:login:{EMAIL}") <= 600000
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+import utils.rate_limit as rate_limit
+from utils.rate_limit import acquire, client_ip, limit_key, RateLimited
+
+
+def test_acquire_admits_up_to_the_limit(redis_client):
+    key = limit_key("login", "10.0.0.1")
+    for _ in range(3):
+        acquire([(key, 3, 60)])
+    with pytest.raises(RateLimited) as e:
+        acquire([(key, 3, 60)])
+    assert 1 <= e.value.retry_after <= 60
+
+
+def test_acquire_records_nothing_when_any_window_is_full(redis_client):
+    per_ip = limit_key("otp", "10.0.0.1")
+    per_email = limit_key("otp", "a@example.com")
+    acquire([(per_email, 1, 60)])
+    with pytest.raises(RateLimited):
+        acquire([(per_ip, 5, 60), (per_email, 1, 60)])
+    assert redis_client.zcard(per_ip) == 0
+
+
+def test_zero_limit_always_rejects(redis_client):
+    with pytest.raises(RateLimited) as e:
+        acquire([(limit_key("closed", "x"), 0, 30)])
+    assert e.value.retry_after == 30
+
+
+def _request(peer, **headers):
+    return SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers)
+
+
+def test_client_ip_ignores_forwarded_headers_by_default(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", False)
+    request = _request("172.18.0.5", **{"x-forwarded-for": "1.2.3.4", "x-real-ip": "1.2.3.4"})
+    assert client_ip(request) == "172.18.0.5"
+
+
+def test_client_ip_behind_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", True)
+    assert client_ip(_request("172.18.0.5", **{"x-real-ip": "203.0.113.7"})) == "203.0.113.7"
+    # Only the right-most hop was written by nginx; the rest is client-supplied
+    request = _request("172.18.0.5", **{"x-forwarded-for": "6.6.6.6, 203.0.113.7"})
+    assert client_ip(request) == "203.0.113.7"
+    assert client_ip(_request("172.18.0.5")) == "172.18.0.5"
@@ -0,0 +1,26 @@
+from hexbytes import HexBytes
+
+from utils.receipt_tracker import format_receipt
+
+TX_HASH = "0x" + "ab" * 32
+BLOCK_HASH = "0x" + "cd" * 32
+
+
+def test_format_receipt_matches_web3_shapes():
+    receipt = format_receipt({
+        "transactionHash": TX_HASH, "blockHash": BLOCK_HASH, "blockNumber": "0x1a",
+        "status": "0x1", "gasUsed": "0x5208", "effectiveGasPrice": None,
+        "logs": [{
+            "address": "0x00000000000000000000000000000000000000aa",
+            "topics": ["0x" + "01" * 32], "data": "0x", "blockNumber": "0x1a",
+            "logIndex": "0x0", "transactionIndex": "0x2",
+            "transactionHash": TX_HASH, "blockHash": BLOCK_HASH,
+        }],
+    })
+    assert receipt["blockNumber"] == 26 and receipt["status"] == 1 and receipt["gasUsed"] == 21000
+    assert receipt["effectiveGasPrice"] is None
+    assert receipt["transactionHash"] == HexBytes(TX_HASH)
+    log = receipt["logs"][0]
+    assert log["address"] == "0x00000000000000000000000000000000000000AA"
+    assert log["logIndex"] == 0 and log["transactionIndex"] == 2
+    assert log["topics"] == [HexBytes("0x" + "01" * 32)] and log["data"] == HexBytes("0x")
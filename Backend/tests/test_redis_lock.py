@@ -0,0 +1,40 @@
+import time
+
+from utils.redis_lock import RenewedLock
+
+
+def test_only_one_holder(redis_client):
+    first, second = RenewedLock("test:lock", ttl=5), RenewedLock("test:lock", ttl=5)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_release_keep_for_blocks_the_next_run(redis_client):
+    lock = RenewedLock("test:lock", ttl=5)
+    assert lock.acquire()
+    lock.release(keep_for=60)
+    assert 0 < redis_client.pttl("test:lock") <= 60000
+    assert not RenewedLock("test:lock", ttl=5).acquire()
+
+
+def test_heartbeat_keeps_the_lock_past_its_ttl(redis_client):
+    lock = RenewedLock("test:lock", ttl=0.3)
+    assert lock.acquire()
+    time.sleep(0.6)
+    assert lock.held()
+    assert redis_client.exists("test:lock")
+    lock.release()
+    assert not redis_client.exists("test:lock")
+
+
+def test_lock_taken_over_is_reported_and_left_alone(redis_client):
+    lock = RenewedLock("test:lock", ttl=0.3)
+    assert lock.acquire()
+    redis_client.set("test:lock", "someone-else")
+    time.sleep(0.3)
+    assert not lock.held()
+    lock.release()
+    assert redis_client.get("test:lock") == "someone-else"
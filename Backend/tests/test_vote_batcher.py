@@ -0,0 +1,77 @@
+import threading
+import time
+
+from utils.vote_batcher import VoteBatcher
+
+
+class Recorder:
+    """submit_batch that remembers every batch it was handed."""
+
+    def __init__(self):
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, admin_wallet, votes):
+        with self._lock:
+            self.batches.append((admin_wallet, [vote["voter_id_hmac"] for vote in votes]))
+
+
+def drain(batcher):
+    batcher._executor.shutdown(wait=True)
+
+
+def votes(*voter_ids):
+    return [{"voter_id_hmac": voter_id, "candidate": "cand-1"} for voter_id in voter_ids]
+
+
+def test_full_batches_are_submitted_right_away():
+    recorder = Recorder()
+    batcher = VoteBatcher(recorder, batch_size=2, window=60)
+    for vote in votes("a", "b", "c", "d", "e"):
+        batcher.add("0xBooth", vote)
+    batcher.flush()                 # one batch per wallet per tick
+    assert batcher.pending_count("0xBooth") == 3
+    batcher.flush()
+    assert batcher.pending_count("0xBooth") == 1
+    batcher.flush(force=True)
+    drain(batcher)
+    assert sorted(recorder.batches) == [("0xBooth", ["a", "b"]), ("0xBooth", ["c", "d"]), ("0xBooth", ["e"])]
+
+
+def test_partial_batch_waits_for_the_window():
+    recorder = Recorder()
+    batcher = VoteBatcher(recorder, batch_size=10, window=0.05)
+    batcher.add("0xBooth", votes("a")[0])
+    batcher.flush()
+    assert batcher.pending_count("0xBooth") == 1
+    time.sleep(0.06)
+    batcher.flush()
+    drain(batcher)
+    assert recorder.batches == [("0xBooth", ["a"])]
+
+
+def test_wallets_are_batched_separately():
+    recorder = Recorder()
+    batcher = VoteBatcher(recorder, batch_size=10, window=60)
+    batcher.add("0xBoothA", votes("a")[0])
+    batcher.add("0xBoothB", votes("b")[0])
+    batcher.add("0xBoothA", votes("c")[0])
+    batcher.flush(force=True)
+    drain(batcher)
+    assert sorted(recorder.batches) == [("0xBoothA", ["a", "c"]), ("0xBoothB", ["b"])]
+
+
+def test_crashing_submit_does_not_stop_other_batches():
+    submitted = []
+
+    def submit(admin_wallet, batch):
+        if admin_wallet == "0xBroken":
+            raise RuntimeError("boom")
+        submitted.append(admin_wallet)
+
+    batcher = VoteBatcher(submit, batch_size=10, window=60)
+    batcher.add("0xBroken", votes("a")[0])
+    batcher.add("0xBooth", votes("b")[0])
+    batcher.flush(force=True)
+    drain(batcher)
+    assert submitted == ["0xBooth"]
@@ -0,0 +1,41 @@
+from routes.cast_vote import existing_vote
+from utils.vote_status import reserve_vote, get_vote_status, claim_idempotency_key, release_idempotency_for_voters
+from utils.voted_index import voted_key
+
+WALLET = "0xBooth"
+
+
+def test_existing_vote_of_released_voter_is_retryable(redis_client):
+    reserve_vote(WALLET, "voter-a", {"status": "queued"})
+    assert existing_vote(WALLET, "voter-a")["duplicate"] is True
+
+    redis_client.set(f"vote_status:{WALLET}:voter-a", '{"status": "failed", "reason": "reverted"}')
+    redis_client.srem(voted_key(WALLET), "voter-a")
+    response = existing_vote(WALLET, "voter-a")
+    assert response["retryable"] is True and response["reason"] == "reverted"
+
+
+def test_existing_vote_on_chain_is_final(redis_client):
+    redis_client.sadd(voted_key(WALLET), "voter-a")
+    response = existing_vote(WALLET, "voter-a")
+    assert response["status"] == "failed" and "retryable" not in response
+
+
+def test_reserve_vote_is_exclusive_and_sets_status(redis_client):
+    assert reserve_vote(WALLET, "voter-a", {"status": "queued"}) is True
+    assert reserve_vote(WALLET, "voter-a", {"status": "queued"}) is False
+    assert get_vote_status(WALLET, "voter-a") == {"status": "queued"}
+
+
+def test_failed_vote_frees_its_idempotency_key(redis_client):
+    assert claim_idempotency_key(WALLET, "key-1", "voter-a") is None
+    assert claim_idempotency_key(WALLET, "key-1", "voter-a") == "voter-a"
+    release_idempotency_for_voters(WALLET, "voter-a")
+    assert claim_idempotency_key(WALLET, "key-1", "voter-b") is None
+
+
+def test_idempotency_key_rebound_to_another_voter_is_kept(redis_client):
+    claim_idempotency_key(WALLET, "key-1", "voter-a")
+    redis_client.set(f"idempotency:{WALLET}:key-1", "voter-b")
+    release_idempotency_for_voters(WALLET, "voter-a")
+    assert redis_client.get(f"idempotency:{WALLET}:key-1") == "voter-b"
@@ -0,0 +1,60 @@
+import pytest
+
+import utils.vote_timeseries as vote_timeseries
+from utils.vote_timeseries import record_votes, read_series
+
+WALLET = "0xBooth"
+MINUTE = 60
+
+
+@pytest.fixture
+def small_ring(redis_client, monkeypatch):
+    """A 5-slot minute ring, so a few writes wrap it."""
+    monkeypatch.setitem(vote_timeseries.RESOLUTIONS, "minute", (MINUTE, 5))
+    return 5
+
+
+def series(now, points=5, metric="confirmed"):
+    return read_series([WALLET], "minute", points, metric=metric, now=now)["series"][WALLET]
+
+
+def test_counts_land_in_their_bucket(small_ring):
+    record_votes(WALLET, 3, at=10 * MINUTE)
+    record_votes(WALLET, 2, at=10 * MINUTE + 30)
+    record_votes(WALLET, 4, at=12 * MINUTE)
+    assert series(now=12 * MINUTE) == [0, 0, 5, 0, 4]
+    assert read_series([WALLET], "minute", 5, now=12 * MINUTE)["start"] == 8 * MINUTE
+
+
+def test_metrics_are_separate(small_ring):
+    record_votes(WALLET, 3, at=10 * MINUTE)
+    record_votes(WALLET, 1, "failed", at=10 * MINUTE)
+    assert series(now=10 * MINUTE) == [0, 0, 0, 0, 3]
+    assert series(now=10 * MINUTE, metric="failed") == [0, 0, 0, 0, 1]
+
+
+def test_slots_from_the_previous_lap_are_cleared(small_ring):
+    for minute in range(10, 15):
+        record_votes(WALLET, minute, at=minute * MINUTE)
+    # Minutes 15..17 reuse the slots of 10..12; the skipped ones must read as zero
+    record_votes(WALLET, 1, at=17 * MINUTE)
+    assert series(now=17 * MINUTE) == [13, 14, 0, 0, 1]
+
+
+def test_buckets_after_the_last_write_read_as_zero(small_ring):
+    for minute in range(10, 15):
+        record_votes(WALLET, 1, at=minute * MINUTE)
+    # Nothing written for three minutes: those slots still hold minutes 10..12
+    assert series(now=17 * MINUTE) == [1, 1, 0, 0, 0]
+
+
+def test_writes_older_than_the_ring_are_dropped(small_ring):
+    record_votes(WALLET, 1, at=20 * MINUTE)
+    record_votes(WALLET, 9, at=15 * MINUTE)
+    assert series(now=20 * MINUTE) == [0, 0, 0, 0, 1]
+
+
+def test_gap_longer_than_the_ring_starts_fresh(small_ring):
+    record_votes(WALLET, 5, at=10 * MINUTE)
+    record_votes(WALLET, 1, at=30 * MINUTE)
+    assert series(now=30 * MINUTE) == [0, 0, 0, 0, 1]
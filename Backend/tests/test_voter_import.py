@@ -0,0 +1,110 @@
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+import routes.voter_import_routes as voter_import_routes
+from routes.voter_import_routes import _csv_lines, _csv_records
+from utils.voter_import import aadhaar_valid, validate_row
+
+VALID_AADHAAR = "234123412346"
+TODAY = date(2026, 1, 15)
+
+
+def test_aadhaar_check_digit():
+    assert aadhaar_valid(VALID_AADHAAR)
+    assert aadhaar_valid("499987654328")
+    assert not aadhaar_valid("134123412346")        # cannot start with 0/1
+    assert not aadhaar_valid("23412341234")         # 11 digits
+
+
+def test_aadhaar_catches_single_digit_and_transposition_errors():
+    for i in range(12):
+        for digit in "0123456789":
+            typo = VALID_AADHAAR[:i] + digit + VALID_AADHAAR[i + 1:]
+            if typo != VALID_AADHAAR and typo[0] not in "01":
+                assert not aadhaar_valid(typo), typo
+    for i in range(11):
+        swapped = VALID_AADHAAR[:i] + VALID_AADHAAR[i + 1] + VALID_AADHAAR[i] + VALID_AADHAAR[i + 2:]
+        if swapped != VALID_AADHAAR and swapped[0] not in "01":
+            assert not aadhaar_valid(swapped), swapped
+
+
+def record(**overrides):
+    row = {
+        "name": "Asha Verma", "father_name": "Ravi Verma", "gender": "f",
+        "email": "asha@example.com", "contact_number": "+91 9876543210",
+        "aadhaar": "2341 2341 2346", "voter_dob": "15/01/2008",
+        "voters_state": "uttar pradesh", "voters_city": "Lucknow",
+        "voters_district": "Lucknow", "pincode": "226001",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_validate_row_cleans_values():
+    row = validate_row(record(), TODAY)
+    assert row["gender"] == "Female"
+    assert row["contact_number"] == "9876543210"
+    assert row["aadhaar"] == VALID_AADHAAR
+    assert row["voter_dob"] == "2008-01-15"
+    assert row["voters_state"] == "Uttar Pradesh"
+
+
+@pytest.mark.parametrize("overrides, reason", [
+    ({"email": ""}, "missing email"),
+    ({"aadhaar": "234123412345"}, "invalid aadhaar"),
+    ({"voter_dob": "16/01/2008"}, "age 17"),
+    ({"voter_dob": "2008/01/15"}, "voter_dob must be"),
+    ({"voters_state": "Atlantis"}, "unknown state"),
+    ({"gender": "x"}, "unknown gender"),
+    ({"contact_number": "1234567890"}, "invalid contact_number"),
+    ({"pincode": "026001"}, "invalid pincode"),
+    ({"name": "a" * 101}, "name longer than 100"),
+])
+def test_validate_row_rejects(overrides, reason):
+    with pytest.raises(ValueError, match=reason):
+        validate_row(record(**overrides), TODAY)
+
+
+def collect(generator):
+    async def run():
+        return [item async for item in generator]
+    return asyncio.run(run())
+
+
+def test_csv_lines_split_across_chunks(streamed_request):
+    chunks = ["﻿name,city\r\nAsha,Luck".encode(), "now\r\n\nRavi,".encode(), "Pune".encode()]
+    assert collect(_csv_lines(streamed_request(chunks))) == [
+        (1, "name,city"), (2, "Asha,Lucknow"), (3, ""), (4, "Ravi,Pune"),
+    ]
+
+
+def test_csv_lines_decodes_characters_split_across_chunks(streamed_request):
+    data = "name\nअशा\n".encode()
+    chunks = [data[:7], data[7:]]        # splits the first multi-byte character
+    assert collect(_csv_lines(streamed_request(chunks))) == [(1, "name"), (2, "अशा")]
+
+
+def test_csv_records_join_quoted_newlines(streamed_request):
+    body = b'name,addr\na,"x\ny"\nb,"q""\nz"\nc,d'
+    assert collect(_csv_records(streamed_request([body]))) == [
+        (1, "name,addr"), (2, 'a,"x\ny"'), (4, 'b,"q""\nz"'), (6, "c,d"),
+    ]
+
+
+def test_csv_line_limit_applies_to_every_line(streamed_request, monkeypatch):
+    monkeypatch.setattr(voter_import_routes, "IMPORT_MAX_LINE_BYTES", 10)
+    with pytest.raises(HTTPException) as e:
+        collect(_csv_lines(streamed_request([b"short\n" + b"x" * 20 + b"\nshort\n"])))
+    assert e.value.status_code == 413
+    assert "Line 2" in e.value.detail
+
+
+def test_csv_record_limit_applies_to_joined_lines(streamed_request, monkeypatch):
+    monkeypatch.setattr(voter_import_routes, "IMPORT_MAX_LINE_BYTES", 10)
+    with pytest.raises(HTTPException) as e:
+        collect(_csv_records(streamed_request([b'a,"12345\n12345\n12345"\n'])))
+    assert e.value.status_code == 413
+    assert "line 1" in e.value.detail
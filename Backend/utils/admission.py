@@ -0,0 +1,176 @@
+import math
+import os
+import time
+from dotenv import load_dotenv
+from database.db import redis_client
+from utils.vote_stream import VOTE_STREAM
+
+load_dotenv()
+
+# Backpressure for /cast-vote. Every admin wallet can only move votes at chain
+# speed, so accepted-but-unfinished votes are capped per wallet (and overall)
+# and callers get a 429 + Retry-After instead of a backlog that outlives the
+# vote_status TTL.
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", 500))        # per admin wallet
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 20000))            # whole vote stream
+ADMISSION_INFLIGHT_TTL = int(os.getenv("ADMISSION_INFLIGHT_TTL", 300))        # forget slots older than this (crash safety)
+ADMISSION_RATE_WINDOW = int(os.getenv("ADMISSION_RATE_WINDOW", 60))           # seconds of history for throughput
+ADMISSION_RATE_BUCKET = int(os.getenv("ADMISSION_RATE_BUCKET", 10))           # seconds per throughput bucket
+ADMISSION_DEFAULT_RETRY = int(os.getenv("ADMISSION_DEFAULT_RETRY", 5))        # Retry-After with no throughput yet
+ADMISSION_MAX_RETRY = int(os.getenv("ADMISSION_MAX_RETRY", 120))
+
+# Keys per wallet:
+#   inflight:{wallet}                  zset voter_id_hmac -> admitted at
+#   throughput:{wallet}:{bucket}       votes finished in that bucket
+
+# Returns {in-flight count, 1 if this call added the voter / 0 if it already
+# held a slot}, or {-1, 0} when the wallet is saturated. Only a caller that
+# added the member may release it: a duplicate request must not free the
+# slot of the request that is actually in flight.
+ADMIT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    return {-1, 0}
+end
+local added = redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {count + added, added}
+"""
+
+_admit = redis_client.register_script(ADMIT_LUA)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def inflight_key(admin_wallet: str) -> str:
+    return f"inflight:{admin_wallet}"
+
+
+def _throughput_keys(admin_wallet: str, now: float) -> list:
+    current = int(now // ADMISSION_RATE_BUCKET)
+    buckets = ADMISSION_RATE_WINDOW // ADMISSION_RATE_BUCKET
+    return [f"throughput:{admin_wallet}:{b}" for b in range(current - buckets, current)]
+
+
+def throughput(admin_wallet: str) -> float:
+    """Finished votes per second for `admin_wallet` over the last ADMISSION_RATE_WINDOW."""
+    counts = redis_client.mget(_throughput_keys(admin_wallet, time.time()))
+    return sum(int(c) for c in counts if c) / ADMISSION_RATE_WINDOW
+
+
+def queue_depth() -> int:
+    """Entries still on the vote stream (acked entries are deleted)."""
+    return redis_client.xlen(VOTE_STREAM)
+
+
+def retry_after(excess: int, rate: float) -> int:
+    if rate <= 0:
+        return ADMISSION_DEFAULT_RETRY
+    return max(1, min(ADMISSION_MAX_RETRY, math.ceil(excess / rate)))
+
+
+def admit_vote(admin_wallet: str, voter_id_hmac: str) -> bool:
+    """
+    Take an in-flight slot for this vote. Returns True if this call took a new
+    slot, False if the voter already held one (release only in the first case).
+    Raises AdmissionRejected (with a Retry-After in seconds) when saturated.
+    """
+    depth = queue_depth()
+    if depth >= ADMISSION_MAX_QUEUE:
+        raise AdmissionRejected(
+            "Vote queue is full, try again shortly.",
+            retry_after(depth - ADMISSION_MAX_QUEUE + 1, throughput(admin_wallet)),
+        )
+
+    now = time.time()
+    count, added = _admit(
+        keys=[inflight_key(admin_wallet)],
+        args=[now - ADMISSION_INFLIGHT_TTL, now, ADMISSION_MAX_INFLIGHT, voter_id_hmac, ADMISSION_INFLIGHT_TTL],
+    )
+    if count == -1:
+        raise AdmissionRejected(
+            "Too many votes in flight for this booth, try again shortly.",
+            retry_after(1, throughput(admin_wallet)),
+        )
+    return added == 1
+
+
+def admit_votes(admin_wallet: str, voter_id_hmacs: list) -> list:
+    """
+    admit_vote for a chunk in one round trip. Returns per voter None if
+    refused, otherwise whether this call took a new slot (as admit_vote);
+    once one is refused the rest of the chunk is refused too.
+    Raises AdmissionRejected if the whole vote stream is full.
+    """
+    depth = queue_depth()
+    if depth + len(voter_id_hmacs) > ADMISSION_MAX_QUEUE:
+        raise AdmissionRejected(
+            "Vote queue is full, try again shortly.",
+            retry_after(depth + len(voter_id_hmacs) - ADMISSION_MAX_QUEUE, throughput(admin_wallet)),
+        )
+
+    now = time.time()
+    with redis_client.pipeline(transaction=False) as pipe:
+        for voter_id_hmac in voter_id_hmacs:
+            _admit(
+                keys=[inflight_key(admin_wallet)],
+                args=[now - ADMISSION_INFLIGHT_TTL, now, ADMISSION_MAX_INFLIGHT, voter_id_hmac, ADMISSION_INFLIGHT_TTL],
+                client=pipe,
+            )
+        results = pipe.execute()
+
+    admitted, refused = [], []
+    for voter_id_hmac, (count, added) in zip(voter_id_hmacs, results):
+        if count == -1 or (admitted and admitted[-1] is None):
+            admitted.append(None)
+            if added:
+                refused.append(voter_id_hmac)
+        else:
+            admitted.append(added == 1)
+    release_votes(admin_wallet, *refused)
+    return admitted
+
+
+def release_votes(admin_wallet: str, *voter_id_hmacs: str):
+    """Free slots this request took (admit_vote returned True) for votes rejected before reaching the queue."""
+    if voter_id_hmacs:
+        redis_client.zrem(inflight_key(admin_wallet), *voter_id_hmacs)
+
+
+def finish_votes(admin_wallet: str, *voter_id_hmacs: str):
+    """Free slots of votes the relayer resolved and count them toward throughput."""
+    if not voter_id_hmacs:
+        return
+    bucket = f"throughput:{admin_wallet}:{int(time.time() // ADMISSION_RATE_BUCKET)}"
+    with redis_client.pipeline() as pipe:
+        pipe.zrem(inflight_key(admin_wallet), *voter_id_hmacs)
+        pipe.incrby(bucket, len(voter_id_hmacs))
+        pipe.expire(bucket, ADMISSION_RATE_WINDOW + 2 * ADMISSION_RATE_BUCKET)
+        pipe.execute()
+
+
+def saturation(admin_wallet: str) -> dict:
+    """Gauge for dashboards / booth UIs."""
+    now = time.time()
+    with redis_client.pipeline() as pipe:
+        pipe.zcount(inflight_key(admin_wallet), now - ADMISSION_INFLIGHT_TTL, "+inf")
+        pipe.xlen(VOTE_STREAM)
+        inflight, depth = pipe.execute()
+    rate = throughput(admin_wallet)
+
+    return {
+        "in_flight": inflight,
+        "max_in_flight": ADMISSION_MAX_INFLIGHT,
+        "saturation": round(inflight / ADMISSION_MAX_INFLIGHT, 3),
+        "queue_depth": depth,
+        "max_queue_depth": ADMISSION_MAX_QUEUE,
+        "queue_saturation": round(depth / ADMISSION_MAX_QUEUE, 3),
+        "throughput_per_sec": round(rate, 3),
+        "estimated_drain_seconds": math.ceil(inflight / rate) if rate > 0 else None,
+    }
@@ -0,0 +1,390 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from eth_account import Account
+from web3 import Web3, AsyncWeb3
+from web3.providers import HTTPProvider, AsyncHTTPProvider, JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One place that owns every chain client in the process. Providers, HTTP
+# connection pools and contract objects are built lazily on first use and
+# then shared by all routes and workers (instead of each module opening its
+# own Web3 + reloading the ABI at import time).
+
+# Several providers can be configured (AVAX_RPC_URLS, comma separated); the
+# first one doubles as RPC_URL for code that needs a single endpoint.
+RPC_URLS = [url.strip() for url in os.getenv("AVAX_RPC_URLS", "").split(",") if url.strip()] or [os.getenv("AVAX_RPC")]
+RPC_URL = RPC_URLS[0]
+CHAIN_ID = int(os.getenv("CHAIN_ID", "43113"))
+CONTRACT_ADDRESS = os.getenv("SMART_CONTRACT_ADDRESS")
+ABI_PATH = "./deploy-contract/Voting_abi.json"
+
+RPC_POOL_CONNECTIONS = int(os.getenv("RPC_POOL_CONNECTIONS", 10))      # sync: host pools kept
+RPC_POOL_MAXSIZE = int(os.getenv("RPC_POOL_MAXSIZE", 50))              # sync: keep-alive sockets per host
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", 15))                      # seconds per request
+ASYNC_RPC_CONNECTIONS = int(os.getenv("ASYNC_RPC_CONNECTIONS", 100))   # async: total open sockets
+
+RPC_HEDGE_PERCENTILE = float(os.getenv("RPC_HEDGE_PERCENTILE", 95))    # hedge a read once it is slower than this
+RPC_HEDGE_MIN_MS = float(os.getenv("RPC_HEDGE_MIN_MS", 50))
+RPC_HEDGE_DEFAULT_MS = float(os.getenv("RPC_HEDGE_DEFAULT_MS", 500))   # until an endpoint has enough samples
+RPC_MAX_ERRORS = int(os.getenv("RPC_MAX_ERRORS", 3))                   # consecutive errors before benching
+RPC_COOLDOWN = float(os.getenv("RPC_COOLDOWN", 30))                    # seconds an endpoint stays benched
+RPC_LATENCY_SAMPLES = 200
+
+# Nonce-sequenced calls stay on one endpoint per wallet: a node only knows
+# about its own mempool, so "pending" counts and sends must agree.
+STICKY_METHODS = {"eth_sendRawTransaction", "eth_getTransactionCount"}
+
+_lock = threading.Lock()
+_abi = None
+_session = None
+_w3 = {}            # endpoint (or "pool") -> Web3
+_contracts = {}     # endpoint (or "pool") -> contract
+_health = {}        # endpoint -> stats dict
+_sticky = {}        # wallet -> endpoint its transactions go to
+
+
+# ---------- HEALTH ----------
+def _stats(endpoint: str) -> dict:
+    if endpoint not in _health:
+        _health[endpoint] = {
+            "requests": 0,
+            "errors": 0,
+            "consecutive_errors": 0,
+            "latency_ms": None,       # EWMA
+            "error_rate": 0.0,        # EWMA
+            "last_error": None,
+            "last_ok_at": None,
+            "down_until": 0,
+            "samples": deque(maxlen=RPC_LATENCY_SAMPLES),
+        }
+    return _health[endpoint]
+
+
+def record_call(endpoint: str, latency: float, error: Exception = None):
+    with _lock:
+        stats = _stats(endpoint)
+        stats["requests"] += 1
+        stats["error_rate"] = 0.9 * stats["error_rate"] + (0.1 if error is not None else 0)
+        if error is not None:
+            stats["errors"] += 1
+            stats["consecutive_errors"] += 1
+            stats["last_error"] = str(error)
+            if stats["consecutive_errors"] >= RPC_MAX_ERRORS:
+                stats["down_until"] = time.time() + RPC_COOLDOWN
+            return
+        latency_ms = latency * 1000
+        stats["latency_ms"] = latency_ms if stats["latency_ms"] is None else 0.8 * stats["latency_ms"] + 0.2 * latency_ms
+        stats["samples"].append(latency_ms)
+        stats["consecutive_errors"] = 0
+        stats["down_until"] = 0
+        stats["last_ok_at"] = time.time()
+
+
+def _percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def endpoint_health() -> dict:
+    now = time.time()
+    with _lock:
+        health = {}
+        for endpoint in RPC_URLS:
+            stats = _stats(endpoint)
+            health[endpoint] = {k: v for k, v in stats.items() if k != "samples"}
+            health[endpoint]["healthy"] = stats["down_until"] <= now
+            health[endpoint]["p95_ms"] = _percentile(stats["samples"], 95) if stats["samples"] else None
+        return health
+
+
+def ranked_endpoints() -> list:
+    """Healthy endpoints fastest first (error rate counts against latency), benched ones last."""
+    now = time.time()
+    with _lock:
+        def score(endpoint):
+            stats = _stats(endpoint)
+            benched = stats["down_until"] > now
+            # Endpoints without samples yet score 0 so they get tried
+            return (benched, (stats["latency_ms"] or 0) * (1 + 10 * stats["error_rate"]))
+        return sorted(RPC_URLS, key=score)
+
+
+def hedge_delay(endpoint: str) -> float:
+    """Seconds to wait on `endpoint` before racing the next one."""
+    with _lock:
+        samples = _stats(endpoint)["samples"]
+        if len(samples) < 20:
+            return RPC_HEDGE_DEFAULT_MS / 1000
+        return max(RPC_HEDGE_MIN_MS, _percentile(samples, RPC_HEDGE_PERCENTILE)) / 1000
+
+
+def write_endpoint(wallet: str) -> str:
+    """Endpoint that carries `wallet`'s nonce sequence; only moves when that endpoint is benched."""
+    endpoint = _sticky.get(wallet)
+    if endpoint:
+        with _lock:
+            healthy = _stats(endpoint)["down_until"] <= time.time()
+        if healthy:
+            return endpoint
+    endpoint = ranked_endpoints()[0]
+    _sticky[wallet] = endpoint
+    return endpoint
+
+
+def _sticky_wallet(method: str, params):
+    if method not in STICKY_METHODS or not params:
+        return None
+    if method == "eth_getTransactionCount":
+        return Web3.to_checksum_address(params[0])
+    try:
+        return Account.recover_transaction(params[0])
+    except Exception:
+        return None
+
+
+class TrackedHTTPProvider(HTTPProvider):
+    def make_request(self, method, params):
+        start = time.perf_counter()
+        try:
+            response = super().make_request(method, params)
+        except Exception as e:
+            record_call(self.endpoint_uri, time.perf_counter() - start, e)
+            raise
+        record_call(self.endpoint_uri, time.perf_counter() - start)
+        return response
+
+
+class TrackedAsyncHTTPProvider(AsyncHTTPProvider):
+    async def make_request(self, method, params):
+        start = time.perf_counter()
+        try:
+            response = await super().make_request(method, params)
+        except Exception as e:
+            record_call(self.endpoint_uri, time.perf_counter() - start, e)
+            raise
+        record_call(self.endpoint_uri, time.perf_counter() - start)
+        return response
+
+
+# ---------- POOL ----------
+_hedge_executor = ThreadPoolExecutor(max_workers=RPC_POOL_MAXSIZE, thread_name_prefix="rpc-hedge")
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """
+    One provider over every RPC_URLS endpoint:
+      - reads go to the best ranked endpoint; if it has not answered within
+        its RPC_HEDGE_PERCENTILE latency, the same read is sent to the next
+        one and the first answer wins; errors fail over right away
+      - sends / nonce reads stick to write_endpoint(wallet)
+    """
+
+    def __init__(self, endpoints: list = None):
+        super().__init__()
+        self.providers = {
+            endpoint: TrackedHTTPProvider(endpoint, request_kwargs={"timeout": RPC_TIMEOUT}, session=get_rpc_session())
+            for endpoint in (endpoints or RPC_URLS)
+        }
+
+    def make_request(self, method, params):
+        wallet = _sticky_wallet(method, params)
+        if wallet:
+            return self.providers[write_endpoint(wallet)].make_request(method, params)
+
+        ranked = [e for e in ranked_endpoints() if e in self.providers]
+        if len(ranked) == 1:
+            return self.providers[ranked[0]].make_request(method, params)
+
+        candidates = iter(ranked)
+        pending, errors = set(), []
+
+        def launch():
+            endpoint = next(candidates, None)
+            if endpoint is None:
+                return False
+            pending.add(_hedge_executor.submit(self.providers[endpoint].make_request, method, params))
+            return True
+
+        launch()
+        hedged = False
+        while True:
+            done, _ = wait(pending, timeout=None if hedged else hedge_delay(ranked[0]), return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                launch()
+                continue
+            for future in done:
+                pending.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(e)
+            if not pending and not launch():
+                raise errors[-1]
+
+    def make_batch_request(self, requests):
+        return self.providers[ranked_endpoints()[0]].make_batch_request(requests)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(provider.is_connected() for provider in self.providers.values())
+
+
+class PooledAsyncHTTPProvider(AsyncJSONBaseProvider):
+    """Async twin of PooledHTTPProvider; losing hedged requests are cancelled."""
+
+    def __init__(self, endpoints: list = None):
+        super().__init__()
+        self.providers = {endpoint: TrackedAsyncHTTPProvider(endpoint) for endpoint in (endpoints or RPC_URLS)}
+
+    async def cache_async_session(self, session: aiohttp.ClientSession):
+        for provider in self.providers.values():
+            await provider.cache_async_session(session)
+
+    async def make_request(self, method, params):
+        wallet = _sticky_wallet(method, params)
+        if wallet:
+            return await self.providers[write_endpoint(wallet)].make_request(method, params)
+
+        ranked = [e for e in ranked_endpoints() if e in self.providers]
+        if len(ranked) == 1:
+            return await self.providers[ranked[0]].make_request(method, params)
+
+        candidates = iter(ranked)
+        pending, errors = set(), []
+
+        def launch():
+            endpoint = next(candidates, None)
+            if endpoint is None:
+                return False
+            pending.add(asyncio.ensure_future(self.providers[endpoint].make_request(method, params)))
+            return True
+
+        launch()
+        hedged = False
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    pending, timeout=None if hedged else hedge_delay(ranked[0]), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                if not pending and not launch():
+                    raise errors[-1]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def make_batch_request(self, requests):
+        return await self.providers[ranked_endpoints()[0]].make_batch_request(requests)
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        for provider in self.providers.values():
+            if await provider.is_connected():
+                return True
+        return False
+
+
+# ---------- CLIENTS ----------
+def load_abi() -> list:
+    global _abi
+    if _abi is None:
+        with open(ABI_PATH, "r") as f:
+            _abi = json.load(f)
+    return _abi
+
+
+def get_rpc_session() -> requests.Session:
+    """Keep-alive requests session sized for many worker threads."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=RPC_POOL_CONNECTIONS, pool_maxsize=RPC_POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_w3(endpoint: str = None) -> Web3:
+    """Shared Web3 over the whole RPC pool, or pinned to one `endpoint`."""
+    key = endpoint or "pool"
+    if key not in _w3:
+        if endpoint:
+            provider = TrackedHTTPProvider(endpoint, request_kwargs={"timeout": RPC_TIMEOUT}, session=get_rpc_session())
+        else:
+            provider = PooledHTTPProvider()
+        with _lock:
+            _w3.setdefault(key, Web3(provider))
+    return _w3[key]
+
+
+def get_contract(endpoint: str = None):
+    key = endpoint or "pool"
+    if key not in _contracts:
+        contract = get_w3(endpoint).eth.contract(address=CONTRACT_ADDRESS, abi=load_abi())
+        with _lock:
+            _contracts.setdefault(key, contract)
+    return _contracts[key]
+
+
+# ---------- ASYNC ----------
+_http_session = None
+_async_w3 = None
+_async_contract = None
+_async_lock = asyncio.Lock()
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Shared aiohttp session (also used for non-RPC HTTP calls such as Snowtrace)."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=ASYNC_RPC_CONNECTIONS, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT),
+        )
+    return _http_session
+
+
+async def get_async_w3() -> AsyncWeb3:
+    global _async_w3, _async_contract
+    if _async_w3 is None:
+        async with _async_lock:
+            if _async_w3 is None:
+                provider = PooledAsyncHTTPProvider()
+                await provider.cache_async_session(await get_http_session())
+                w3 = AsyncWeb3(provider)
+                _async_contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=load_abi())
+                _async_w3 = w3
+    return _async_w3
+
+
+async def get_async_contract():
+    await get_async_w3()
+    return _async_contract
+
+
+async def close_chain_clients():
+    global _http_session, _async_w3, _async_contract
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session, _async_w3, _async_contract = None, None, None
@@ -0,0 +1,341 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import text
+from web3 import Web3
+from database.db import SessionLocal, redis_client
+from utils.chain_registry import get_w3, get_contract, ranked_endpoints, CONTRACT_ADDRESS
+from utils.redis_lock import RenewedLock
+
+load_dotenv()
+
+contract = get_contract()      # event decoding only; RPC goes through the pass's pinned w3
+
+# Follows AdminAdded / CandidateRegistered / VoteCast from a checkpoint and keeps
+# per-admin, per-candidate tallies in Postgres (candidate_tallies) with a Redis
+# hot copy, so results do not need a contract call. Blocks within
+# INDEXER_REORG_DEPTH of the tip have their hash recorded; if the chain's hash
+# for the newest one changes, the index is rolled back to the fork point.
+# Contract deploy block; required so a first run does not scan from genesis
+INDEXER_START_BLOCK = os.getenv("INDEXER_START_BLOCK", os.getenv("VOTED_INDEX_START_BLOCK"))
+INDEXER_INTERVAL = float(os.getenv("INDEXER_INTERVAL", 2))
+INDEXER_LOCK_TTL = float(os.getenv("INDEXER_LOCK_TTL", 30))         # renewed while a run is in progress
+INDEXER_MAX_LAG_BLOCKS = int(os.getenv("INDEXER_MAX_LAG_BLOCKS", 10))   # behind the head by more -> stale
+INDEXER_CHUNK = int(os.getenv("INDEXER_CHUNK", 2000))               # blocks per eth_getLogs call
+INDEXER_REORG_DEPTH = int(os.getenv("INDEXER_REORG_DEPTH", 12))
+
+CHECKPOINT_NAME = "voting_events"
+
+# Redis hot copy:
+#   tally:{wallet}         hash candidate -> votes
+#   tally:order:{wallet}   list of candidates in registration order
+#   tally:admins           set of admin wallets seen on chain
+#   tally:block            last block folded into the tallies
+TALLY_BLOCK_KEY = "tally:block"
+TALLY_ADMINS_KEY = "tally:admins"
+
+EVENTS = {
+    Web3.to_hex(Web3.keccak(text="AdminAdded(address)")): "AdminAdded",
+    Web3.to_hex(Web3.keccak(text="CandidateRegistered(address,string)")): "CandidateRegistered",
+    Web3.to_hex(Web3.keccak(text="VoteCast(address,string,string)")): "VoteCast",
+}
+
+
+def tally_key(admin_wallet: str) -> str:
+    return f"tally:{admin_wallet}"
+
+
+def tally_order_key(admin_wallet: str) -> str:
+    return f"tally:order:{admin_wallet}"
+
+
+# ---------- READS ----------
+def get_tallies(admin_wallet: str):
+    """[{"candidate_id", "votes"}] in registration order, or None if the index has nothing for this admin."""
+    admin_wallet = Web3.to_checksum_address(admin_wallet)
+    candidates = redis_client.lrange(tally_order_key(admin_wallet), 0, -1)
+    if candidates:
+        votes = redis_client.hmget(tally_key(admin_wallet), candidates)
+        return [{"candidate_id": c, "votes": int(v or 0)} for c, v in zip(candidates, votes)]
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT candidate, votes FROM candidate_tallies
+                WHERE admin_wallet = :wallet
+                ORDER BY registered_block, registered_log_index
+            """),
+            {"wallet": admin_wallet}
+        ).fetchall()
+    finally:
+        db.close()
+    if not rows:
+        return None
+    return [{"candidate_id": row[0], "votes": row[1]} for row in rows]
+
+
+def get_all_tallies() -> dict:
+    """{admin_wallet: {"total_votes", "candidates": [...]}} across every admin."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT admin_wallet, candidate, votes FROM candidate_tallies
+                ORDER BY admin_wallet, registered_block, registered_log_index
+            """)
+        ).fetchall()
+    finally:
+        db.close()
+
+    tallies = {}
+    for admin_wallet, candidate, votes in rows:
+        admin = tallies.setdefault(admin_wallet, {"total_votes": 0, "candidates": []})
+        admin["candidates"].append({"candidate_id": candidate, "votes": votes})
+        admin["total_votes"] += votes
+    return tallies
+
+
+def indexed_block():
+    block = redis_client.get(TALLY_BLOCK_KEY)
+    return int(block) if block is not None else None
+
+
+def index_is_stale(indexed, head: int) -> bool:
+    """True while the tallies are missing or more than INDEXER_MAX_LAG_BLOCKS behind `head`."""
+    return indexed is None or head - indexed > INDEXER_MAX_LAG_BLOCKS
+
+
+# ---------- INDEXING ----------
+def _get_checkpoint(db) -> int:
+    row = db.execute(
+        text("SELECT block_number FROM indexer_checkpoints WHERE name = :name"),
+        {"name": CHECKPOINT_NAME}
+    ).fetchone()
+    if row:
+        return row[0]
+    if INDEXER_START_BLOCK is None:
+        raise RuntimeError("INDEXER_START_BLOCK (contract deploy block) is not set")
+    return int(INDEXER_START_BLOCK)
+
+
+def _set_checkpoint(db, block_number: int):
+    db.execute(
+        text("""
+            INSERT INTO indexer_checkpoints (name, block_number) VALUES (:name, :block)
+            ON CONFLICT (name) DO UPDATE SET block_number = EXCLUDED.block_number
+        """),
+        {"name": CHECKPOINT_NAME, "block": block_number}
+    )
+
+
+def _decode(log):
+    name = EVENTS.get(Web3.to_hex(log["topics"][0]))
+    if not name:
+        return None
+    return getattr(contract.events, name)().process_log(log)
+
+
+def _apply_chunk(db, w3, start: int, end: int, latest: int) -> set:
+    """Fold one block range into Postgres (one transaction). Returns the admins whose tallies changed."""
+    logs = w3.eth.get_logs({
+        "address": CONTRACT_ADDRESS,
+        "fromBlock": start,
+        "toBlock": end,
+        "topics": [list(EVENTS)],
+    })
+
+    touched = set()
+    block_hashes = {}
+    for log in logs:
+        ev = _decode(log)
+        if ev is None:
+            continue
+        args = ev["args"]
+        admin_wallet = args["admin"]
+        block_hashes[ev["blockNumber"]] = Web3.to_hex(ev["blockHash"])
+
+        inserted = db.execute(
+            text("""
+                INSERT INTO chain_events (tx_hash, log_index, block_number, event, admin_wallet, candidate, voter_id)
+                VALUES (:tx_hash, :log_index, :block, :event, :admin, :candidate, :voter_id)
+                ON CONFLICT DO NOTHING
+                RETURNING tx_hash
+            """),
+            {
+                "tx_hash": Web3.to_hex(ev["transactionHash"]),
+                "log_index": ev["logIndex"],
+                "block": ev["blockNumber"],
+                "event": ev["event"],
+                "admin": admin_wallet,
+                "candidate": args.get("candidate"),
+                "voter_id": args.get("voterId"),
+            }
+        ).fetchone()
+        if not inserted:
+            continue    # already folded in by an earlier pass
+
+        if ev["event"] == "AdminAdded":
+            db.execute(
+                text("INSERT INTO chain_admins (admin_wallet, block_number) VALUES (:admin, :block) ON CONFLICT DO NOTHING"),
+                {"admin": admin_wallet, "block": ev["blockNumber"]}
+            )
+        elif ev["event"] == "CandidateRegistered":
+            db.execute(
+                text("""
+                    INSERT INTO candidate_tallies (admin_wallet, candidate, votes, registered_block, registered_log_index)
+                    VALUES (:admin, :candidate, 0, :block, :log_index)
+                    ON CONFLICT (admin_wallet, candidate) DO UPDATE
+                    SET registered_block = EXCLUDED.registered_block, registered_log_index = EXCLUDED.registered_log_index
+                """),
+                {"admin": admin_wallet, "candidate": args["candidate"], "block": ev["blockNumber"], "log_index": ev["logIndex"]}
+            )
+        else:
+            db.execute(
+                text("""
+                    INSERT INTO candidate_tallies (admin_wallet, candidate, votes) VALUES (:admin, :candidate, 1)
+                    ON CONFLICT (admin_wallet, candidate) DO UPDATE
+                    SET votes = candidate_tallies.votes + 1, updated_at = now()
+                """),
+                {"admin": admin_wallet, "candidate": args["candidate"]}
+            )
+        touched.add(admin_wallet)
+
+    # Remember hashes near the tip so a reorg can be spotted next pass
+    if end > latest - INDEXER_REORG_DEPTH:
+        block_hashes[end] = Web3.to_hex(w3.eth.get_block(end)["hash"])
+    for block_number, block_hash in block_hashes.items():
+        if block_number > latest - INDEXER_REORG_DEPTH:
+            db.execute(
+                text("""
+                    INSERT INTO indexed_blocks (block_number, block_hash) VALUES (:block, :hash)
+                    ON CONFLICT (block_number) DO UPDATE SET block_hash = EXCLUDED.block_hash
+                """),
+                {"block": block_number, "hash": block_hash}
+            )
+
+    _set_checkpoint(db, end + 1)
+    return touched
+
+
+def _find_fork(db, w3, latest: int):
+    """Lowest block that has to be re-indexed after a reorg, or None if the recorded tip still matches."""
+    rows = db.execute(
+        text("SELECT block_number, block_hash FROM indexed_blocks ORDER BY block_number DESC")
+    ).fetchall()
+
+    fork = None
+    for block_number, block_hash in rows:
+        if block_number > latest:
+            fork = block_number
+            continue
+        if Web3.to_hex(w3.eth.get_block(block_number)["hash"]) == block_hash:
+            return fork
+        fork = block_number
+    if fork is not None:
+        print(f"Reorg deeper than INDEXER_REORG_DEPTH={INDEXER_REORG_DEPTH}; rolling back to block {fork}")
+    return fork
+
+
+def _rollback(db, fork: int) -> set:
+    """Undo every event at or after `fork`."""
+    touched = {row[0] for row in db.execute(
+        text("SELECT DISTINCT admin_wallet FROM chain_events WHERE block_number >= :fork"),
+        {"fork": fork}
+    ).fetchall()}
+
+    db.execute(
+        text("""
+            UPDATE candidate_tallies t SET votes = t.votes - r.n, updated_at = now()
+            FROM (
+                SELECT admin_wallet, candidate, COUNT(*) AS n FROM chain_events
+                WHERE block_number >= :fork AND event = 'VoteCast'
+                GROUP BY admin_wallet, candidate
+            ) r
+            WHERE t.admin_wallet = r.admin_wallet AND t.candidate = r.candidate
+        """),
+        {"fork": fork}
+    )
+    db.execute(text("DELETE FROM candidate_tallies WHERE registered_block >= :fork"), {"fork": fork})
+    db.execute(text("DELETE FROM chain_admins WHERE block_number >= :fork"), {"fork": fork})
+    db.execute(text("DELETE FROM chain_events WHERE block_number >= :fork"), {"fork": fork})
+    db.execute(text("DELETE FROM indexed_blocks WHERE block_number >= :fork"), {"fork": fork})
+    _set_checkpoint(db, fork)
+    return touched
+
+
+def _refresh_hot_copy(db, admin_wallets: set, block_number: int):
+    """Rewrite the Redis tallies of `admin_wallets` from Postgres."""
+    with redis_client.pipeline() as pipe:
+        for admin_wallet in admin_wallets:
+            rows = db.execute(
+                text("""
+                    SELECT candidate, votes FROM candidate_tallies
+                    WHERE admin_wallet = :wallet
+                    ORDER BY registered_block, registered_log_index
+                """),
+                {"wallet": admin_wallet}
+            ).fetchall()
+            pipe.delete(tally_key(admin_wallet), tally_order_key(admin_wallet))
+            if rows:
+                pipe.hset(tally_key(admin_wallet), mapping={row[0]: row[1] for row in rows})
+                pipe.rpush(tally_order_key(admin_wallet), *[row[0] for row in rows])
+                pipe.sadd(TALLY_ADMINS_KEY, admin_wallet)
+        pipe.set(TALLY_BLOCK_KEY, block_number)
+        pipe.execute()
+
+
+def index_events(lock: RenewedLock = None) -> int:
+    """Catch up from the checkpoint to the chain tip. Returns the next block to index."""
+    # One endpoint for the whole pass: its own head bounds the range, so a
+    # lagging node can't answer empty logs for blocks it hasn't seen yet
+    w3 = get_w3(ranked_endpoints()[0])
+    latest = w3.eth.block_number
+    db = SessionLocal()
+    try:
+        fork = _find_fork(db, w3, latest)
+        if fork is not None:
+            touched = _rollback(db, fork)
+            db.commit()
+            _refresh_hot_copy(db, touched, fork - 1)
+            print(f"Event indexer rolled back to block {fork}")
+
+        start = _get_checkpoint(db)
+        while start <= latest:
+            if lock and not lock.held():
+                break
+            end = min(start + INDEXER_CHUNK - 1, latest)
+            touched = _apply_chunk(db, w3, start, end, latest)
+            db.execute(
+                text("DELETE FROM indexed_blocks WHERE block_number <= :floor"),
+                {"floor": latest - INDEXER_REORG_DEPTH}
+            )
+            db.commit()
+            _refresh_hot_copy(db, touched, end)
+            start = end + 1
+        return start
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_event_indexer(interval: float = INDEXER_INTERVAL):
+    """Background indexer; a Redis lock, renewed while a run is in progress, keeps it to one process at a time."""
+    lock = RenewedLock("event_indexer:lock", ttl=INDEXER_LOCK_TTL)
+
+    def _loop():
+        while True:
+            try:
+                if lock.acquire():
+                    try:
+                        index_events(lock)
+                    finally:
+                        lock.release(keep_for=interval)
+            except Exception as e:
+                print(f"Event indexer error: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, daemon=True).start()
@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from database.db import redis_client
+from utils.chain_registry import get_w3
+from utils.redis_lock import RenewedLock
+
+load_dotenv()
+
+w3 = get_w3()
+
+FEE_ORACLE_KEY = "fee_oracle:latest"
+FEE_SAMPLE_INTERVAL = float(os.getenv("FEE_SAMPLE_INTERVAL", 5))    # seconds between chain samples
+FEE_MAX_AGE = float(os.getenv("FEE_MAX_AGE", 30))                   # older samples are not trusted
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", 20))
+FEE_POLICY = os.getenv("FEE_POLICY", "percentile")                  # "percentile" or "cap"
+FEE_PERCENTILE = float(os.getenv("FEE_PERCENTILE", 50))             # priority-fee percentile for "percentile"
+FEE_CAP_GWEI = float(os.getenv("FEE_CAP_GWEI", 0))                  # hard ceiling, 0 = no cap
+FEE_MODE = os.getenv("FEE_MODE", "legacy")                          # "legacy" (gasPrice) or "eip1559"
+# Base fee headroom: the base fee can rise 12.5% per full block, so fees are
+# set to FEE_BASE_MULTIPLIER x next base fee + tip to stay includable for a
+# few blocks. EIP-1559 txs are refunded the unused part; legacy txs pay it.
+FEE_BASE_MULTIPLIER = float(os.getenv("FEE_BASE_MULTIPLIER", 2))
+
+
+def _cap(value: int) -> int:
+    if FEE_CAP_GWEI > 0:
+        return min(value, w3.to_wei(FEE_CAP_GWEI, "gwei"))
+    return value
+
+
+def sample_fees() -> dict:
+    """Read the chain once and turn it into legacy + EIP-1559 fee suggestions."""
+    if FEE_POLICY == "cap":
+        gas_price = _cap(w3.eth.gas_price)
+        priority = _cap(w3.eth.max_priority_fee)
+        base_fee = w3.eth.get_block("latest").get("baseFeePerGas", 0)
+    else:
+        history = w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_PERCENTILE])
+        # FEE_PERCENTILE of each block's tips, then the median over the window
+        rewards = sorted(r[0] for r in history["reward"] if r)
+        priority = _cap(rewards[len(rewards) // 2] if rewards else 0)
+        # Last entry is the base fee of the next (pending) block
+        base_fee = history["baseFeePerGas"][-1]
+        gas_price = _cap(int(FEE_BASE_MULTIPLIER * base_fee) + priority) if base_fee else _cap(w3.eth.gas_price)
+
+    return {
+        "gas_price": gas_price,
+        "base_fee": base_fee,
+        "max_priority_fee_per_gas": priority,
+        "max_fee_per_gas": _cap(int(FEE_BASE_MULTIPLIER * base_fee) + priority),
+        "sampled_at": time.time(),
+    }
+
+
+def refresh_fees() -> dict:
+    fees = sample_fees()
+    redis_client.set(FEE_ORACLE_KEY, json.dumps(fees), ex=int(FEE_MAX_AGE * 4))
+    return fees
+
+
+def get_fees() -> dict:
+    """
+    Cached fee sample shared by every worker, kept fresh by start_fee_sampler.
+    Samples inline (blocking RPC calls) only if the sampler is not running, so
+    async routes call get_fee_params through asyncio.to_thread.
+    """
+    cached = redis_client.get(FEE_ORACLE_KEY)
+    if cached:
+        fees = json.loads(cached)
+        if time.time() - fees["sampled_at"] <= FEE_MAX_AGE:
+            return fees
+    return refresh_fees()
+
+
+def get_gas_price() -> int:
+    return get_fees()["gas_price"]
+
+
+def get_fee_params() -> dict:
+    """Fee fields to merge into a transaction dict, per FEE_MODE."""
+    fees = get_fees()
+    if FEE_MODE == "eip1559":
+        return {
+            "maxFeePerGas": fees["max_fee_per_gas"],
+            "maxPriorityFeePerGas": fees["max_priority_fee_per_gas"],
+        }
+    return {"gasPrice": fees["gas_price"]}
+
+
+def start_fee_sampler(interval: float = FEE_SAMPLE_INTERVAL):
+    """
+    Keep the shared sample warm in the background. Every process may start
+    this; a Redis lock makes sure only one of them hits the node per interval.
+    """
+    lock = RenewedLock("fee_oracle:sampler-lock", ttl=max(30, interval))
+
+    def _loop():
+        while True:
+            try:
+                if lock.acquire():
+                    try:
+                        refresh_fees()
+                    finally:
+                        lock.release(keep_for=interval)
+            except Exception as e:
+                print(f"Fee sampler error: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, daemon=True).start()
@@ -1,22 +1,110 @@
-import random
-import string
-
-def generateIdForSuperAdmin(prefix="ADM", length=15):
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=length - len(prefix)))
-    return prefix + random_part
-
-def generateIdForAdmin(prefix="ADM", length=15):
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=length - len(prefix)))
-    return prefix + random_part
-
-def generateIdForCandidate(prefix="CAND", length=15):
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=length - len(prefix)))
-    return prefix + random_part
-
-def generateIdForVoters(prefix="VOT", length=10):
-    chars = string.ascii_uppercase + string.digits
-    random_part = ''.join(random.choices(chars, k=length - len(prefix)))
-    return prefix + random_part
\ No newline at end of file
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import text
+from database.db import engine
+
+load_dotenv()
+
+# IDs are PREFIX + TTTTTT + SSSSSSS + C in Crockford base32 (no I/L/O/U):
+#   T  seconds since ID_EPOCH, so ids sort by creation time and inserts land
+#      at the right-hand edge of the primary-key index
+#   S  sequence number from a block reserved with one Postgres nextval('id_blocks');
+#      unique across processes and restarts, no per-insert round trip
+#   C  Luhn mod 32 check character over T+S, catches mistyped ids
+# e.g. VOT 1NZZAS 0000C1S J -> "VOT1NZZAS0000C1SJ" (17 chars, voter_id is String(20))
+ID_EPOCH = 1735689600                                       # 2025-01-01T00:00:00Z
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", 1000))       # ids reserved per nextval()
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_VALUES = {ch: i for i, ch in enumerate(ALPHABET)}
+TIME_CHARS = 6          # 32^6 seconds ~ 34 years
+SEQUENCE_CHARS = 7      # 32^7 ids before the field widens
+
+
+def _encode(value: int, width: int) -> str:
+    chars = []
+    while value:
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars)).rjust(width, "0")
+
+
+def _luhn_sum(body: str, factor: int) -> int:
+    total = 0
+    for ch in reversed(body):
+        addend = factor * _VALUES[ch]
+        total += addend // 32 + addend % 32
+        factor = 1 if factor == 2 else 2
+    return total
+
+
+def check_char(body: str) -> str:
+    return ALPHABET[(32 - _luhn_sum(body, 2) % 32) % 32]
+
+
+def is_valid_id(value: str, prefix: str) -> bool:
+    """True for a well-formed id from this module with the given prefix and a matching check character."""
+    body = value[len(prefix):].upper()
+    if not value.startswith(prefix) or len(body) < TIME_CHARS + SEQUENCE_CHARS + 1:
+        return False
+    if any(ch not in _VALUES for ch in body):
+        return False
+    return _luhn_sum(body, 1) % 32 == 0
+
+
+LEGACY_VOTER_ID_LENGTH = 10     # "VOT" + 7 random [A-Z0-9], issued before check characters
+
+
+def is_voter_id(value: str) -> bool:
+    """Cheap shape check before a voter_id lookup: a check-charactered id or a legacy one."""
+    value = value.strip().upper()
+    if len(value) == LEGACY_VOTER_ID_LENGTH:
+        return value.startswith("VOT") and value.isascii() and value.isalnum()
+    return is_valid_id(value, "VOT")
+
+
+class IdAllocator:
+    """Hands out sequence numbers from reserved blocks; thread-safe, shared by every prefix."""
+
+    def __init__(self, block_size: int = ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self):
+        with engine.connect() as conn:
+            block = conn.execute(text("SELECT nextval('id_blocks')")).scalar()
+        self._next = block * self.block_size
+        self._end = self._next + self.block_size
+
+    def next_sequence(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            sequence = self._next
+            self._next += 1
+            return sequence
+
+    def new_id(self, prefix: str) -> str:
+        seconds = max(0, int(time.time()) - ID_EPOCH)
+        body = _encode(seconds, TIME_CHARS) + _encode(self.next_sequence(), SEQUENCE_CHARS)
+        return prefix + body + check_char(body)
+
+
+id_allocator = IdAllocator()
+
+
+def generateIdForSuperAdmin(prefix="ADM"):
+    return id_allocator.new_id(prefix)
+
+def generateIdForAdmin(prefix="ADM"):
+    return id_allocator.new_id(prefix)
+
+def generateIdForCandidate(prefix="CAND"):
+    return id_allocator.new_id(prefix)
+
+def generateIdForVoters(prefix="VOT"):
+    return id_allocator.new_id(prefix)
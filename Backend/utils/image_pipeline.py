@@ -0,0 +1,82 @@
+import io
+import os
+from dotenv import load_dotenv
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+load_dotenv()
+
+# Photos and signatures are stored at the size the voter card draws them
+# (send_voting_card.py: 32x40 mm photo box, ~30x10 mm signature strip), so the
+# card never has to download or decode a full-size phone image.
+CARD_IMAGE_DPI = int(os.getenv("CARD_IMAGE_DPI", 300))
+PHOTO_JPEG_QUALITY = int(os.getenv("PHOTO_JPEG_QUALITY", 82))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", 50_000_000))   # refuse decompression bombs
+
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+
+def _mm_to_px(mm: float) -> int:
+    return round(mm / 25.4 * CARD_IMAGE_DPI)
+
+
+PHOTO_SIZE = (_mm_to_px(32), _mm_to_px(40))
+SIGNATURE_SIZE = (_mm_to_px(31), _mm_to_px(10))
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def _open(data: bytes, size: tuple, mode: str) -> Image.Image:
+    try:
+        img = Image.open(io.BytesIO(data))
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale; ask for a square
+        # so the box is covered whichever way EXIF says the image is rotated
+        side = max(size)
+        img.draft(mode, (side, side))
+        # Decode the pixels here: open() only reads the header, and a
+        # truncated file would otherwise fail later in convert/thumbnail
+        img.load()
+        img = ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImage(str(e))
+    return img
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """Composite transparency onto white; the card is white behind both images."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return img
+
+
+def normalize_photo(data: bytes) -> bytes:
+    """Upright, at most PHOTO_SIZE, metadata stripped, progressive JPEG."""
+    img = _flatten(_open(data, PHOTO_SIZE, "RGB")).convert("RGB")
+    img.thumbnail(PHOTO_SIZE, Image.LANCZOS, reducing_gap=3.0)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=PHOTO_JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def normalize_signature(data: bytes) -> bytes:
+    """Upright, at most SIGNATURE_SIZE, grayscale PNG (keeps pen strokes crisp)."""
+    img = _flatten(_open(data, SIGNATURE_SIZE, "L")).convert("L")
+    img.thumbnail(SIGNATURE_SIZE, Image.LANCZOS, reducing_gap=3.0)
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+NORMALIZERS = {
+    "profile_picture": (normalize_photo, ".jpg"),
+    "signature": (normalize_signature, ".png"),
+}
+
+
+def normalize_media(field: str, data: bytes):
+    """(card-ready bytes, file extension) for a registration upload field."""
+    normalize, extension = NORMALIZERS[field]
+    return normalize(data), extension
@@ -0,0 +1,213 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import time
+import uuid
+import cloudinary.exceptions
+import cloudinary.uploader
+from dotenv import load_dotenv
+from sqlalchemy import text
+from database.db import SessionLocal, redis_client
+from utils.image_pipeline import normalize_media
+from utils.voter_card_sending_queue import enqueue_voter_card_email
+
+load_dotenv()
+
+# "inline": /voter/register uploads both files concurrently before answering.
+# "deferred": files are staged on local disk, the voter row is committed with
+# media_status='pending' and the media worker uploads them afterwards.
+MEDIA_UPLOAD_MODE = os.getenv("MEDIA_UPLOAD_MODE", "inline")
+MEDIA_UPLOAD_TIMEOUT = float(os.getenv("MEDIA_UPLOAD_TIMEOUT", 20))     # seconds per upload (Cloudinary HTTP timeout)
+MEDIA_UPLOAD_RETRIES = int(os.getenv("MEDIA_UPLOAD_RETRIES", 3))        # worker attempts before media_status='failed'
+MEDIA_RETRY_BACKOFF = float(os.getenv("MEDIA_RETRY_BACKOFF", 30))       # seconds before the 2nd attempt, doubled after each
+MEDIA_STAGING_DIR = os.getenv("MEDIA_STAGING_DIR", "/tmp/voter_media")
+
+MEDIA_FOLDERS = {
+    "profile_picture": "voters/profile",
+    "signature": "voters/signatures",
+}
+
+# Staged files only exist on this host, so each host drains its own queue
+MEDIA_HOST = socket.gethostname()
+MEDIA_QUEUE = f"media-upload-queue:{MEDIA_HOST}"
+MEDIA_RETRY_QUEUE = f"media-upload-retry:{MEDIA_HOST}"     # zset job -> not before (unix time)
+MEDIA_FAILED = "media-upload-failed"                      # hash voter_id -> job, staged files kept for retry_media_upload
+
+
+class MediaUploadFailed(Exception):
+    pass
+
+
+def _read(source) -> bytes:
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return source.read()
+
+
+def _upload(field: str, source, normalize: bool) -> dict:
+    data = _read(source)
+    if normalize:
+        data, _ = normalize_media(field, data)
+    try:
+        return cloudinary.uploader.upload(io.BytesIO(data), folder=MEDIA_FOLDERS[field], timeout=MEDIA_UPLOAD_TIMEOUT)
+    except cloudinary.exceptions.Error as e:
+        raise MediaUploadFailed(f"{field}: {e}")
+
+
+def _destroy(public_id: str):
+    try:
+        cloudinary.uploader.destroy(public_id, timeout=MEDIA_UPLOAD_TIMEOUT)
+    except Exception as e:
+        print(f"Could not remove orphaned upload {public_id}: {e}")
+
+
+async def upload_media(sources: dict, normalize: bool = True) -> dict:
+    """
+    Normalize (utils/image_pipeline.py) and upload {field: file object or path}
+    concurrently off the event loop. Returns {field: secure_url}; raises
+    InvalidImage for undecodable files and MediaUploadFailed if an upload
+    errors or exceeds MEDIA_UPLOAD_TIMEOUT. The timeout is enforced by the
+    HTTP client, so a failed call never leaves an upload running behind it;
+    files that did upload are deleted again when another one fails, since
+    no voter row will point at them.
+    """
+    fields = [field for field, source in sources.items() if source is not None]
+    results = await asyncio.gather(
+        *[asyncio.to_thread(_upload, field, sources[field], normalize) for field in fields],
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        await asyncio.gather(*[
+            asyncio.to_thread(_destroy, r["public_id"]) for r in results if not isinstance(r, BaseException)
+        ])
+        raise errors[0]
+    return {field: result["secure_url"] for field, result in zip(fields, results)}
+
+
+# ---------- DEFERRED MODE ----------
+def _stage_file(voter_id: str, field: str, upload) -> str:
+    data, extension = normalize_media(field, upload.file.read())
+    os.makedirs(MEDIA_STAGING_DIR, exist_ok=True)
+    path = os.path.join(MEDIA_STAGING_DIR, f"{voter_id}-{field}-{uuid.uuid4().hex[:8]}{extension}")
+    with open(path, "wb") as staged:
+        staged.write(data)
+    return path
+
+
+async def stage_media(voter_id: str, uploads: dict) -> dict:
+    """Normalize {field: UploadFile} into MEDIA_STAGING_DIR; returns {field: path}."""
+    staged = {}
+    for field, upload in uploads.items():
+        if upload is not None:
+            staged[field] = await asyncio.to_thread(_stage_file, voter_id, field, upload)
+    return staged
+
+
+def discard_staged(staged: dict):
+    for path in staged.values():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def enqueue_media_upload(voter_id: str, staged: dict, card: dict):
+    """`card` holds the voter card email fields; the email is sent once the URLs exist."""
+    redis_client.rpush(MEDIA_QUEUE, json.dumps({
+        "voter_id": voter_id,
+        "staged": staged,
+        "card": card,
+        "attempts": 0,
+    }))
+
+
+def _set_media_status(voter_id: str, status: str, urls: dict = None):
+    urls = urls or {}
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("""
+                UPDATE voterstable
+                SET profile_picture = COALESCE(:profile_picture, profile_picture),
+                    signature = COALESCE(:signature, signature),
+                    media_status = :status, updated_at = now()
+                WHERE voter_id = :voter_id
+            """),
+            {
+                "voter_id": voter_id,
+                "status": status,
+                "profile_picture": urls.get("profile_picture"),
+                "signature": urls.get("signature"),
+            }
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _process_job(job: dict):
+    voter_id, staged, card = job["voter_id"], job["staged"], job["card"]
+    try:
+        urls = asyncio.run(upload_media(staged, normalize=False))   # normalized when staged
+    except Exception as e:
+        job["attempts"] += 1
+        if job["attempts"] < MEDIA_UPLOAD_RETRIES:
+            delay = MEDIA_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+            print(f"Media upload for {voter_id} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {e}")
+            redis_client.zadd(MEDIA_RETRY_QUEUE, {json.dumps(job): time.time() + delay})
+        else:
+            # Staged files stay on disk so retry_media_upload can pick the job up again
+            print(f"Media upload for {voter_id} gave up after {job['attempts']} attempts: {e}")
+            _set_media_status(voter_id, "failed")
+            redis_client.hset(MEDIA_FAILED, voter_id, json.dumps({**job, "host": MEDIA_HOST}))
+        return
+
+    _set_media_status(voter_id, "ready", urls)
+    discard_staged(staged)
+    enqueue_voter_card_email(
+        voter_id, card["name"], card["father_name"], card["voter_dob"],
+        urls.get("profile_picture"), urls.get("signature"), card["email"]
+    )
+    print(f"Media uploaded for voter {voter_id}")
+
+
+def retry_media_upload(voter_id: str) -> bool:
+    """
+    Requeue a voter whose media upload gave up (media_status='failed') on the
+    host that staged its files. False if there is no failed job for the voter.
+    """
+    job = redis_client.hget(MEDIA_FAILED, voter_id)
+    if not job or not redis_client.hdel(MEDIA_FAILED, voter_id):
+        return False
+    job = json.loads(job)
+    host = job.pop("host")
+    job["attempts"] = 0
+    _set_media_status(voter_id, "pending")
+    redis_client.rpush(f"media-upload-queue:{host}", json.dumps(job))
+    return True
+
+
+def _requeue_due_retries():
+    """Move retries whose backoff has passed back onto this host's queue."""
+    for job in redis_client.zrangebyscore(MEDIA_RETRY_QUEUE, "-inf", time.time()):
+        if redis_client.zrem(MEDIA_RETRY_QUEUE, job):
+            redis_client.rpush(MEDIA_QUEUE, job)
+
+
+def process_media_uploads():
+    """Worker loop for deferred-mode registrations staged on this host."""
+    print("Starting media upload processor...")
+    while True:
+        try:
+            _requeue_due_retries()
+            item = redis_client.blpop(MEDIA_QUEUE, timeout=5)
+            if not item:
+                continue
+            _process_job(json.loads(item[1]))
+        except Exception as e:
+            print(f"Media upload processor error: {e}")
+            time.sleep(1)
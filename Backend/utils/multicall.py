@@ -0,0 +1,70 @@
+import os
+from dotenv import load_dotenv
+from utils.chain_registry import get_async_w3, get_w3
+
+load_dotenv()
+
+# Multicall3 is deployed at the same address on Avalanche C-Chain / Fuji and most EVM chains
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_BATCH = int(os.getenv("MULTICALL_BATCH", 100))     # sub-calls per aggregate3 eth_call
+
+MULTICALL3_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{
+        "name": "calls",
+        "type": "tuple[]",
+        "components": [
+            {"name": "target", "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData", "type": "bytes"},
+        ],
+    }],
+    "outputs": [{
+        "name": "returnData",
+        "type": "tuple[]",
+        "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"},
+        ],
+    }],
+}]
+
+
+async def aggregate(contract, fn_name: str, args_list: list, output_types: list, block_identifier="latest") -> list:
+    """
+    Call contract.fn_name(*args) for every args in args_list through Multicall3
+    aggregate3, MULTICALL_BATCH calls per eth_call. Returns the decoded
+    outputs per call in order (None where that call reverted).
+    """
+    w3 = await get_async_w3()
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+    results = []
+    for i in range(0, len(args_list), MULTICALL_BATCH):
+        calls = [
+            (contract.address, True, contract.encode_abi(fn_name, args=args))
+            for args in args_list[i:i + MULTICALL_BATCH]
+        ]
+        responses = await multicall.functions.aggregate3(calls).call(block_identifier=block_identifier)
+        for success, data in responses:
+            results.append(w3.codec.decode(output_types, data) if success else None)
+    return results
+
+
+def aggregate_sync(contract, fn_name: str, args_list: list, output_types: list, block_identifier="latest") -> list:
+    """Blocking twin of aggregate() for worker threads (vote relayer)."""
+    w3 = get_w3()
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+
+    results = []
+    for i in range(0, len(args_list), MULTICALL_BATCH):
+        calls = [
+            (contract.address, True, contract.encode_abi(fn_name, args=args))
+            for args in args_list[i:i + MULTICALL_BATCH]
+        ]
+        responses = multicall.functions.aggregate3(calls).call(block_identifier=block_identifier)
+        for success, data in responses:
+            results.append(w3.codec.decode(output_types, data) if success else None)
+    return results
@@ -0,0 +1,322 @@
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from web3 import Web3
+from web3.exceptions import ContractLogicError, Web3RPCError
+from database.db import redis_client
+from utils.chain_registry import get_w3, CHAIN_ID
+from utils.fee_oracle import get_fees, get_fee_params
+from utils.receipt_tracker import RECEIPT_TIMEOUT
+from utils.redis_lock import RenewedLock
+
+load_dotenv()
+
+w3 = get_w3()
+
+# Seconds before an unmined nonce counts as stuck. Always past RECEIPT_TIMEOUT:
+# the sender looks its tx up when the receipt wait times out, before the
+# reconciler re-prices it.
+NONCE_STUCK_AFTER = max(float(os.getenv("NONCE_STUCK_AFTER", 2 * RECEIPT_TIMEOUT)), RECEIPT_TIMEOUT + 60)
+NONCE_RECONCILE_INTERVAL = float(os.getenv("NONCE_RECONCILE_INTERVAL", 30))
+NONCE_RECONCILE_LOCK_TTL = float(os.getenv("NONCE_RECONCILE_LOCK_TTL", 30))   # renewed while a pass runs
+NONCE_REPLACEMENT_BUMP = max(float(os.getenv("NONCE_REPLACEMENT_BUMP", 1.25)), 1.1)  # nodes want >= 10% more to replace
+NONCE_TX_TTL = int(os.getenv("NONCE_TX_TTL", 86400))    # how long sent payloads / replacement links are kept
+NONCE_GAP_GRACE = float(os.getenv("NONCE_GAP_GRACE", 60))  # seconds a released nonce waits before a no-op fills it
+
+# Keys per wallet:
+#   nonce:{wallet}            next nonce to hand out
+#   nonce:allocated:{wallet}  zset nonce -> allocation time, removed once mined
+#   nonce:released:{wallet}   zset of nonces given back before broadcast; reused first
+#   nonce:released_at:{wallet} hash nonce -> release time, for NONCE_GAP_GRACE
+#   nonce:txs:{wallet}        hash nonce -> {"tx", "hash"} last signed payload, for re-pricing
+#   nonce:wallets             set of wallets the reconciler should look at
+#   nonce:replaced:{tx_hash}  hash of the tx that replaced it at the same nonce
+
+ALLOCATE_LUA = """
+local released = redis.call('ZRANGE', KEYS[3], 0, 0)
+if #released > 0 then
+    redis.call('ZREM', KEYS[3], released[1])
+    redis.call('HDEL', KEYS[5], released[1])
+    redis.call('ZADD', KEYS[2], ARGV[2], released[1])
+    redis.call('SADD', KEYS[4], ARGV[3])
+    return tonumber(released[1])
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if ARGV[1] == '' then
+        return -1
+    end
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+local nonce = redis.call('INCR', KEYS[1]) - 1
+redis.call('ZADD', KEYS[2], ARGV[2], nonce)
+redis.call('SADD', KEYS[4], ARGV[3])
+return nonce
+"""
+
+# Move the counter forward to the chain's pending nonce and forget anything below it
+RESYNC_LUA = """
+local chain_pending = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if current < chain_pending then
+    redis.call('SET', KEYS[1], chain_pending)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', '(' .. chain_pending)
+local stale = redis.call('ZRANGE', KEYS[2], 0, -1)
+for _, n in ipairs(stale) do
+    if tonumber(n) < tonumber(ARGV[2]) then
+        redis.call('ZREM', KEYS[2], n)
+    end
+end
+return tonumber(redis.call('GET', KEYS[1]))
+"""
+
+_allocate = redis_client.register_script(ALLOCATE_LUA)
+_resync = redis_client.register_script(RESYNC_LUA)
+
+
+def _keys(wallet: str):
+    return [f"nonce:{wallet}", f"nonce:allocated:{wallet}", f"nonce:released:{wallet}", "nonce:wallets",
+            f"nonce:released_at:{wallet}"]
+
+
+def allocate_nonce(wallet: str) -> int:
+    """
+    Hand out the next nonce for `wallet`, shared by every process that signs for it.
+    Released (never broadcast) nonces are reused first so they do not leave gaps.
+    """
+    wallet = w3.to_checksum_address(wallet)
+    nonce = _allocate(keys=_keys(wallet), args=["", time.time(), wallet])
+    if nonce == -1:
+        chain_pending = w3.eth.get_transaction_count(wallet, "pending")
+        nonce = _allocate(keys=_keys(wallet), args=[chain_pending, time.time(), wallet])
+    return int(nonce)
+
+
+def release_nonce(wallet: str, nonce: int):
+    """Give a nonce back when its tx was never broadcast (build/sign/send failed)."""
+    wallet = w3.to_checksum_address(wallet)
+    with redis_client.pipeline() as pipe:
+        pipe.zrem(f"nonce:allocated:{wallet}", nonce)
+        pipe.zadd(f"nonce:released:{wallet}", {nonce: nonce})
+        pipe.hset(f"nonce:released_at:{wallet}", nonce, time.time())
+        pipe.execute()
+
+
+def mark_nonce_mined(wallet: str, nonce: int):
+    wallet = w3.to_checksum_address(wallet)
+    with redis_client.pipeline() as pipe:
+        pipe.zrem(f"nonce:allocated:{wallet}", nonce)
+        pipe.hdel(f"nonce:txs:{wallet}", nonce)
+        pipe.execute()
+
+
+def _hex(tx_hash) -> str:
+    tx_hash = tx_hash if isinstance(tx_hash, str) else Web3.to_hex(tx_hash)
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+
+def record_sent_tx(wallet: str, nonce: int, tx: dict, tx_hash):
+    """
+    Remember the payload broadcast at `nonce` so the reconciler can re-price
+    that same tx (not replace it with a no-op) if it gets stuck.
+    """
+    key = f"nonce:txs:{w3.to_checksum_address(wallet)}"
+    with redis_client.pipeline() as pipe:
+        pipe.hset(key, nonce, json.dumps({"tx": tx, "hash": _hex(tx_hash)}, default=Web3.to_hex))
+        pipe.expire(key, NONCE_TX_TTL)
+        pipe.execute()
+
+
+def current_tx_hash(tx_hash) -> str:
+    """Follow re-pricing replacements from `tx_hash` to the latest tx at its nonce."""
+    tx_hash = _hex(tx_hash)
+    for _ in range(100):
+        replacement = redis_client.get(f"nonce:replaced:{tx_hash}")
+        if not replacement:
+            break
+        tx_hash = replacement
+    return tx_hash
+
+
+def resync_nonce(wallet: str) -> int:
+    """Pull the counter up to the chain and drop bookkeeping for already-mined nonces."""
+    wallet = w3.to_checksum_address(wallet)
+    chain_pending = w3.eth.get_transaction_count(wallet, "pending")
+    chain_latest = w3.eth.get_transaction_count(wallet, "latest")
+    return int(_resync(keys=_keys(wallet)[:3], args=[chain_pending, chain_latest]))
+
+
+def handle_send_error(wallet: str, nonce: int, error: Exception):
+    """
+    Call when building / signing / sending fails for an allocated nonce.
+    The nonce is only given back when the tx surely did not reach the node:
+    a timeout or dropped connection may come after the node took it.
+    """
+    message = str(error).lower()
+    if "nonce too low" in message or "already known" in message or "replacement transaction underpriced" in message:
+        # Someone else used this nonce (or we did already); trust the chain
+        mark_nonce_mined(wallet, nonce)
+        resync_nonce(wallet)
+        return
+    if isinstance(error, (ContractLogicError, Web3RPCError)):
+        # The node answered with an error: it did not take the tx
+        release_nonce(wallet, nonce)
+        return
+
+    try:
+        chain_pending = w3.eth.get_transaction_count(w3.to_checksum_address(wallet), "pending")
+    except Exception as e:
+        print(f"Keeping nonce {wallet}:{nonce}, could not check the node: {e}")
+        return
+    if chain_pending > nonce:
+        # The node has a tx at this nonce; the reconciler drops it once mined
+        print(f"Keeping nonce {wallet}:{nonce}, the node already has a tx for it")
+        return
+    release_nonce(wallet, nonce)
+
+
+def _bump(value: int) -> int:
+    return max(int(value * NONCE_REPLACEMENT_BUMP), value * 11 // 10 + 1)
+
+
+def repriced(tx: dict) -> dict:
+    """
+    `tx` with its fee fields raised by NONCE_REPLACEMENT_BUMP (and at least to
+    the current oracle price), in the fee mode it was sent with: a replacement
+    must outbid the original on every fee field or nodes reject it as underpriced.
+    """
+    fees = get_fees()
+    if "gasPrice" in tx:
+        return {**tx, "gasPrice": max(_bump(int(tx["gasPrice"])), fees["gas_price"])}
+    max_fee = max(_bump(int(tx["maxFeePerGas"])), fees["max_fee_per_gas"])
+    priority = max(_bump(int(tx["maxPriorityFeePerGas"])), fees["max_priority_fee_per_gas"])
+    return {**tx, "maxFeePerGas": max(max_fee, priority), "maxPriorityFeePerGas": priority}
+
+
+def _send(private_key: str, tx: dict) -> str:
+    signed = w3.eth.account.sign_transaction(tx, private_key=private_key)
+    return _hex(w3.eth.send_raw_transaction(signed.raw_transaction))
+
+
+def send_noop(wallet: str, private_key: str, nonce: int, fee_params: dict) -> str:
+    """0-value self transfer that occupies `nonce` so later txs can be mined."""
+    tx = {
+        "chainId": CHAIN_ID,
+        "from": wallet,
+        "to": wallet,
+        "value": 0,
+        "nonce": nonce,
+        "gas": 21000,
+        **fee_params,
+    }
+    tx_hash = _send(private_key, tx)
+    record_sent_tx(wallet, nonce, tx, tx_hash)
+    return tx_hash
+
+
+def replace_stuck_tx(wallet: str, private_key: str, nonce: int) -> str:
+    """
+    Re-sign the payload last broadcast at `nonce` with bumped fees and link
+    the old hash to the new one (current_tx_hash). Falls back to a no-op only
+    when no payload was recorded for the nonce.
+    """
+    record = redis_client.hget(f"nonce:txs:{wallet}", nonce)
+    if not record:
+        return send_noop(wallet, private_key, nonce, repriced(get_fee_params()))
+
+    record = json.loads(record)
+    tx = repriced(record["tx"])
+    tx_hash = _send(private_key, tx)
+    record_sent_tx(wallet, nonce, tx, tx_hash)
+    redis_client.set(f"nonce:replaced:{record['hash']}", tx_hash, ex=NONCE_TX_TTL)
+    return tx_hash
+
+
+def reconcile_wallet(wallet: str, private_key: str):
+    """
+    Compare allocated nonces against the chain and unblock the wallet:
+      - nonces below the mined count are dropped from the bookkeeping
+      - released nonces below the counter are filled with no-op txs once
+        they have waited NONCE_GAP_GRACE (a later allocation may reuse them)
+      - the lowest unmined nonce, if stuck past NONCE_STUCK_AFTER, is
+        re-sent: the same payload at the same nonce with bumped fees
+      - the counter is pulled up if txs were sent from outside this manager
+    """
+    wallet = w3.to_checksum_address(wallet)
+    chain_latest = w3.eth.get_transaction_count(wallet, "latest")
+    chain_pending = w3.eth.get_transaction_count(wallet, "pending")
+    allocated_key, released_key = f"nonce:allocated:{wallet}", f"nonce:released:{wallet}"
+    released_at_key = f"nonce:released_at:{wallet}"
+    txs_key = f"nonce:txs:{wallet}"
+
+    for member in redis_client.zrange(allocated_key, 0, -1):
+        if int(member) < chain_latest:
+            redis_client.zrem(allocated_key, member)
+    mined = [field for field in redis_client.hkeys(txs_key) if int(field) < chain_latest]
+    if mined:
+        redis_client.hdel(txs_key, *mined)
+    released_at = redis_client.hgetall(released_at_key)
+    gone = [field for field in released_at if int(field) < chain_latest]
+    if gone:
+        redis_client.hdel(released_at_key, *gone)
+
+    # Gaps: nonces that were given back and not reused within NONCE_GAP_GRACE
+    for member in redis_client.zrange(released_key, 0, -1):
+        nonce = int(member)
+        if nonce >= chain_latest and time.time() - float(released_at.get(member, 0)) < NONCE_GAP_GRACE:
+            continue
+        if not redis_client.zrem(released_key, member) or nonce < chain_latest:
+            # Taken by allocate_nonce in the meantime, or already used on chain
+            redis_client.hdel(released_at_key, member)
+            continue
+        redis_client.hdel(released_at_key, member)
+        try:
+            tx_hash = send_noop(wallet, private_key, nonce, get_fee_params())
+            print(f"Filled nonce gap {wallet}:{nonce} with no-op {tx_hash}")
+        except Exception as e:
+            print(f"Could not fill nonce gap {wallet}:{nonce}: {e}")
+
+    # Stuck head: the next nonce the chain wants has been pending too long
+    head = redis_client.zscore(allocated_key, chain_latest)
+    if head is not None and time.time() - head > NONCE_STUCK_AFTER:
+        try:
+            tx_hash = replace_stuck_tx(wallet, private_key, chain_latest)
+            redis_client.zadd(allocated_key, {chain_latest: time.time()})
+            print(f"Re-sent stuck tx {wallet}:{chain_latest} with bumped fees as {tx_hash}")
+        except Exception as e:
+            print(f"Could not replace stuck tx {wallet}:{chain_latest}: {e}")
+
+    counter = int(redis_client.get(f"nonce:{wallet}") or 0)
+    if counter < chain_pending:
+        resync_nonce(wallet)
+
+
+def run_reconciler(key_for_wallet, interval: float = NONCE_RECONCILE_INTERVAL):
+    """
+    Periodically reconcile every wallet that has handed out nonces.
+    key_for_wallet(wallet) -> private key, or None to skip that wallet.
+    Only one process reconciles at a time: a Redis lock, renewed while a pass
+    runs, so a slow pass is never joined by a second worker.
+    """
+    lock = RenewedLock("nonce:reconciler-lock", ttl=NONCE_RECONCILE_LOCK_TTL)
+
+    def _loop():
+        while True:
+            try:
+                if lock.acquire():
+                    try:
+                        for wallet in redis_client.smembers("nonce:wallets"):
+                            if not lock.held():
+                                break
+                            private_key = key_for_wallet(wallet)
+                            if private_key:
+                                reconcile_wallet(wallet, private_key)
+                    finally:
+                        lock.release(keep_for=interval)
+            except Exception as e:
+                print(f"Nonce reconciler error: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, daemon=True).start()
@@ -3,55 +3,97 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formataddr
 from database.db import redis_client
+from utils.rate_limit import SLIDING_WINDOW_LUA, RateLimited, limit_key, limit_args, retry_after_seconds
 import os
+import secrets
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-MAX_OTP_ATTEMPTS = 5         
-OTP_EXPIRY = 300             
-OTP_ATTEMPTS_WINDOW = 900  
+MAX_OTP_ATTEMPTS = 5             # OTPs issued per email per OTP_ATTEMPTS_WINDOW
+OTP_EXPIRY = 300
+OTP_ATTEMPTS_WINDOW = 600        # seconds; store_otp_in_redis has always defaulted to 600
+OTP_IP_ATTEMPTS = int(os.getenv("OTP_IP_ATTEMPTS", 20))                 # OTPs issued per client IP per OTP_ATTEMPTS_WINDOW
+OTP_MAX_VERIFY_FAILURES = int(os.getenv("OTP_MAX_VERIFY_FAILURES", 5))  # wrong guesses before the OTP is burned
+
+# Issue: check the per-email / per-IP sliding windows, store the OTP and reset
+# its failure count, all in one script run.
+#   KEYS: otp, failures, limit keys...   ARGV: otp, expiry, member, (limit, window_ms)...
+OTP_ISSUE_LUA = SLIDING_WINDOW_LUA + """
+local keys, limits, windows = {}, {}, {}
+for i = 3, #KEYS do
+    local j = i - 2
+    keys[j] = KEYS[i]
+    limits[j] = tonumber(ARGV[2 + 2 * j])
+    windows[j] = tonumber(ARGV[3 + 2 * j])
+end
+local retry = acquire(keys, limits, windows, ARGV[3])
+if retry > 0 then
+    return retry
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('DEL', KEYS[2])
+return 0
+"""
+
+# Verify: compare and consume in one step (GETDEL-style) so an OTP can only be
+# used once; wrong guesses are counted and the OTP is burned at the limit.
+# A correct OTP also clears the email's issue window, so a user who verified
+# can ask for a new OTP right away.
+#   KEYS: otp, failures, issue window   ARGV: otp, max failures, failures ttl
+OTP_VERIFY_LUA = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return 0
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+    return 1
+end
+local failures = redis.call('INCR', KEYS[2])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+if failures >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+return 0
+"""
+
+_otp_issue = redis_client.register_script(OTP_ISSUE_LUA)
+_otp_verify = redis_client.register_script(OTP_VERIFY_LUA)
+
 
 def generate_otp():
-    import random
-    return str(random.randint(100000, 999999))
+    return str(secrets.randbelow(900000) + 100000)
 
 # Store OTP in Redis with purpose and rate limit
-def store_otp_in_redis(email: str, otp: str, purpose: str, expiry: int = 300, attempts_window: int = 600):
-    otp_key = f"otp:{purpose}:{email}"
-    attempts_key = f"otp_attempts:{purpose}:{email}"
-
-    attempts = redis_client.get(attempts_key)
-    attempts = int(attempts) if attempts else 0
+def store_otp_in_redis(email: str, otp: str, purpose: str, expiry: int = OTP_EXPIRY,
+                       attempts_window: int = OTP_ATTEMPTS_WINDOW, ip: str = None):
+    """Raises RateLimited when `email` (or `ip`) has had too many OTPs within `attempts_window`."""
+    limits = [(limit_key(f"otp:{purpose}", email), MAX_OTP_ATTEMPTS, attempts_window)]
+    if ip:
+        limits.append((limit_key(f"otp:{purpose}:ip", ip), OTP_IP_ATTEMPTS, attempts_window))
 
-    if attempts >= MAX_OTP_ATTEMPTS:
-        raise Exception("Maximum OTP requests exceeded. Please try again later.")
-
-    with redis_client.pipeline() as pipe:
-        pipe.set(otp_key, otp, ex=expiry)             
-        pipe.incr(attempts_key)
-        pipe.expire(attempts_key, attempts_window)
-        pipe.execute()
+    retry_ms = _otp_issue(
+        keys=[f"otp:{purpose}:{email}", f"otp_failures:{purpose}:{email}"] + [key for key, _, _ in limits],
+        args=[otp, expiry, uuid.uuid4().hex] + limit_args(limits),
+    )
+    if retry_ms:
+        raise RateLimited(retry_after_seconds(retry_ms))
 
 
 # Verify OTP
 async def verify_otp(email: str, otp: str, purpose: str ):
-    otp_key = f"otp:{purpose}:{email}"
-    attempts_key = f"otp_attempts:{purpose}:{email}"
-    stored = redis_client.get(otp_key)
-    
-    if stored and stored == otp:
-        with redis_client.pipeline() as pipe:
-            pipe.delete(otp_key)
-            pipe.delete(attempts_key)
-            pipe.execute()
-        return True
-
-    return False
+    verified = _otp_verify(
+        keys=[f"otp:{purpose}:{email}", f"otp_failures:{purpose}:{email}", limit_key(f"otp:{purpose}", email)],
+        args=[otp, OTP_MAX_VERIFY_FAILURES, OTP_EXPIRY],
+    )
+    return verified == 1
 
 
-    
 def send_otp_email(to_email: str, otp: str):
     EMAIL_HOST = os.getenv("EMAIL_HOST")
     EMAIL_PORT = int(os.getenv("EMAIL_PORT"))
@@ -0,0 +1,121 @@
+import math
+import os
+import uuid
+from fastapi import HTTPException, Request
+from dotenv import load_dotenv
+from database.db import redis_client
+
+load_dotenv()
+
+# Sliding-window limits kept as one sorted set per (limit name, subject):
+# members are request ids scored by Redis server time in ms, so every API
+# host sees the same clock. All limits of one call are checked and recorded
+# in a single script run: either every window admits the request or none
+# records it.
+# Set RATE_LIMIT_TRUST_PROXY=true whenever the API is only reachable through
+# nginx (nginx.conf, docker-compose.prod.yml): otherwise every client shares
+# the proxy's address and per-IP limits turn into global ones. Leave it off
+# when clients can reach the API directly, since they could then forge the headers.
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+# Lua helper shared with the OTP scripts (utils/otp_on_email.py).
+# Returns 0 if admitted, otherwise ms until the tightest window has room.
+SLIDING_WINDOW_LUA = """
+local function acquire(keys, limits, windows, member)
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+    local retry = 0
+    for i, key in ipairs(keys) do
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - windows[i])
+        local count = redis.call('ZCARD', key)
+        if limits[i] <= 0 then
+            retry = math.max(retry, windows[i])
+        elseif count >= limits[i] then
+            local oldest = redis.call('ZRANGE', key, count - limits[i], count - limits[i], 'WITHSCORES')
+            retry = math.max(retry, tonumber(oldest[2]) + windows[i] - now, 1)
+        end
+    end
+    if retry > 0 then
+        return retry
+    end
+    for i, key in ipairs(keys) do
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, windows[i])
+    end
+    return 0
+end
+"""
+
+RATE_LIMIT_LUA = SLIDING_WINDOW_LUA + """
+local limits, windows = {}, {}
+for i = 1, #KEYS do
+    limits[i] = tonumber(ARGV[2 * i])
+    windows[i] = tonumber(ARGV[2 * i + 1])
+end
+return acquire(KEYS, limits, windows, ARGV[1])
+"""
+
+_rate_limit = redis_client.register_script(RATE_LIMIT_LUA)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many requests, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def limit_key(name: str, subject: str) -> str:
+    return f"ratelimit:{name}:{subject}"
+
+
+def limit_args(limits: list) -> list:
+    """[(key, limit, window_seconds)] -> flat [limit, window_ms, ...] script arguments."""
+    args = []
+    for _, limit, window in limits:
+        args += [limit, int(window * 1000)]
+    return args
+
+
+def retry_after_seconds(retry_ms: int) -> int:
+    return max(1, math.ceil(int(retry_ms) / 1000))
+
+
+def acquire(limits: list):
+    """Record one request against every (key, limit, window_seconds); raise RateLimited if any window is full."""
+    retry_ms = _rate_limit(
+        keys=[key for key, _, _ in limits],
+        args=[uuid.uuid4().hex] + limit_args(limits),
+    )
+    if retry_ms:
+        raise RateLimited(retry_after_seconds(retry_ms))
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        # nginx overwrites X-Real-IP with the peer it saw. In X-Forwarded-For
+        # only the right-most hop was added by our proxy; entries to its left
+        # come from the client and can be anything.
+        real_ip = request.headers.get("x-real-ip", "").strip()
+        if real_ip:
+            return real_ip
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if hops:
+            return hops[-1]
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(e: RateLimited) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def rate_limit(name: str, limit: int, window: float):
+    """
+    Route dependency: at most `limit` requests per client IP in any `window` seconds.
+        @router.post("/scanner", dependencies=[Depends(rate_limit("scanner", 120, 60))])
+    """
+    def dependency(request: Request):
+        try:
+            acquire([(limit_key(name, client_ip(request)), limit, window)])
+        except RateLimited as e:
+            raise too_many_requests(e)
+    return dependency
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dotenv import load_dotenv
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from utils.chain_registry import get_rpc_session, ranked_endpoints, record_call
+
+load_dotenv()
+
+RECEIPT_POLL_INTERVAL = float(os.getenv("RECEIPT_POLL_INTERVAL", 1.0))   # seconds between polls
+RECEIPT_TIMEOUT = float(os.getenv("RECEIPT_TIMEOUT", 180))               # give up on a tx after this
+RECEIPT_MAX_BATCH = int(os.getenv("RECEIPT_MAX_BATCH", 100))             # hashes per JSON-RPC batch
+RECEIPT_CALLBACK_WORKERS = int(os.getenv("RECEIPT_CALLBACK_WORKERS", 4))  # threads running track() callbacks
+
+# Raw JSON-RPC receipt -> the fields callers use, shaped like web3's own
+# receipts so contract.events.X().process_receipt() accepts them
+_RECEIPT_INTS = ("blockNumber", "status", "gasUsed", "cumulativeGasUsed", "effectiveGasPrice", "transactionIndex")
+_LOG_INTS = ("blockNumber", "logIndex", "transactionIndex")
+_HASHES = ("blockHash", "transactionHash")
+
+
+def _format_log(log: dict) -> dict:
+    formatted = {**log, "address": Web3.to_checksum_address(log["address"])}
+    formatted.update({k: int(log[k], 16) for k in _LOG_INTS if log.get(k) is not None})
+    formatted.update({k: HexBytes(log[k]) for k in _HASHES if log.get(k) is not None})
+    formatted["topics"] = [HexBytes(topic) for topic in log["topics"]]
+    formatted["data"] = HexBytes(log["data"])
+    return formatted
+
+
+def format_receipt(result: dict) -> dict:
+    formatted = dict(result)
+    formatted.update({k: int(result[k], 16) for k in _RECEIPT_INTS if result.get(k) is not None})
+    formatted.update({k: HexBytes(result[k]) for k in _HASHES if result.get(k) is not None})
+    formatted["logs"] = [_format_log(log) for log in result.get("logs", [])]
+    return formatted
+
+
+class ReceiptTracker:
+    """
+    Central watcher for pending transactions.
+
+    Instead of one thread blocked in wait_for_transaction_receipt per tx,
+    every pending hash sits in one dict and a single poller thread asks the
+    node for all of them in one batched eth_getTransactionReceipt request
+    per tick. Waiters get a concurrent.futures.Future (await it from async
+    code with asyncio.wrap_future) and/or a callback(receipt, error).
+    Callbacks run on a small thread pool, so a slow one does not hold up
+    polling for every other tracked transaction.
+    """
+
+    def __init__(self, rpc_url: str = None, poll_interval: float = RECEIPT_POLL_INTERVAL,
+                 timeout: float = RECEIPT_TIMEOUT, max_batch: int = RECEIPT_MAX_BATCH):
+        self.rpc_url = rpc_url      # None: best endpoint of the RPC pool on each poll
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self._pending = {}          # tx_hash -> (future, deadline)
+        self._lock = threading.Lock()
+        self._session = get_rpc_session()
+        self._thread = None
+        self._callbacks = ThreadPoolExecutor(max_workers=RECEIPT_CALLBACK_WORKERS, thread_name_prefix="receipt-callback")
+
+    def track(self, tx_hash, callback=None) -> Future:
+        if not isinstance(tx_hash, str):
+            tx_hash = tx_hash.hex()
+        if not tx_hash.startswith("0x"):
+            tx_hash = "0x" + tx_hash
+
+        with self._lock:
+            if tx_hash in self._pending:
+                future = self._pending[tx_hash][0]
+            else:
+                future = Future()
+                self._pending[tx_hash] = (future, time.monotonic() + self.timeout)
+
+        if callback:
+            def _run_callback(f):
+                try:
+                    receipt = f.result()
+                except Exception as e:
+                    callback(None, e)
+                    return
+                callback(receipt, None)
+
+            future.add_done_callback(lambda f: self._callbacks.submit(_run_callback, f))
+
+        self._ensure_started()
+        return future
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    def _fetch_receipts(self, tx_hashes: list) -> dict:
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionReceipt", "params": [tx_hash]}
+            for i, tx_hash in enumerate(tx_hashes)
+        ]
+        rpc_url = self.rpc_url or ranked_endpoints()[0]
+        start = time.perf_counter()
+        try:
+            response = self._session.post(rpc_url, json=payload, timeout=10)
+            response.raise_for_status()
+        except Exception as e:
+            record_call(rpc_url, time.perf_counter() - start, e)
+            raise
+        record_call(rpc_url, time.perf_counter() - start)
+
+        receipts = {}
+        for item in response.json():
+            result = item.get("result")
+            if result:
+                receipts[tx_hashes[item["id"]]] = AttributeDict.recursive(format_receipt(result))
+        return receipts
+
+    def poll_once(self):
+        with self._lock:
+            tx_hashes = list(self._pending)
+
+        for i in range(0, len(tx_hashes), self.max_batch):
+            chunk = tx_hashes[i:i + self.max_batch]
+            try:
+                receipts = self._fetch_receipts(chunk)
+            except Exception as e:
+                print(f"Receipt poll failed: {e}")
+                continue
+
+            for tx_hash, receipt in receipts.items():
+                with self._lock:
+                    entry = self._pending.pop(tx_hash, None)
+                if entry:
+                    entry[0].set_result(receipt)
+
+        now = time.monotonic()
+        with self._lock:
+            expired = [tx_hash for tx_hash, (_, deadline) in self._pending.items() if deadline <= now]
+            futures = [self._pending.pop(tx_hash)[0] for tx_hash in expired]
+        for tx_hash, future in zip(expired, futures):
+            future.set_exception(TimeoutError(f"Transaction {tx_hash} not mined after {self.timeout}s"))
+
+    def _run(self):
+        while True:
+            if self._pending:
+                self.poll_once()
+            time.sleep(self.poll_interval)
+
+
+receipt_tracker = ReceiptTracker()
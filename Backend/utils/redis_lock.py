@@ -0,0 +1,82 @@
+import threading
+import uuid
+from database.db import redis_client
+
+# Lock for background loops (event indexer, voted-index sync, fee sampler)
+# where a single run can outlast any fixed TTL. The holder's token is the
+# value; a heartbeat thread pushes the expiry out while the run is going, so
+# a second process can only take over once the holder has finished or died.
+
+# Extend / drop the lock only if it still carries our token
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_renew = redis_client.register_script(RENEW_LUA)
+_release = redis_client.register_script(RELEASE_LUA)
+
+
+class RenewedLock:
+    """
+        lock = RenewedLock("event_indexer:lock", ttl=30)
+        if lock.acquire():
+            try:
+                run()               # may check lock.held() between steps
+            finally:
+                lock.release(keep_for=interval)
+    """
+
+    def __init__(self, name: str, ttl: float = 30):
+        self.name = name
+        self.ttl = ttl
+        self.token = None
+        self._stop = None
+        self._lost = threading.Event()
+
+    def acquire(self) -> bool:
+        token = uuid.uuid4().hex
+        if not redis_client.set(self.name, token, nx=True, px=int(self.ttl * 1000)):
+            return False
+        self.token = token
+        self._lost.clear()
+        self._stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(token, self._stop), daemon=True).start()
+        return True
+
+    def _heartbeat(self, token: str, stop: threading.Event):
+        while not stop.wait(self.ttl / 3):
+            try:
+                if not _renew(keys=[self.name], args=[token, int(self.ttl * 1000)]):
+                    print(f"Lock {self.name} was lost")
+                    self._lost.set()
+                    return
+            except Exception as e:
+                print(f"Lock {self.name} renewal error: {e}")
+
+    def held(self) -> bool:
+        """False once a renewal found the lock expired or taken; stop writing then."""
+        return self.token is not None and not self._lost.is_set()
+
+    def release(self, keep_for: float = 0):
+        """
+        Stop renewing. keep_for > 0 leaves the lock in place for that many
+        seconds, so other processes do not start the next run right away.
+        """
+        if self.token is None:
+            return
+        self._stop.set()
+        if keep_for > 0:
+            _renew(keys=[self.name], args=[self.token, int(keep_for * 1000)])
+        else:
+            _release(keys=[self.name], args=[self.token])
+        self.token = None
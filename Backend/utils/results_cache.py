@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dotenv import load_dotenv
+from database.db import redis_client
+from utils.chain_registry import get_async_w3, get_async_contract
+
+load_dotenv()
+
+RESULTS_CACHE_TTL = int(os.getenv("RESULTS_CACHE_TTL", 60))             # seconds a per-block result is kept
+BLOCK_NUMBER_TTL = float(os.getenv("BLOCK_NUMBER_TTL", 1.0))            # reuse eth_blockNumber for this long
+
+_inflight = {}          # key -> asyncio.Task shared by concurrent callers
+_block_number = (None, 0.0)
+
+
+async def single_flight(key: str, fetch):
+    """Run fetch() once per key at a time; concurrent callers await the same task."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def latest_block_number() -> int:
+    number, fetched_at = _block_number
+    if number is not None and time.monotonic() - fetched_at < BLOCK_NUMBER_TTL:
+        return number
+
+    async def fetch():
+        global _block_number
+        w3 = await get_async_w3()
+        block = await w3.eth.block_number
+        _block_number = (block, time.monotonic())
+        return block
+
+    return await single_flight("block_number", fetch)
+
+
+async def contract_results(admin_wallet: str) -> list:
+    """
+    getCandidatesWithVotes for `admin_wallet` at the latest block, cached per
+    (wallet, block) in Redis; one contract read per block however many
+    dashboards refresh.
+    """
+    block = await latest_block_number()
+    key = f"results_cache:{admin_wallet}:{block}"
+
+    cached = redis_client.get(key)
+    if cached:
+        return json.loads(cached)
+
+    async def fetch():
+        contract = await get_async_contract()
+        candidates, votes = await contract.functions.getCandidatesWithVotes(admin_wallet).call(block_identifier=block)
+        results = [{"candidate_id": c, "votes": v} for c, v in zip(candidates, votes)]
+        redis_client.set(key, json.dumps(results), ex=RESULTS_CACHE_TTL)
+        return results
+
+    return await single_flight(key, fetch)
+
+
+def results_etag(results: list) -> str:
+    """Changes only when the tallies do, not on every new block."""
+    digest = hashlib.sha1(json.dumps(results, sort_keys=True).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
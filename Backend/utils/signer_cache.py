@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from database.db import redis_client
+
+load_dotenv()
+
+SIGNER_CACHE_SIZE = int(os.getenv("SIGNER_CACHE_SIZE", 256))     # admin wallets kept ready to sign
+SIGNER_CACHE_TTL = float(os.getenv("SIGNER_CACHE_TTL", 900))      # seconds before a key is re-decrypted
+
+# Published by the API on admin logout / key rotation; every relayer drops the
+# wallet ("*" = everything) from its cache.
+SIGNER_EVICT_CHANNEL = "channel:signer_evict"
+
+
+def evict_signer(wallet: str = "*"):
+    """Tell every relayer to forget the decrypted key for `wallet`."""
+    redis_client.publish(SIGNER_EVICT_CHANNEL, wallet)
+
+
+class SignerCache:
+    """
+    Bounded LRU + TTL cache of ready-to-sign accounts, keyed by admin wallet.
+
+    load(wallet) -> LocalAccount is only called on a miss, so the Fernet
+    decrypt + key derivation happens once per wallet per TTL instead of once
+    per vote batch. Lives in relayer workers only; the API never holds keys.
+    """
+
+    def __init__(self, load, maxsize: int = SIGNER_CACHE_SIZE, ttl: float = SIGNER_CACHE_TTL):
+        self.load = load
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()    # wallet -> (account, expires_at)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, wallet: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(wallet)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(wallet)
+                self.stats["hits"] += 1
+                return entry[0]
+            if entry:
+                del self._entries[wallet]
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+
+        account = self.load(wallet)
+
+        with self._lock:
+            self._entries[wallet] = (account, now + self.ttl)
+            self._entries.move_to_end(wallet)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return account
+
+    def invalidate(self, wallet: str = "*"):
+        with self._lock:
+            if wallet == "*":
+                self.stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(wallet, None):
+                self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def listen_for_evictions(self):
+        """Background thread applying evict_signer() calls from other processes."""
+        def _loop():
+            while True:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.subscribe(SIGNER_EVICT_CHANNEL)
+                    for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.invalidate(message["data"])
+                except Exception as e:
+                    print(f"Signer eviction listener error: {e}")
+                    # Missed messages while disconnected: start clean
+                    self.invalidate()
+                    time.sleep(1)
+                finally:
+                    pubsub.close()
+
+        threading.Thread(target=_loop, daemon=True).start()
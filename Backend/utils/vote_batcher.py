@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VOTE_BATCH_SIZE = int(os.getenv("VOTE_BATCH_SIZE", 50))          # max votes per castVotesBatch tx
+VOTE_BATCH_WINDOW = float(os.getenv("VOTE_BATCH_WINDOW", 2.0))   # seconds to wait for a batch to fill
+VOTE_BATCH_WORKERS = int(os.getenv("VOTE_BATCH_WORKERS", 8))     # batches submitted in parallel
+
+
+class VoteBatcher:
+    """
+    Collects queued votes per admin wallet and hands them to `submit_batch`
+    as one list once the wallet has `batch_size` votes waiting or its oldest
+    vote has waited `window` seconds.
+
+    submit_batch(admin_wallet, votes) runs on a small thread pool so one slow
+    receipt does not hold back batches of other admins.
+    """
+
+    def __init__(self, submit_batch, batch_size: int = VOTE_BATCH_SIZE, window: float = VOTE_BATCH_WINDOW,
+                 workers: int = VOTE_BATCH_WORKERS):
+        self.submit_batch = submit_batch
+        self.batch_size = batch_size
+        self.window = window
+        self._pending = defaultdict(list)   # admin_wallet -> [vote, ...]
+        self._first_queued = {}             # admin_wallet -> monotonic time of oldest pending vote
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vote-batch")
+        self._thread = None
+
+    def add(self, admin_wallet: str, vote: dict):
+        with self._lock:
+            if admin_wallet not in self._first_queued:
+                self._first_queued[admin_wallet] = time.monotonic()
+            self._pending[admin_wallet].append(vote)
+            full = len(self._pending[admin_wallet]) >= self.batch_size
+
+        if full:
+            self._wakeup.set()
+
+    def pending_count(self, admin_wallet: str) -> int:
+        with self._lock:
+            return len(self._pending.get(admin_wallet, []))
+
+    def _take_due_batches(self, force: bool = False):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for admin_wallet in list(self._pending):
+                votes = self._pending[admin_wallet]
+                waited = now - self._first_queued[admin_wallet]
+                if not force and len(votes) < self.batch_size and waited < self.window:
+                    continue
+
+                batch, rest = votes[:self.batch_size], votes[self.batch_size:]
+                due.append((admin_wallet, batch))
+                if rest:
+                    self._pending[admin_wallet] = rest
+                    self._first_queued[admin_wallet] = now
+                else:
+                    del self._pending[admin_wallet]
+                    del self._first_queued[admin_wallet]
+        return due
+
+    def _submit(self, admin_wallet: str, votes: list):
+        try:
+            self.submit_batch(admin_wallet, votes)
+        except Exception as e:
+            print(f"Vote batch for {admin_wallet} crashed: {e}")
+
+    def flush(self, force: bool = False):
+        for admin_wallet, votes in self._take_due_batches(force):
+            self._executor.submit(self._submit, admin_wallet, votes)
+
+    def run(self):
+        print(f"Vote batcher started (size={self.batch_size}, window={self.window}s)")
+        tick = max(self.window / 4, 0.05)
+        while True:
+            self._wakeup.wait(timeout=tick)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from database.db import redis_client
+
+load_dotenv()
+
+VOTE_EVENTS_QUEUE_SIZE = int(os.getenv("VOTE_EVENTS_QUEUE_SIZE", 1000))   # per connected booth
+
+VOTE_EVENTS_PATTERN = "channel:vote_status:*"
+
+
+class VoteEventHub:
+    """
+    Fan-out of vote status transitions to connected booth clients.
+
+    One Redis pattern subscription per process (not one per client): a
+    listener thread receives every vote_status publish and hands it to the
+    asyncio queues of the clients watching that admin wallet.
+    """
+
+    def __init__(self, queue_size: int = VOTE_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._clients = {}          # admin_wallet -> set of (loop, queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, admin_wallet: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._clients.setdefault(admin_wallet, set()).add((asyncio.get_running_loop(), queue))
+        self._ensure_started()
+        return queue
+
+    def unsubscribe(self, admin_wallet: str, queue: asyncio.Queue):
+        with self._lock:
+            clients = self._clients.get(admin_wallet, set())
+            clients.difference_update({c for c in clients if c[1] is queue})
+            if not clients:
+                self._clients.pop(admin_wallet, None)
+
+    def client_count(self) -> int:
+        with self._lock:
+            return sum(len(c) for c in self._clients.values())
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, data: str):
+        try:
+            queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Slow client: drop the event, it can still fall back to /vote-status
+            pass
+
+    def _dispatch(self, channel: str, data: str):
+        admin_wallet = channel.rsplit(":", 1)[-1]
+        with self._lock:
+            clients = list(self._clients.get(admin_wallet, ()))
+        for loop, queue in clients:
+            loop.call_soon_threadsafe(self._put, queue, data)
+
+    def _run(self):
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(VOTE_EVENTS_PATTERN)
+                for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except Exception as e:
+                print(f"Vote event listener error: {e}")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+vote_event_hub = VoteEventHub()
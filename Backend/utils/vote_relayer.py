@@ -0,0 +1,408 @@
+# Relayer worker: reads votes from the Redis stream, batches them per admin
+# wallet, signs + submits castVotesBatch and ACKs entries once the receipt is in.
+# Run it as its own process(es):  python relayer.py
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.logs import DISCARD
+from cryptography.fernet import Fernet
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from database.db import SessionLocal, redis_client
+from utils.admission import finish_votes
+from utils.chain_registry import get_w3, get_contract, write_endpoint, CHAIN_ID
+from utils.fee_oracle import get_fee_params, start_fee_sampler
+from utils.multicall import aggregate_sync
+from utils.nonce_manager import (
+    allocate_nonce, handle_send_error, mark_nonce_mined, record_sent_tx, current_tx_hash, run_reconciler
+)
+from utils.receipt_tracker import receipt_tracker, RECEIPT_TIMEOUT
+from utils.signer_cache import SignerCache
+from utils.vote_batcher import VoteBatcher, VOTE_BATCH_SIZE, VOTE_BATCH_WINDOW
+from utils.vote_status import set_vote_statuses, get_vote_status, release_idempotency_for_voters
+from utils.vote_stream import VOTE_STREAM, VOTE_GROUP, ensure_vote_group
+from utils.voted_index import unmark_voted, start_voted_index_sync
+from utils.vote_timeseries import record_votes
+from utils.event_indexer import start_event_indexer
+
+load_dotenv()
+
+w3 = get_w3()
+contract = get_contract()
+
+FERNET_KEY = os.getenv("FERNET_KEY")
+if not FERNET_KEY:
+    raise RuntimeError("FERNET_KEY missing in env")
+fernet = Fernet(FERNET_KEY.encode())
+
+BATCH_BASE_GAS = int(os.getenv("VOTE_BATCH_BASE_GAS", 100000))
+BATCH_GAS_PER_VOTE = int(os.getenv("VOTE_BATCH_GAS_PER_VOTE", 200000))
+
+# Entries pending this long (ms) on a dead consumer are claimed by a live one.
+# Always past RECEIPT_TIMEOUT so live work is not double-submitted: the owner
+# gives up on (or re-claims) an entry before anyone else may take it.
+VOTE_RECLAIM_IDLE_MS = max(int(os.getenv("VOTE_RECLAIM_IDLE_MS", 2 * RECEIPT_TIMEOUT * 1000)),
+                           int((RECEIPT_TIMEOUT + 60) * 1000))
+VOTE_RECLAIM_INTERVAL = float(os.getenv("VOTE_RECLAIM_INTERVAL", 30))
+RELAYER_STATS_TTL = int(os.getenv("RELAYER_STATS_TTL", 120))
+# Transient failures (RPC errors, a tx that is neither mined nor known to the
+# node) leave entries pending for XAUTOCLAIM; after this many attempts a vote
+# is failed for good.
+VOTE_MAX_ATTEMPTS = int(os.getenv("VOTE_MAX_ATTEMPTS", 5))
+VOTE_ATTEMPTS_KEY = "vote:attempts"     # hash stream_id -> submissions so far
+
+
+class PermanentVoteFailure(Exception):
+    """The batch can never succeed as is (reverted / rejected by the contract)."""
+
+
+def decrypt_private_key(encrypted_pk: str) -> str:
+    return fernet.decrypt(encrypted_pk.encode()).decode()
+
+
+def load_admin_secret(admin_wallet: str) -> str:
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            text("SELECT wallet_secret FROM admin WHERE wallet_address = :wallet"),
+            {"wallet": admin_wallet}
+        ).fetchone()
+    finally:
+        db.close()
+
+    if not row:
+        raise Exception(f"No admin found for wallet {admin_wallet}")
+    return row[0]
+
+
+def load_admin_signer(admin_wallet: str):
+    return w3.eth.account.from_key(decrypt_private_key(load_admin_secret(admin_wallet)))
+
+
+signer_cache = SignerCache(load_admin_signer)
+
+
+def key_for_wallet(wallet: str):
+    """Private key lookup for the nonce reconciler (admin wallets, super admin, funding)."""
+    if wallet == os.getenv("PUBLIC_ADDRESS_SUPER_ADMIN"):
+        return os.getenv("PRIVATE_KEY_SUPER_ADMIN")
+    if os.getenv("FUNDING_KEY") and wallet == w3.eth.account.from_key(os.getenv("FUNDING_KEY")).address:
+        return os.getenv("FUNDING_KEY")
+    try:
+        return signer_cache.get(wallet).key
+    except Exception:
+        return None
+
+
+def ack_votes(admin_wallet: str, votes: list):
+    """ACK + drop resolved entries and free their admission slots."""
+    stream_ids = [v["stream_id"] for v in votes]
+    with redis_client.pipeline() as pipe:
+        pipe.xack(VOTE_STREAM, VOTE_GROUP, *stream_ids)
+        pipe.xdel(VOTE_STREAM, *stream_ids)
+        pipe.hdel(VOTE_ATTEMPTS_KEY, *stream_ids)
+        pipe.execute()
+    finish_votes(admin_wallet, *[v["voter_id_hmac"] for v in votes])
+
+
+# ---------- BATCH SUBMISSION ----------
+def fail_vote_batch(admin_wallet: str, votes: list, reason: str):
+    set_vote_statuses(admin_wallet, {
+        v["voter_id_hmac"]: {"status": "failed", "reason": reason} for v in votes
+    })
+    # Free the client's Idempotency-Key before the voter, so a retry that
+    # finds the voter free never finds the key still bound
+    release_idempotency_for_voters(admin_wallet, *[v["voter_id_hmac"] for v in votes])
+    unmark_voted(admin_wallet, *[v["voter_id_hmac"] for v in votes])
+    ack_votes(admin_wallet, votes)
+    record_votes(admin_wallet, len(votes), "failed")
+
+
+def retry_vote_batch(admin_wallet: str, votes: list, reason: str):
+    """
+    Transient failure: leave the entries un-ACKed so XAUTOCLAIM hands them
+    out again after VOTE_RECLAIM_IDLE_MS. Votes that used up VOTE_MAX_ATTEMPTS
+    are failed instead.
+    """
+    with redis_client.pipeline() as pipe:
+        for v in votes:
+            pipe.hincrby(VOTE_ATTEMPTS_KEY, v["stream_id"], 1)
+        attempts = pipe.execute()
+
+    exhausted = [v for v, n in zip(votes, attempts) if n >= VOTE_MAX_ATTEMPTS]
+    if exhausted:
+        fail_vote_batch(admin_wallet, exhausted, f"Gave up after {VOTE_MAX_ATTEMPTS} attempts: {reason}")
+    print(f"Vote batch for {admin_wallet} will be retried ({len(votes) - len(exhausted)} votes): {reason}")
+
+
+def skipped_has_voted(admin_wallet: str, skipped: list, block_number: int) -> dict:
+    """
+    hasVoted for every skipped voter at the receipt's block: one Multicall3
+    eth_call, or one call per voter on chains where Multicall3 is not
+    deployed (local anvil) or the aggregate call fails.
+    """
+    if not skipped:
+        return {}
+    try:
+        answers = aggregate_sync(
+            contract, "hasVoted", [[admin_wallet, voter_id_hmac] for voter_id_hmac in skipped], ["bool"],
+            block_identifier=block_number,
+        )
+        if all(answer is not None for answer in answers):
+            return {voter_id_hmac: answer[0] for voter_id_hmac, answer in zip(skipped, answers)}
+    except Exception as e:
+        print(f"hasVoted multicall failed, falling back to per-voter calls: {e}")
+    return {
+        voter_id_hmac: contract.functions.hasVoted(admin_wallet, voter_id_hmac).call(block_identifier=block_number)
+        for voter_id_hmac in skipped
+    }
+
+
+def finish_vote_batch(admin_wallet: str, votes: list, tx_hash: str, previous: dict, receipt):
+    """Receipt callback: resolve every voter of the batch, then ACK the stream entries."""
+    voter_ids = [v["voter_id_hmac"] for v in votes]
+
+    if receipt.status != 1:
+        raise PermanentVoteFailure("castVotesBatch transaction reverted")
+
+    # Entries the contract skipped (already voted / unknown candidate) emit VoteSkipped
+    cast = {ev["args"]["voterId"] for ev in contract.events.VoteCast().process_receipt(receipt, errors=DISCARD)}
+
+    skipped = [voter_id_hmac for voter_id_hmac in voter_ids if voter_id_hmac not in cast]
+    has_voted = skipped_has_voted(admin_wallet, skipped, receipt.blockNumber)
+
+    statuses = {}
+    not_cast = []
+    for voter_id_hmac in voter_ids:
+        if voter_id_hmac in cast:
+            statuses[voter_id_hmac] = {
+                "status": "success",
+                "tx_hash": tx_hash,
+                "block_number": receipt.blockNumber,
+            }
+        elif has_voted[voter_id_hmac]:
+            if voter_id_hmac in previous:
+                # Reclaimed entry whose first attempt already landed before the crash
+                statuses[voter_id_hmac] = {"status": "success", "tx_hash": previous[voter_id_hmac]}
+            else:
+                statuses[voter_id_hmac] = {
+                    "status": "failed",
+                    "reason": "Voter has already cast a vote for this admin.",
+                    "tx_hash": tx_hash,
+                    "block_number": receipt.blockNumber,
+                }
+        else:
+            not_cast.append(voter_id_hmac)
+            statuses[voter_id_hmac] = {
+                "status": "failed",
+                "reason": "Skipped by contract (candidate not registered)",
+                "tx_hash": tx_hash,
+                "block_number": receipt.blockNumber,
+            }
+    set_vote_statuses(admin_wallet, statuses)
+    release_idempotency_for_voters(admin_wallet, *not_cast)
+    unmark_voted(admin_wallet, *not_cast)
+    ack_votes(admin_wallet, votes)
+    record_votes(admin_wallet, len(cast & set(voter_ids)))
+    record_votes(admin_wallet, sum(1 for s in statuses.values() if s["status"] == "failed"), "failed")
+
+    print(f"Vote batch cast successfully: {tx_hash} ({len(cast)}/{len(votes)} votes)")
+
+
+def process_vote_batch(admin_wallet: str, votes: list, consumer: str = None) -> Future:
+    """
+    Submit every queued vote of one admin as a single castVotesBatch tx.
+    votes: [{"stream_id", "voter_id_hmac", "candidate"}, ...]
+    Each voter's vote_status key resolves to the shared tx hash / block.
+
+    Returns right after broadcasting; the receipt tracker resolves the batch.
+    The returned future completes once statuses are written and the stream
+    entries ACKed, or once a transient failure left them pending for
+    XAUTOCLAIM. A crash before that leaves them pending for another relayer
+    to reclaim.
+    """
+    admin_wallet = w3.to_checksum_address(admin_wallet)
+    voter_ids = [v["voter_id_hmac"] for v in votes]
+    candidates = [v["candidate"] for v in votes]
+    done = Future()
+    nonce = None
+
+    # Tx hashes from an earlier attempt of a reclaimed entry
+    previous = {}
+    for voter_id_hmac in voter_ids:
+        status = get_vote_status(admin_wallet, voter_id_hmac)
+        if status and status.get("tx_hash"):
+            previous[voter_id_hmac] = status["tx_hash"]
+
+    try:
+        account = signer_cache.get(admin_wallet)
+        nonce = allocate_nonce(admin_wallet)
+
+        # Build tx: castVotesBatch(voterIds, candidates) uses msg.sender = admin
+        txn = contract.functions.castVotesBatch(voter_ids, candidates).build_transaction({
+            "chainId": CHAIN_ID,
+            "from": account.address,
+            "nonce": nonce,
+            "gas": BATCH_BASE_GAS + BATCH_GAS_PER_VOTE * len(votes),
+            **get_fee_params(),
+        })
+
+        signed_txn = account.sign_transaction(txn)
+        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction).hex()
+        set_vote_statuses(admin_wallet, {
+            voter_id_hmac: {"status": "submitted", "tx_hash": tx_hash} for voter_id_hmac in voter_ids
+        })
+
+    except Exception as e:
+        print(f"Error casting vote batch: {e}")
+        if nonce is not None:
+            handle_send_error(admin_wallet, nonce, e)
+        if isinstance(e, ContractLogicError):
+            fail_vote_batch(admin_wallet, votes, str(e))
+        else:
+            retry_vote_batch(admin_wallet, votes, str(e))
+        done.set_result(None)
+        return done
+    record_sent_tx(admin_wallet, nonce, txn, tx_hash)
+
+    def on_receipt(receipt, error, tx_hash=tx_hash):
+        retracked = False
+        try:
+            if isinstance(error, TimeoutError):
+                # Not mined within RECEIPT_TIMEOUT: look the tx up (following any
+                # fee re-pricing by the nonce reconciler) before giving up on it
+                tx_hash = current_tx_hash(tx_hash)
+                receipt = _lookup_receipt(admin_wallet, tx_hash)
+                if receipt is None and _is_pending(admin_wallet, tx_hash):
+                    if consumer:
+                        # Still ours: reset idle time so XAUTOCLAIM elsewhere leaves it alone
+                        redis_client.xclaim(VOTE_STREAM, VOTE_GROUP, consumer, 0,
+                                            [v["stream_id"] for v in votes], justid=True)
+                    receipt_tracker.track(tx_hash, callback=lambda r, e: on_receipt(r, e, tx_hash))
+                    retracked = True
+                    return
+                if receipt is None:
+                    raise Exception(f"Transaction {tx_hash} was not mined and is unknown to the node")
+            elif error:
+                raise error
+            mark_nonce_mined(admin_wallet, nonce)
+            finish_vote_batch(admin_wallet, votes, tx_hash, previous, receipt)
+        except PermanentVoteFailure as e:
+            print(f"Error casting vote batch {tx_hash}: {e}")
+            fail_vote_batch(admin_wallet, votes, str(e))
+        except Exception as e:
+            print(f"Error resolving vote batch {tx_hash}: {e}")
+            retry_vote_batch(admin_wallet, votes, str(e))
+        finally:
+            if not retracked:
+                done.set_result(None)
+
+    receipt_tracker.track(tx_hash, callback=on_receipt)
+    return done
+
+
+# Asked of the endpoint the wallet's txs are sent to: a tx still in that node's
+# mempool can be unknown to whichever pool endpoint would answer a plain read
+def _lookup_receipt(admin_wallet: str, tx_hash: str):
+    try:
+        return get_w3(write_endpoint(admin_wallet)).eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+
+def _is_pending(admin_wallet: str, tx_hash: str) -> bool:
+    try:
+        return get_w3(write_endpoint(admin_wallet)).eth.get_transaction(tx_hash) is not None
+    except TransactionNotFound:
+        return False
+
+
+# ---------- STREAM CONSUMER ----------
+class VoteRelayer:
+    def __init__(self, consumer_name: str = None):
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batcher = VoteBatcher(self._submit_batch)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def _submit_batch(self, admin_wallet: str, votes: list):
+        def _release(_):
+            with self._lock:
+                self._in_flight.difference_update(v["stream_id"] for v in votes)
+
+        process_vote_batch(admin_wallet, votes, self.consumer_name).add_done_callback(_release)
+
+    def _dispatch(self, entries):
+        for stream_id, fields in entries:
+            if not fields:
+                # Entry was deleted (already ACKed elsewhere); just clear it from the PEL
+                redis_client.xack(VOTE_STREAM, VOTE_GROUP, stream_id)
+                continue
+            with self._lock:
+                if stream_id in self._in_flight:
+                    continue
+                self._in_flight.add(stream_id)
+            self.batcher.add(fields["admin_wallet"], {
+                "stream_id": stream_id,
+                "voter_id_hmac": fields["voter_id_hmac"],
+                "candidate": fields["candidate"],
+            })
+
+    def reclaim(self):
+        """Take over entries left pending by relayers that died mid-batch."""
+        start = "0-0"
+        while True:
+            result = redis_client.xautoclaim(
+                VOTE_STREAM, VOTE_GROUP, self.consumer_name,
+                min_idle_time=VOTE_RECLAIM_IDLE_MS, start_id=start, count=VOTE_BATCH_SIZE,
+            )
+            start, entries = result[0], result[1]
+            if entries:
+                print(f"Reclaimed {len(entries)} pending votes")
+                self._dispatch(entries)
+            if start in ("0-0", b"0-0"):
+                break
+
+    def publish_stats(self):
+        """Signer cache hit/miss/eviction counters, readable by the API (relayers have no HTTP)."""
+        key = f"relayer:stats:{self.consumer_name}"
+        with redis_client.pipeline() as pipe:
+            pipe.hset(key, mapping=signer_cache.snapshot())
+            pipe.expire(key, RELAYER_STATS_TTL)
+            pipe.execute()
+
+    def run(self):
+        ensure_vote_group()
+        self.batcher.start()
+        start_fee_sampler()
+        start_voted_index_sync()
+        start_event_indexer()
+        run_reconciler(key_for_wallet)
+        signer_cache.listen_for_evictions()
+        print(f"Vote relayer {self.consumer_name} listening on {VOTE_STREAM}/{VOTE_GROUP}")
+
+        # Our own pending entries from a previous run of this consumer name
+        backlog = redis_client.xreadgroup(VOTE_GROUP, self.consumer_name, {VOTE_STREAM: "0"})
+        for _, entries in backlog or []:
+            self._dispatch(entries)
+
+        last_reclaim = 0
+        while True:
+            try:
+                if time.monotonic() - last_reclaim >= VOTE_RECLAIM_INTERVAL:
+                    self.reclaim()
+                    self.publish_stats()
+                    last_reclaim = time.monotonic()
+                response = redis_client.xreadgroup(
+                    VOTE_GROUP, self.consumer_name, {VOTE_STREAM: ">"},
+                    count=VOTE_BATCH_SIZE, block=int(VOTE_BATCH_WINDOW * 1000),
+                )
+                for _, entries in response or []:
+                    self._dispatch(entries)
+            except Exception as e:
+                print(f"Relayer loop error: {e}")
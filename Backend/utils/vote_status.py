@@ -0,0 +1,129 @@
+import json
+from database.db import redis_client
+from utils.voted_index import voted_key
+
+VOTE_STATUS_TTL = 300
+IDEMPOTENCY_TTL = 86400   # how long a client Idempotency-Key is remembered
+
+# Add the voter to the voted index and write its first status in one step, so
+# a racing request that finds the voter reserved always finds the status too.
+# Returns 1 if this call reserved the voter, 0 if it was already in the index.
+RESERVE_LUA = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('PUBLISH', ARGV[4], ARGV[5])
+return 1
+"""
+
+_reserve = redis_client.register_script(RESERVE_LUA)
+
+
+def vote_status_key(admin_wallet: str, voter_id_hmac: str) -> str:
+    return f"vote_status:{admin_wallet}:{voter_id_hmac}"
+
+
+def vote_status_channel(admin_wallet: str) -> str:
+    """Pub/sub channel carrying every status transition for one admin's booth."""
+    return f"channel:vote_status:{admin_wallet}"
+
+
+def _event(voter_id_hmac: str, status: dict) -> str:
+    return json.dumps({"vote_ref": voter_id_hmac, **status})
+
+
+def set_vote_status(admin_wallet: str, voter_id_hmac: str, status: dict, ex: int = VOTE_STATUS_TTL):
+    with redis_client.pipeline() as pipe:
+        pipe.set(vote_status_key(admin_wallet, voter_id_hmac), json.dumps(status), ex=ex)
+        pipe.publish(vote_status_channel(admin_wallet), _event(voter_id_hmac, status))
+        pipe.execute()
+
+
+def set_vote_statuses(admin_wallet: str, statuses: dict, ex: int = VOTE_STATUS_TTL):
+    """
+    Write many per-voter statuses in one round trip.
+    statuses: {voter_id_hmac: status_dict}
+    """
+    with redis_client.pipeline() as pipe:
+        for voter_id_hmac, status in statuses.items():
+            pipe.set(vote_status_key(admin_wallet, voter_id_hmac), json.dumps(status), ex=ex)
+            pipe.publish(vote_status_channel(admin_wallet), _event(voter_id_hmac, status))
+        pipe.execute()
+
+
+def reserve_vote(admin_wallet: str, voter_id_hmac: str, status: dict, ex: int = VOTE_STATUS_TTL, client=None) -> bool:
+    """mark_voted + set_vote_status atomically. False if the voter was already reserved."""
+    return _reserve(
+        keys=[voted_key(admin_wallet), vote_status_key(admin_wallet, voter_id_hmac)],
+        args=[voter_id_hmac, json.dumps(status), ex, vote_status_channel(admin_wallet), _event(voter_id_hmac, status)],
+        client=client,
+    ) == 1
+
+
+def reserve_votes(admin_wallet: str, voter_id_hmacs: list, status: dict, ex: int = VOTE_STATUS_TTL) -> list:
+    """reserve_vote for a chunk of voters in one round trip; True where newly reserved."""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for voter_id_hmac in voter_id_hmacs:
+            reserve_vote(admin_wallet, voter_id_hmac, status, ex, client=pipe)
+        return [added == 1 for added in pipe.execute()]
+
+
+def unreserve_votes(admin_wallet: str, *voter_id_hmacs: str):
+    """Undo reserve_vote for voters that never reached the vote stream."""
+    if not voter_id_hmacs:
+        return
+    with redis_client.pipeline() as pipe:
+        pipe.srem(voted_key(admin_wallet), *voter_id_hmacs)
+        pipe.delete(*[vote_status_key(admin_wallet, voter_id_hmac) for voter_id_hmac in voter_id_hmacs])
+        pipe.execute()
+
+
+def get_vote_status(admin_wallet: str, voter_id_hmac: str):
+    status = redis_client.get(vote_status_key(admin_wallet, voter_id_hmac))
+    return json.loads(status) if status else None
+
+
+def idempotency_key(admin_wallet: str, key: str) -> str:
+    return f"idempotency:{admin_wallet}:{key}"
+
+
+def idempotency_voter_key(admin_wallet: str, voter_id_hmac: str) -> str:
+    """Reverse mapping voter -> client key, so the relayer can free the key of a failed vote."""
+    return f"idempotency:voter:{admin_wallet}:{voter_id_hmac}"
+
+
+def claim_idempotency_key(admin_wallet: str, key: str, voter_id_hmac: str, ex: int = IDEMPOTENCY_TTL):
+    """
+    Bind a client Idempotency-Key to a voter. Returns None if this call claimed it,
+    otherwise the voter HMAC it was first used for.
+    """
+    if redis_client.set(idempotency_key(admin_wallet, key), voter_id_hmac, nx=True, ex=ex):
+        redis_client.set(idempotency_voter_key(admin_wallet, voter_id_hmac), key, ex=ex)
+        return None
+    return redis_client.get(idempotency_key(admin_wallet, key))
+
+
+def release_idempotency_key(admin_wallet: str, key: str):
+    redis_client.delete(idempotency_key(admin_wallet, key))
+
+
+def release_idempotency_for_voters(admin_wallet: str, *voter_id_hmacs: str):
+    """
+    Unbind the Idempotency-Keys of votes that failed, so the client can retry
+    with the same key. A key already rebound to another voter is left alone.
+    """
+    if not voter_id_hmacs:
+        return
+    reverse_keys = [idempotency_voter_key(admin_wallet, voter_id_hmac) for voter_id_hmac in voter_id_hmacs]
+    client_keys = redis_client.mget(reverse_keys)
+    bound = [(voter_id_hmac, key) for voter_id_hmac, key in zip(voter_id_hmacs, client_keys) if key]
+    if not bound:
+        return
+    bound_to = redis_client.mget([idempotency_key(admin_wallet, key) for _, key in bound])
+    with redis_client.pipeline() as pipe:
+        pipe.delete(*reverse_keys)
+        for (voter_id_hmac, key), current in zip(bound, bound_to):
+            if current == voter_id_hmac:
+                pipe.delete(idempotency_key(admin_wallet, key))
+        pipe.execute()
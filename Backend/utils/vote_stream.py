@@ -0,0 +1,58 @@
+import os
+import redis
+from dotenv import load_dotenv
+from database.db import redis_client
+
+load_dotenv()
+
+# Durable vote queue: API processes XADD, relayer workers XREADGROUP + XACK
+VOTE_STREAM = os.getenv("VOTE_STREAM", "vote-stream")
+VOTE_GROUP = os.getenv("VOTE_GROUP", "vote-relayers")
+VOTE_STREAM_MAXLEN = int(os.getenv("VOTE_STREAM_MAXLEN", 1000000))
+
+
+def ensure_vote_group():
+    """Create the stream + consumer group once; safe to call from every process."""
+    try:
+        redis_client.xgroup_create(VOTE_STREAM, VOTE_GROUP, id="0", mkstream=True)
+    except redis.exceptions.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def enqueue_vote(admin_wallet: str, voter_id_hmac: str, candidate: str) -> str:
+    """
+    Append one accepted vote to the stream. Returns the stream entry id.
+    The admin key is not put on the stream; relayers load it from the admin table.
+    """
+    return redis_client.xadd(
+        VOTE_STREAM,
+        {
+            "admin_wallet": admin_wallet,
+            "voter_id_hmac": voter_id_hmac,
+            "candidate": candidate,
+        },
+        maxlen=VOTE_STREAM_MAXLEN,
+        approximate=True,
+    )
+
+
+def enqueue_votes(admin_wallet: str, votes: list) -> list:
+    """
+    enqueue_vote for many (voter_id_hmac, candidate) pairs in one round trip.
+    Sent as one MULTI/EXEC: either every entry lands or none does, so a
+    caller that sees an error can undo the whole chunk.
+    """
+    with redis_client.pipeline(transaction=True) as pipe:
+        for voter_id_hmac, candidate in votes:
+            pipe.xadd(
+                VOTE_STREAM,
+                {
+                    "admin_wallet": admin_wallet,
+                    "voter_id_hmac": voter_id_hmac,
+                    "candidate": candidate,
+                },
+                maxlen=VOTE_STREAM_MAXLEN,
+                approximate=True,
+            )
+        return pipe.execute()
@@ -0,0 +1,116 @@
+import os
+import time
+import redis
+from dotenv import load_dotenv
+from database.db import redis_client
+
+load_dotenv()
+
+# Votes per admin per time bucket, kept in fixed-size ring buffers: one Redis
+# string per (metric, wallet, resolution) holding SLOTS unsigned 32-bit
+# counters updated with BITFIELD. Slot = bucket % SLOTS; a head key remembers
+# the newest bucket so slots from the previous lap are zeroed before reuse.
+TIMESERIES_MINUTE_SLOTS = int(os.getenv("TIMESERIES_MINUTE_SLOTS", 48 * 60))   # 48h of minutes
+TIMESERIES_HOUR_SLOTS = int(os.getenv("TIMESERIES_HOUR_SLOTS", 30 * 24))       # 30 days of hours
+
+RESOLUTIONS = {
+    "minute": (60, TIMESERIES_MINUTE_SLOTS),
+    "hour": (3600, TIMESERIES_HOUR_SLOTS),
+}
+METRICS = ("confirmed", "failed")
+
+RING_INCR_LUA = """
+local bucket = tonumber(ARGV[1])
+local slots = tonumber(ARGV[2])
+local head = tonumber(redis.call('GET', KEYS[2]) or '-1')
+if bucket > head then
+    if head < 0 or bucket - head >= slots then
+        redis.call('DEL', KEYS[1])
+    else
+        for b = head + 1, bucket do
+            redis.call('BITFIELD', KEYS[1], 'SET', 'u32', '#' .. (b % slots), 0)
+        end
+    end
+    redis.call('SET', KEYS[2], bucket)
+elseif bucket <= head - slots then
+    return 0
+end
+redis.call('BITFIELD', KEYS[1], 'INCRBY', 'u32', '#' .. (bucket % slots), ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+_ring_incr = redis_client.register_script(RING_INCR_LUA)
+
+# Ring contents are binary; read them on a connection that does not decode to str
+_pool = redis_client.connection_pool
+_raw_client = redis.Redis(connection_pool=redis.ConnectionPool(
+    connection_class=_pool.connection_class,
+    **{**_pool.connection_kwargs, "decode_responses": False},
+))
+
+
+def ring_key(metric: str, admin_wallet: str, resolution: str) -> str:
+    return f"ts:{metric}:{admin_wallet}:{resolution}"
+
+
+def record_votes(admin_wallet: str, count: int, metric: str = "confirmed", at: float = None):
+    """Add `count` to the current minute and hour buckets of `admin_wallet`."""
+    if count <= 0:
+        return
+    at = at or time.time()
+    with redis_client.pipeline(transaction=False) as pipe:
+        for resolution, (seconds, slots) in RESOLUTIONS.items():
+            key = ring_key(metric, admin_wallet, resolution)
+            _ring_incr(
+                keys=[key, f"{key}:head"],
+                args=[int(at // seconds), slots, count, seconds * slots],
+                client=pipe,
+            )
+        pipe.execute()
+
+
+def _slot_ranges(first_bucket: int, last_bucket: int, slots: int) -> list:
+    """Byte ranges (start, end inclusive) covering buckets first..last of the ring, oldest first."""
+    first_slot, last_slot = first_bucket % slots, last_bucket % slots
+    if first_slot <= last_slot:
+        return [(first_slot * 4, last_slot * 4 + 3)]
+    return [(first_slot * 4, slots * 4 - 1), (0, last_slot * 4 + 3)]
+
+
+def read_series(admin_wallets: list, resolution: str = "minute", points: int = 60,
+                metric: str = "confirmed", now: float = None) -> dict:
+    """
+    {"start": ts of first bucket, "step": seconds, "series": {wallet: [counts oldest -> newest]}}
+    with the newest bucket being the current (partial) one.
+    """
+    seconds, slots = RESOLUTIONS[resolution]
+    points = max(1, min(points, slots))
+    last_bucket = int((now or time.time()) // seconds)
+    first_bucket = last_bucket - points + 1
+    ranges = _slot_ranges(first_bucket, last_bucket, slots)
+
+    with _raw_client.pipeline(transaction=False) as pipe:
+        for admin_wallet in admin_wallets:
+            key = ring_key(metric, admin_wallet, resolution)
+            pipe.get(f"{key}:head")
+            for start, end in ranges:
+                pipe.getrange(key, start, end)
+        replies = pipe.execute()
+
+    series = {}
+    step = 1 + len(ranges)
+    for i, admin_wallet in enumerate(admin_wallets):
+        head, *chunks = replies[i * step:(i + 1) * step]
+        expected = [end - start + 1 for start, end in ranges]
+        data = b"".join(chunk.ljust(size, b"\0") for chunk, size in zip(chunks, expected))
+        counts = [int.from_bytes(data[j:j + 4], "big") for j in range(0, len(data), 4)]
+
+        # Buckets after the last write still hold the previous lap's counts
+        head = int(head) if head is not None else first_bucket - 1
+        for j in range(max(0, head - first_bucket + 1), points):
+            counts[j] = 0
+        series[admin_wallet] = counts
+
+    return {"start": first_bucket * seconds, "step": seconds, "series": series}
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from database.db import redis_client
+from utils.chain_registry import get_w3, get_contract, ranked_endpoints
+from utils.redis_lock import RenewedLock
+
+load_dotenv()
+
+# Local copy of hasVoted: one Redis set of voter HMACs per admin wallet.
+# Filled when a vote is accepted and reconciled from VoteCast logs, so
+# /cast-vote only asks the chain when the reconciler is behind.
+# Contract deploy block (printed by deploy-contract/deploy_contract_superadmin.py).
+# Required: without it the first sync would walk the chain from genesis.
+VOTED_INDEX_START_BLOCK = os.getenv("VOTED_INDEX_START_BLOCK")
+VOTED_INDEX_INTERVAL = float(os.getenv("VOTED_INDEX_INTERVAL", 5))
+VOTED_INDEX_LOCK_TTL = float(os.getenv("VOTED_INDEX_LOCK_TTL", 30))      # renewed while a sync runs
+VOTED_INDEX_MAX_LAG = float(os.getenv("VOTED_INDEX_MAX_LAG", 30))        # seconds before a miss is not trusted
+VOTED_INDEX_CHUNK = int(os.getenv("VOTED_INDEX_CHUNK", 2000))            # blocks per eth_getLogs call
+
+CHECKPOINT_KEY = "voted_index:checkpoint"
+SYNCED_AT_KEY = "voted_index:synced_at"
+
+
+def voted_key(admin_wallet: str) -> str:
+    return f"voted:{admin_wallet}"
+
+
+def mark_voted(admin_wallet: str, voter_id_hmac: str) -> bool:
+    """Add to the index. False if the voter was already in it."""
+    return redis_client.sadd(voted_key(admin_wallet), voter_id_hmac) == 1
+
+
+def mark_voted_many(admin_wallet: str, voter_id_hmacs: list) -> list:
+    """mark_voted for a chunk of voters in one round trip; True where newly added."""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for voter_id_hmac in voter_id_hmacs:
+            pipe.sadd(voted_key(admin_wallet), voter_id_hmac)
+        return [added == 1 for added in pipe.execute()]
+
+
+def unmark_voted(admin_wallet: str, *voter_id_hmacs: str):
+    """Drop voters whose vote did not make it on chain."""
+    if voter_id_hmacs:
+        redis_client.srem(voted_key(admin_wallet), *voter_id_hmacs)
+
+
+def is_voted(admin_wallet: str, voter_id_hmac: str):
+    """
+    True  -> voter is in the index
+    False -> not in the index and the reconciler is caught up
+    None  -> not in the index but the reconciler is lagging; ask the chain
+    """
+    with redis_client.pipeline() as pipe:
+        pipe.sismember(voted_key(admin_wallet), voter_id_hmac)
+        pipe.get(SYNCED_AT_KEY)
+        member, synced_at = pipe.execute()
+
+    if member:
+        return True
+    if synced_at and time.time() - float(synced_at) <= VOTED_INDEX_MAX_LAG:
+        return False
+    return None
+
+
+def is_voted_many(admin_wallet: str, voter_id_hmacs: list) -> list:
+    """is_voted for a chunk of voters in one round trip."""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for voter_id_hmac in voter_id_hmacs:
+            pipe.sismember(voted_key(admin_wallet), voter_id_hmac)
+        pipe.get(SYNCED_AT_KEY)
+        *members, synced_at = pipe.execute()
+
+    fresh = bool(synced_at) and time.time() - float(synced_at) <= VOTED_INDEX_MAX_LAG
+    return [True if member else (False if fresh else None) for member in members]
+
+
+def sync_voted_index(lock: RenewedLock = None) -> int:
+    """Apply VoteCast logs from the checkpoint up to the latest block. Returns new checkpoint."""
+    checkpoint = redis_client.get(CHECKPOINT_KEY)
+    if checkpoint is None and VOTED_INDEX_START_BLOCK is None:
+        raise RuntimeError("VOTED_INDEX_START_BLOCK (contract deploy block) is not set")
+    start = int(checkpoint if checkpoint is not None else VOTED_INDEX_START_BLOCK)
+
+    # Head and logs from the same endpoint: a lagging node answers empty logs
+    # for blocks past its own head, which would move the checkpoint over them
+    endpoint = ranked_endpoints()[0]
+    contract = get_contract(endpoint)
+    latest = get_w3(endpoint).eth.block_number
+
+    while start <= latest:
+        if lock and not lock.held():
+            return start
+        end = min(start + VOTED_INDEX_CHUNK - 1, latest)
+        events = contract.events.VoteCast().get_logs(from_block=start, to_block=end)
+
+        with redis_client.pipeline() as pipe:
+            for ev in events:
+                pipe.sadd(voted_key(ev["args"]["admin"]), ev["args"]["voterId"])
+            pipe.set(CHECKPOINT_KEY, end + 1)
+            pipe.execute()
+        start = end + 1
+
+    redis_client.set(SYNCED_AT_KEY, time.time())
+    return start
+
+
+def start_voted_index_sync(interval: float = VOTED_INDEX_INTERVAL):
+    """Background reconciler; a Redis lock, renewed while a sync runs, keeps it to one process at a time."""
+    lock = RenewedLock("voted_index:sync-lock", ttl=VOTED_INDEX_LOCK_TTL)
+
+    def _loop():
+        while True:
+            try:
+                if lock.acquire():
+                    try:
+                        sync_voted_index(lock)
+                    finally:
+                        lock.release(keep_for=interval)
+            except Exception as e:
+                print(f"Voted index sync error: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, daemon=True).start()
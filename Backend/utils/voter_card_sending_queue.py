@@ -22,6 +22,25 @@ def enqueue_voter_card_email(voter_id, name, father_name, voter_dob, profile_pic
     redis_client.rpush(QUEUE_NAME, json.dumps(payload))
     queue_length = redis_client.llen(QUEUE_NAME)
     return {"status": "queued", "queue_position": queue_length}
+
+
+def enqueue_voter_card_emails(voters):
+    """
+    Bulk variant for imports: `voters` is an iterable of dicts with the same
+    fields as enqueue_voter_card_email; all jobs go out in one RPUSH.
+    """
+    payloads = [json.dumps({
+        "voter_id": v["voter_id"],
+        "name": v["name"],
+        "father_name": v["father_name"],
+        "voter_dob": v["voter_dob"],
+        "profile_picture": v.get("profile_picture"),
+        "signature": v.get("signature"),
+        "email": v["email"]
+    }) for v in voters]
+    if not payloads:
+        return 0
+    return redis_client.rpush(QUEUE_NAME, *payloads)
 # process.p
 
 QUEUE_NAME = "mail-queue"
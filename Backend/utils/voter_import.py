@@ -0,0 +1,316 @@
+import csv
+import io
+import os
+import re
+from datetime import date, datetime
+from dotenv import load_dotenv
+from database.db import engine
+from utils.id_generator import generateIdForVoters
+from utils.indian_states import INDIAN_STATES
+from utils.voter_card_sending_queue import enqueue_voter_card_emails
+
+load_dotenv()
+
+# Bulk electoral-roll import: rows are validated as they stream in, COPY'd into
+# a per-connection temp table, de-duplicated against the file and voterstable
+# with set-based queries and merged with one INSERT ... SELECT.
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", 10000))       # rows per COPY / per card-email RPUSH
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 5_000_000))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))        # row errors listed in the report
+IMPORT_MIN_AGE = int(os.getenv("IMPORT_MIN_AGE", 18))
+
+COLUMNS = [
+    "name", "father_name", "gender", "email", "contact_number", "aadhaar",
+    "voter_dob", "voters_state", "voters_city", "voters_district", "pincode",
+]
+STAGING_COLUMNS = ["line_no", "voter_id"] + COLUMNS
+
+GENDERS = {"male": "Male", "female": "Female", "other": "Other", "m": "Male", "f": "Female", "o": "Other"}
+STATES = {state.lower(): state for state in INDIAN_STATES}
+DOB_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+CONTACT_RE = re.compile(r"^[6-9]\d{9}$")
+PINCODE_RE = re.compile(r"^[1-9]\d{5}$")
+AADHAAR_RE = re.compile(r"^[2-9]\d{11}$")
+
+STAGING_TABLE = "voter_import_staging"
+
+CREATE_STAGING = f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        line_no integer NOT NULL,
+        voter_id varchar(20) NOT NULL,
+        name varchar(100) NOT NULL,
+        father_name varchar(100) NOT NULL,
+        gender varchar(10) NOT NULL,
+        email varchar(100) NOT NULL,
+        contact_number varchar(15) NOT NULL,
+        aadhaar varchar(12) NOT NULL,
+        voter_dob date NOT NULL,
+        voters_state varchar(100) NOT NULL,
+        voters_city varchar(100) NOT NULL,
+        voters_district varchar(100) NOT NULL,
+        pincode varchar(10) NOT NULL,
+        status varchar(24) NOT NULL DEFAULT 'ok'
+    )
+"""
+
+# A later line sharing aadhaar, email or contact number with an earlier one
+MARK_FILE_DUPLICATES = f"""
+    UPDATE {STAGING_TABLE} s SET status = 'duplicate_in_file'
+    FROM (
+        SELECT line_no FROM (
+            SELECT line_no,
+                   row_number() OVER (PARTITION BY aadhaar ORDER BY line_no) AS by_aadhaar,
+                   row_number() OVER (PARTITION BY email ORDER BY line_no) AS by_email,
+                   row_number() OVER (PARTITION BY contact_number ORDER BY line_no) AS by_contact
+            FROM {STAGING_TABLE}
+        ) ranked
+        WHERE by_aadhaar > 1 OR by_email > 1 OR by_contact > 1
+    ) d
+    WHERE s.line_no = d.line_no
+"""
+
+MARK_REGISTERED = f"""
+    UPDATE {STAGING_TABLE} s SET status = 'already_registered'
+    WHERE s.status = 'ok' AND (
+        EXISTS (SELECT 1 FROM voterstable v WHERE v.aadhaar = s.aadhaar)
+        OR EXISTS (SELECT 1 FROM voterstable v WHERE v.email = s.email)
+        OR EXISTS (SELECT 1 FROM voterstable v WHERE v.contact_number = s.contact_number)
+    )
+"""
+
+# aadhaar is unique among 'ok' rows, so it identifies what actually got inserted
+MERGE = f"""
+    WITH inserted AS (
+        INSERT INTO voterstable
+            (voter_id, aadhaar, name, father_name, gender, email, contact_number,
+             voter_dob, voters_state, voters_city, voters_district, pincode)
+        SELECT voter_id, aadhaar, name, father_name, gender, email, contact_number,
+               voter_dob, voters_state, voters_city, voters_district, pincode
+        FROM {STAGING_TABLE}
+        WHERE status = 'ok'
+        ON CONFLICT DO NOTHING
+        RETURNING aadhaar
+    )
+    UPDATE {STAGING_TABLE} s SET status = 'imported'
+    FROM inserted i
+    WHERE s.aadhaar = i.aadhaar AND s.status = 'ok'
+"""
+
+
+# ---------- VALIDATION ----------
+_VERHOEFF_D = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6], [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8], [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2], [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4], [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+_VERHOEFF_P = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2], [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
+    [9, 4, 5, 3, 1, 2, 6, 8, 7, 0], [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5], [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+
+
+def aadhaar_valid(aadhaar: str) -> bool:
+    """12 digits, not starting with 0/1, Verhoeff check digit last (UIDAI format)."""
+    if not AADHAAR_RE.match(aadhaar):
+        return False
+    check = 0
+    for i, digit in enumerate(reversed(aadhaar)):
+        check = _VERHOEFF_D[check][_VERHOEFF_P[i % 8][int(digit)]]
+    return check == 0
+
+
+def _parse_dob(value: str):
+    for fmt in DOB_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def validate_row(record: dict, today: date):
+    """Cleaned {column: value} for a CSV record, or raise ValueError with the reason."""
+    row = {column: (record.get(column) or "").strip() for column in COLUMNS}
+    missing = [column for column in COLUMNS if not row[column]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    row["aadhaar"] = row["aadhaar"].replace(" ", "").replace("-", "")
+    if not aadhaar_valid(row["aadhaar"]):
+        raise ValueError("invalid aadhaar")
+
+    dob = _parse_dob(row["voter_dob"])
+    if dob is None:
+        raise ValueError("voter_dob must be YYYY-MM-DD, DD-MM-YYYY or DD/MM/YYYY")
+    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+    if age < IMPORT_MIN_AGE or dob.year < 1900:
+        raise ValueError(f"voter_dob gives age {age}")
+    row["voter_dob"] = dob.isoformat()
+
+    state = STATES.get(row["voters_state"].lower())
+    if state is None:
+        raise ValueError(f"unknown state {row['voters_state']!r}")
+    row["voters_state"] = state
+
+    gender = GENDERS.get(row["gender"].lower())
+    if gender is None:
+        raise ValueError(f"unknown gender {row['gender']!r}")
+    row["gender"] = gender
+
+    if not EMAIL_RE.match(row["email"]) or len(row["email"]) > 100:
+        raise ValueError("invalid email")
+    row["contact_number"] = row["contact_number"].removeprefix("+91").strip()
+    if not CONTACT_RE.match(row["contact_number"]):
+        raise ValueError("invalid contact_number")
+    if not PINCODE_RE.match(row["pincode"]):
+        raise ValueError("invalid pincode")
+    for column in ("name", "father_name", "voters_city", "voters_district"):
+        if len(row[column]) > 100:
+            raise ValueError(f"{column} longer than 100 characters")
+    return row
+
+
+# ---------- IMPORT ----------
+class VoterImport:
+    """
+    One import on one pooled DB connection (the temp table lives on it).
+    Blocking methods; call them from a worker thread in async routes:
+        begin() -> add_lines() ... -> merge() -> enqueue_cards() -> close()
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.conn = engine.raw_connection()
+        self.header = None
+        self.today = date.today()
+        self.rows = 0
+        self.invalid = 0
+        self.errors = []
+        self.counts = {}
+
+    def begin(self):
+        with self.conn.cursor() as cur:
+            cur.execute(CREATE_STAGING)
+
+    def _error(self, line_no: int, reason: str):
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "error": reason})
+
+    def set_header(self, line: str):
+        header = [column.strip().lower() for column in next(csv.reader([line]))]
+        missing = [column for column in COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}")
+        self.header = header
+
+    def add_lines(self, lines: list):
+        """Validate [(line_no, text)] and COPY the good rows into the staging table."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line_no, line in lines:
+            self.rows += 1
+            if self.rows > IMPORT_MAX_ROWS:
+                raise ValueError(f"More than {IMPORT_MAX_ROWS} rows in one import")
+            try:
+                values = next(csv.reader([line], strict=True))
+                if len(values) != len(self.header):
+                    raise ValueError(f"expected {len(self.header)} fields, got {len(values)}")
+                row = validate_row(dict(zip(self.header, values)), self.today)
+            except (ValueError, csv.Error) as e:
+                self.invalid += 1
+                self._error(line_no, str(e))
+                continue
+            writer.writerow([line_no, generateIdForVoters()] + [row[column] for column in COLUMNS])
+
+        if buffer.tell():
+            buffer.seek(0)
+            with self.conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+
+    def merge(self, super_admin_id: str):
+        """Set-based de-duplication and insert; one transaction (rolled back on dry_run)."""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(f"ANALYZE {STAGING_TABLE}")
+                cur.execute(MARK_FILE_DUPLICATES)
+                cur.execute(MARK_REGISTERED)
+                cur.execute(MERGE)
+                # Rows still 'ok' lost a race with a concurrent /voter/register
+                cur.execute(f"UPDATE {STAGING_TABLE} SET status = 'conflict' WHERE status = 'ok'")
+
+                cur.execute(f"SELECT status, COUNT(*) FROM {STAGING_TABLE} GROUP BY status")
+                self.counts = dict(cur.fetchall())
+                cur.execute(
+                    f"""SELECT line_no, status FROM {STAGING_TABLE}
+                        WHERE status <> 'imported' ORDER BY line_no LIMIT %s""",
+                    (max(0, IMPORT_MAX_ERRORS - len(self.errors)),)
+                )
+                for line_no, status in cur.fetchall():
+                    self._error(line_no, status)
+
+                if self.dry_run:
+                    self.conn.rollback()
+                    return
+                cur.execute(
+                    """INSERT INTO super_admins_logs (super_admin_id, action_title, action, status)
+                       VALUES (%s, %s, %s, %s)""",
+                    (super_admin_id, "Imported Voters",
+                     f"Imported {self.counts.get('imported', 0)} of {self.rows} voter rows", "Success")
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def enqueue_cards(self) -> int:
+        """Queue voter-card emails for every imported row, IMPORT_CHUNK_ROWS per RPUSH."""
+        queued = 0
+        with self.conn.cursor(name="voter_import_cards") as cur:
+            cur.itersize = IMPORT_CHUNK_ROWS
+            cur.execute(
+                f"""SELECT voter_id, name, father_name, voter_dob, email FROM {STAGING_TABLE}
+                    WHERE status = 'imported' ORDER BY line_no"""
+            )
+            while True:
+                rows = cur.fetchmany(IMPORT_CHUNK_ROWS)
+                if not rows:
+                    break
+                queued += len(rows)
+                enqueue_voter_card_emails(
+                    {"voter_id": r[0], "name": r[1], "father_name": r[2], "voter_dob": r[3].isoformat(), "email": r[4]}
+                    for r in rows
+                )
+        self.conn.commit()
+        return queued
+
+    def close(self):
+        try:
+            self.conn.rollback()
+            with self.conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            self.conn.commit()
+        except Exception as e:
+            print(f"Voter import cleanup failed: {e}")
+        finally:
+            self.conn.close()
+
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "invalid": self.invalid,
+            "duplicate_in_file": self.counts.get("duplicate_in_file", 0),
+            "already_registered": self.counts.get("already_registered", 0),
+            "conflict": self.counts.get("conflict", 0),
+            "imported": self.counts.get("imported", 0),
+            "dry_run": self.dry_run,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+        }
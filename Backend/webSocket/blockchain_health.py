@@ -4,17 +4,14 @@ import time
 from fastapi import FastAPI, WebSocket
 from web3 import Web3
 from web3.middleware.proof_of_authority import ExtraDataToPOAMiddleware
+from utils.chain_registry import PooledHTTPProvider
 
-# Web3 Setup
+# Web3 Setup: same RPC pool (AVAX_RPC_URLS) as the rest of the app, own
+# instance so the POA middleware does not leak into the shared client
 
-HTTP_URL = "https://api.avax.network/ext/bc/C/rpc"
-WSS_URL  = "wss://api.avax.network/ext/bc/C/ws"
-
-w3_http = Web3(Web3.HTTPProvider(HTTP_URL))
-w3_ws   = Web3(Web3.LegacyWebSocketProvider(WSS_URL))
+w3_http = Web3(PooledHTTPProvider())
 
 w3_http.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-w3_ws.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
 
 last_block_time = None
 expected_block_interval = 2